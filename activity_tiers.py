@@ -0,0 +1,53 @@
+"""
+Activity tiers from a member's `activityPoints`.
+
+Shared by `/profile` (display), the role sweep (tier roles) and the
+low-activity alerts, so all three agree on where the boundaries are.
+"""
+from typing import Dict, List
+
+
+class Tier:
+    __slots__ = ('key', 'label')
+
+    def __init__(self, key: str, label: str):
+        self.key = key
+        self.label = label
+
+
+INACTIVE = Tier('inactive', "🔴 **Not Active**")
+ENOUGH = Tier('enough', "🟡 **Active Enough**")
+DECENT = Tier('decent', "🟢 **Decently Active**")
+EXTRAORDINARY = Tier('extraordinary', "💎 **Extraordinary Activity**")
+
+TIERS: List[Tier] = [INACTIVE, ENOUGH, DECENT, EXTRAORDINARY]
+
+# Points the sheet shows as text ('#N/A'); not a tier, nothing is changed for it
+UNKNOWN = Tier('unknown', "❔ **Unknown**")
+
+
+def activity_tier(points) -> Tier:
+    if isinstance(points, str):
+        return UNKNOWN
+    if points == 0:
+        return INACTIVE
+    elif points < 5:
+        return ENOUGH
+    elif points < 10:
+        return DECENT
+    return EXTRAORDINARY
+
+
+def parse_tier_roles(value: str) -> Dict[str, int]:
+    """ACTIVITY_TIER_ROLES: "inactive=<role id>,enough=<role id>,..." (unknown tiers are an error)"""
+    roles = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        key, _, role_id = item.partition("=")
+        key = key.strip()
+        if key not in {tier.key for tier in TIERS}:
+            raise ValueError(f"Unknown activity tier '{key}' in ACTIVITY_TIER_ROLES "
+                             f"(expected {', '.join(tier.key for tier in TIERS)})")
+        roles[key] = int(role_id)
+    return roles
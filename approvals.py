@@ -0,0 +1,135 @@
+"""
+Single-decision guard for approval buttons.
+
+Approve/Deny buttons stay clickable until the edit that removes them has
+gone through, so a double-click or two approvers clicking together would
+otherwise run the same decision twice (or an approve and a deny). Every
+request moves through pending -> processing -> done exactly once, keyed by
+an idempotency key (the approval message ID, or the bulk job ID). The
+transition is made under a per-request asyncio.Lock; the work itself runs
+outside the lock, so a duplicate click is answered immediately with who
+already took the request instead of waiting for it.
+
+    async with approvals.decide(message.id, 'approve', user.id) as decision:
+        if decision.duplicate:
+            ...acknowledge and return
+        ...do the work once
+
+A decision whose work failed before anything happened can call
+`decision.release()` to put the request back to pending, so the buttons
+(still on the message) can be clicked again.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+log = logging.getLogger("pennybot.approvals")
+
+PENDING = 'pending'
+PROCESSING = 'processing'
+DONE = 'done'
+
+RETAIN_DONE_SECONDS = 3600   # finished keys are remembered this long for late duplicate clicks
+
+
+class Decision:
+    __slots__ = ('key', 'state', 'action', 'actor_id', 'updated', 'duplicate')
+
+    def __init__(self, key, action: str, actor_id: int):
+        self.key = key
+        self.state = PENDING
+        self.action = action
+        self.actor_id = actor_id
+        self.updated = time.monotonic()
+        self.duplicate = False
+
+    def release(self):
+        """Nothing was done: let the request be decided again"""
+        self.state = PENDING
+
+    def duplicate_message(self) -> str:
+        verb = {'approve': 'approved', 'deny': 'denied'}.get(self.action, self.action)
+        if self.state == PROCESSING:
+            return f"This request is already being {verb} by <@{self.actor_id}>."
+        return f"This request was already **{verb}** by <@{self.actor_id}>."
+
+
+class _DuplicateDecision:
+    """What a losing click sees: the winner's decision, flagged as a duplicate"""
+    __slots__ = ('winner', 'duplicate')
+
+    def __init__(self, winner: Decision):
+        self.winner = winner
+        self.duplicate = True
+
+    def duplicate_message(self) -> str:
+        return self.winner.duplicate_message()
+
+
+class _Claim:
+    def __init__(self, registry: "ApprovalRegistry", key, action: str, actor_id: int):
+        self.registry = registry
+        self.key = key
+        self.action = action
+        self.actor_id = actor_id
+        self.decision: Optional[Decision] = None
+
+    async def __aenter__(self):
+        registry = self.registry
+        async with registry.lock(self.key):
+            existing = registry.decisions.get(self.key)
+            if existing is not None and existing.state != PENDING:
+                registry.duplicates += 1
+                log.info("🔁 Duplicate approval click ignored",
+                         extra={'key': str(self.key), 'action': self.action, 'user': self.actor_id,
+                                'taken_by': existing.actor_id, 'state': existing.state})
+                return _DuplicateDecision(existing)
+
+            self.decision = Decision(self.key, self.action, self.actor_id)
+            self.decision.state = PROCESSING
+            registry.decisions[self.key] = self.decision
+            return self.decision
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.decision is None:
+            return False
+        async with self.registry.lock(self.key):
+            if self.decision.state == PENDING:
+                # Released; a click after the release may already have taken the key again
+                if self.registry.decisions.get(self.key) is self.decision:
+                    del self.registry.decisions[self.key]
+            else:
+                # Even a failed decision stays done: part of the work may already have happened
+                self.decision.state = DONE
+                self.decision.updated = time.monotonic()
+        self.registry.prune()
+        return False
+
+
+class ApprovalRegistry:
+    def __init__(self):
+        self.decisions: Dict[object, Decision] = {}
+        self._locks: Dict[object, asyncio.Lock] = {}
+        self.duplicates = 0
+
+    def lock(self, key) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    def decide(self, key, action: str, actor_id: int) -> _Claim:
+        return _Claim(self, key, action, actor_id)
+
+    def state(self, key) -> str:
+        decision = self.decisions.get(key)
+        return decision.state if decision else PENDING
+
+    def prune(self):
+        cutoff = time.monotonic() - RETAIN_DONE_SECONDS
+        for key in [k for k, d in self.decisions.items() if d.state == DONE and d.updated < cutoff]:
+            del self.decisions[key]
+            lock = self._locks.get(key)
+            if lock is not None and not lock.locked():
+                del self._locks[key]
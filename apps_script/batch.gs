@@ -0,0 +1,41 @@
+/**
+ * Batch envelope support for the medal / personnel web apps.
+ *
+ * Add this file to the Apps Script project next to the existing doGet and
+ * redeploy. The bot POSTs
+ *
+ *   {"batch": [{"function": "getUserMedals", "params": {"userId": "..."}}, ...]}
+ *
+ * and every call is routed through the existing doGet, exactly as if it had
+ * arrived as ?function=...&userId=..., so no handler needs to change.
+ * Results come back in call order as {"success": true, "results": [...]}.
+ */
+function doPost(e) {
+  var payload;
+  try {
+    payload = JSON.parse(e.postData.contents);
+  } catch (err) {
+    return jsonOutput_({success: false, error: 'Invalid JSON'});
+  }
+
+  if (!payload || !Array.isArray(payload.batch)) {
+    return jsonOutput_({success: false, error: 'Expected {"batch": [...]}'});
+  }
+
+  var results = payload.batch.map(function (call) {
+    var parameter = Object.assign({}, call.params || {}, {'function': call['function']});
+    try {
+      return JSON.parse(doGet({parameter: parameter}).getContent());
+    } catch (err) {
+      return {success: false, error: String(err)};
+    }
+  });
+
+  return jsonOutput_({success: true, results: results});
+}
+
+function jsonOutput_(value) {
+  return ContentService
+    .createTextOutput(JSON.stringify(value))
+    .setMimeType(ContentService.MimeType.JSON);
+}
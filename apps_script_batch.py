@@ -0,0 +1,264 @@
+"""
+Client for the Apps Script web apps with a multiplexed batch envelope.
+
+Calls issued within a short window (or grouped explicitly with `call_many`)
+are packed into one POST whose body is
+
+    {"batch": [{"function": "getUserMedals", "params": {"userId": "..."}}, ...]}
+
+and the script answers with `{"success": true, "results": [...]}`, one result
+per call in the same order. Results are handed back to each awaiting caller.
+A lone call is still sent as the classic GET query string, and if the
+deployed script does not understand the envelope the client falls back to
+individual GETs and stops trying envelopes for a while.
+
+All requests share one aiohttp session instead of opening one per call.
+Response bodies are read as bytes up to `max_body` (a larger body is
+dropped as a failed call instead of being buffered whole) and parsed
+straight from the bytes, with orjson when it is installed. Given a `model`
+(see script_models.py), `call` checks the result and returns the typed
+model instead of the raw dict.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple, Type, TypeVar
+
+import aiohttp
+
+from script_models import SchemaError
+
+try:
+    from orjson import loads
+except ImportError:  # orjson not installed; the standard library parses bytes too
+    from json import loads
+
+log = logging.getLogger("pennybot.apps_script")
+
+BATCH_WINDOW = 0.015         # seconds to wait for more calls before sending
+MAX_BATCH = 50               # calls per envelope
+ENVELOPE_RETRY_AFTER = 600   # seconds before retrying envelopes after the script rejected one
+REQUEST_TIMEOUT = 60         # Apps Script can be slow to cold-start
+MAX_BODY_BYTES = 16 * 1024 * 1024   # largest response body accepted (after decompression)
+READ_CHUNK = 64 * 1024
+
+Call = Tuple[str, Optional[dict]]
+Model = TypeVar('Model')
+
+
+def _stringify(params: Optional[dict]) -> Dict[str, str]:
+    # Query-string parameters reach Apps Script as strings; keep envelopes identical
+    return {key: str(value) for key, value in (params or {}).items()}
+
+
+class AppsScriptClient:
+    def __init__(self, url: str, name: str = "medals", batching: bool = True,
+                 window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH, max_body: int = MAX_BODY_BYTES):
+        self.url = url
+        self.name = name
+        self.batching = batching
+        self.window = window
+        self.max_batch = max_batch
+        self.max_body = max_body
+        self.requests = 0
+        self.calls = 0
+        self.envelopes = 0
+        self.fallbacks = 0
+        self.oversized = 0
+        self.rejected = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: List[Tuple[str, Dict[str, str], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._resolving: Set[asyncio.Task] = set()   # keeps in-flight batches from being garbage collected
+        self._envelope_disabled_until = 0.0
+
+    # ── public API ─────────────────────────────────
+    async def call(self, function: str, params: Optional[dict] = None, model: Optional[Type[Model]] = None):
+        """Call one script function; returns the decoded JSON result (or `model`) or None on failure"""
+        self.calls += 1
+        if not self.batching:
+            result = await self._send_single(function, _stringify(params))
+            return result if model is None else self._decode(function, result, model)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((function, _stringify(params), future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        result = await future
+        return result if model is None else self._decode(function, result, model)
+
+    async def call_many(self, calls: List[Call], models: Optional[List[Optional[Type]]] = None) -> list:
+        """
+        Send a group of calls as one envelope (in order), bypassing the batching
+        window. `models` lines up with `calls`; a result with a model is decoded
+        as `call` does, the rest are returned as raw dicts.
+        """
+        self.calls += len(calls)
+        results = await self._dispatch([(function, _stringify(params)) for function, params in calls])
+        if models is None:
+            return results
+        return [result if model is None else self._decode(function, result, model)
+                for (function, _), result, model in zip(calls, results, models)]
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def stats(self) -> dict:
+        return {
+            'calls': self.calls,
+            'requests': self.requests,
+            'envelopes': self.envelopes,
+            'fallbacks': self.fallbacks,
+            'oversized': self.oversized,
+            'rejected': self.rejected,
+            'calls_per_request': round(self.calls / self.requests, 2) if self.requests else None,
+        }
+
+    def _decode(self, function: str, result: Optional[dict], model: Type[Model]) -> Optional[Model]:
+        """A successful result as `model`; script errors and unexpected shapes are logged and give None"""
+        if result is None:
+            return None
+        fields = {'function': function, 'script': self.name}
+        if not result.get('success'):
+            log.warning("⚠️ Apps Script reported an error", extra={**fields, 'error': result.get('error')})
+            return None
+        try:
+            return model.decode(result)
+        except SchemaError as e:
+            self.rejected += 1
+            log.warning(f"⚠️ Unexpected Apps Script response: {e}", extra=fields)
+            return None
+
+    # ── batching ───────────────────────────────────
+    def _flush(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch):
+            task = asyncio.get_running_loop().create_task(self._resolve(pending[start:start + self.max_batch]))
+            self._resolving.add(task)
+            task.add_done_callback(self._resolving.discard)
+
+    async def _resolve(self, pending: List[Tuple[str, Dict[str, str], asyncio.Future]]):
+        try:
+            results = await self._dispatch([(function, params) for function, params, _ in pending])
+        except Exception as e:
+            log.error(f"💥 Apps Script batch dispatch failed: {e}", extra={'script': self.name})
+            results = [None] * len(pending)
+
+        for (_, _, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _dispatch(self, calls: List[Tuple[str, Dict[str, str]]]) -> List[Optional[dict]]:
+        if len(calls) == 1:
+            return [await self._send_single(*calls[0])]
+
+        if time.monotonic() >= self._envelope_disabled_until:
+            results = await self._send_envelope(calls)
+            if results is not None:
+                return results
+
+        # No envelope support: still send the calls concurrently
+        self.fallbacks += 1
+        return list(await asyncio.gather(*(self._send_single(function, params) for function, params in calls)))
+
+    # ── transport ──────────────────────────────────
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT))
+        return self._session
+
+    async def _read_body(self, response: aiohttp.ClientResponse, fields: dict) -> Optional[bytes]:
+        """The response body, or None once it grows past max_body"""
+        size = response.content_length or 0
+        if size <= self.max_body:
+            # Counted as it streams in: the header is absent on chunked responses and covers
+            # the compressed size on gzipped ones
+            chunks, size = [], 0
+            async for chunk in response.content.iter_chunked(READ_CHUNK):
+                size += len(chunk)
+                if size > self.max_body:
+                    break
+                chunks.append(chunk)
+            else:
+                return b"".join(chunks)
+        self.oversized += 1
+        log.error(f"❌ Apps Script response larger than {self.max_body} bytes; dropped", extra={**fields, 'bytes': size})
+        return None
+
+    async def _send_single(self, function: str, params: Dict[str, str]) -> Optional[dict]:
+        started = time.perf_counter()
+        fields = {'function': function, 'script': self.name}
+        self.requests += 1
+        try:
+            async with self._get_session().get(self.url, params={'function': function, **params}) as response:
+                body = await self._read_body(response, fields)
+                fields.update(status=response.status, latency_ms=round((time.perf_counter() - started) * 1000, 1))
+
+                if body is None:
+                    return None
+                if response.status == 200:
+                    try:
+                        result = loads(body)
+                    except ValueError:
+                        log.warning("⚠️ Failed to parse JSON from Apps Script", extra=fields)
+                        return None
+                    if not isinstance(result, dict):
+                        log.warning("⚠️ Apps Script returned JSON that is not an object", extra=fields)
+                        return None
+                    log.debug("📡 Apps Script call", extra=fields)
+                    return result
+                else:
+                    log.error("❌ Apps Script call failed", extra=fields)
+                    return None
+        except Exception as e:
+            fields['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            log.error(f"💥 Exception calling Apps Script: {e}", extra=fields)
+            return None
+
+    async def _send_envelope(self, calls: List[Tuple[str, Dict[str, str]]]) -> Optional[List[Optional[dict]]]:
+        """POST a batch; returns None if the script does not support envelopes"""
+        started = time.perf_counter()
+        functions = [function for function, _ in calls]
+        fields = {'function': 'batch', 'script': self.name, 'calls': len(calls), 'functions': functions}
+        body = json.dumps({'batch': [{'function': function, 'params': params} for function, params in calls]})
+        self.requests += 1
+        self.envelopes += 1
+        try:
+            async with self._get_session().post(self.url, data=body,
+                                                headers={'Content-Type': 'application/json'}) as response:
+                body = await self._read_body(response, fields)
+                fields.update(status=response.status, latency_ms=round((time.perf_counter() - started) * 1000, 1))
+
+                if response.status != 200 or body is None:
+                    log.error("❌ Apps Script batch failed", extra=fields)
+                    return [None] * len(calls)
+
+                try:
+                    result = loads(body)
+                except ValueError:
+                    result = None
+
+                results = result.get('results') if isinstance(result, dict) else None
+                if not isinstance(results, list) or len(results) != len(calls):
+                    self._envelope_disabled_until = time.monotonic() + ENVELOPE_RETRY_AFTER
+                    log.warning("⚠️ Apps Script does not support batch envelopes; falling back to single calls",
+                                extra=fields)
+                    return None
+
+                log.debug("📡 Apps Script batch", extra=fields)
+                return [r if isinstance(r, dict) else None for r in results]
+        except Exception as e:
+            fields['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            log.error(f"💥 Exception sending Apps Script batch: {e}", extra=fields)
+            return [None] * len(calls)
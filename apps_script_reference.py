@@ -0,0 +1,308 @@
+"""
+Local stand-in for the medal and personnel Apps Script web apps.
+
+Implements the same functions the deployed scripts expose, against in-memory
+data, plus the batch envelope understood by `AppsScriptClient`:
+
+    GET  /exec?function=getUserMedals&userId=...           medal script
+    GET  /personnel/exec?function=findPersonnel&rpName=... personnel script
+    POST {"batch": [{"function", "params"}, ...]}          either path
+    GET  /stats                                            request counters
+
+Run it with `python apps_script_reference.py [port] [options]` and point
+APPS_SCRIPT_WEB_APP_URL at http://localhost:<port>/exec and
+PERSONNEL_SCRIPT_URL at http://localhost:<port>/personnel/exec to run the
+bot (or benchmarks/apps_script_bench.py) without Google. `--latency-ms`,
+`--jitter-ms` and `--error-rate` make every request behave like a slow or
+flaky deployment; `--users`, `--medal-types` and `--personnel` seed a
+synthetic dataset of that size. The `apps_script/batch.gs` file is the
+matching doPost for the real deployment.
+"""
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from aiohttp import web
+
+RANKS = ['Recruit', 'Private', 'Corporal', 'Sergeant', 'Lieutenant', 'Captain', 'Major']
+SHEETS = ['Navy Personnel', 'Army Personnel', 'Marine Personnel']
+FIRST_NAMES = ['John', 'Jane', 'Alex', 'Sam', 'Chris', 'Pat', 'Morgan', 'Riley', 'Jordan', 'Casey']
+LAST_NAMES = ['Smith', 'Doe', 'Reed', 'Hale', 'Price', 'Stone', 'Wells', 'Frost', 'Hart', 'Lane']
+
+
+class ReferenceSheet:
+    """Row 1 holds medal types, column A holds user IDs, a 'Y' marks a held medal"""
+
+    def __init__(self):
+        self.medal_types: List[str] = []
+        self.rows: Dict[str, set] = {}
+
+    # Each handler takes the (string) params dict and returns a JSON-able dict
+    def test(self, params):
+        return {'success': True, 'message': 'Reference sheet is reachable'}
+
+    def findUserRow(self, params):
+        user_id = params['userId']
+        if user_id not in self.rows:
+            return {'success': True, 'row': -1}
+        return {'success': True, 'row': list(self.rows).index(user_id) + 2}
+
+    def addUser(self, params):
+        user_id = params['userId']
+        self.rows.setdefault(user_id, set())
+        return self.findUserRow(params)
+
+    def getUserMedals(self, params):
+        held = self.rows.get(params['userId'], set())
+        return {'success': True, 'medals': [m for m in self.medal_types if m in held]}
+
+    def getUsersMedals(self, params):
+        user_ids = [uid for uid in params.get('userIds', '').split(',') if uid]
+        return {'success': True, 'users': {
+            uid: [m for m in self.medal_types if m in self.rows.get(uid, set())] for uid in user_ids
+        }}
+
+    def updateMedal(self, params):
+        user_id = params['userId']
+        medal = params['medalName']
+        if medal not in self.medal_types:
+            return {'success': False, 'error': f"Medal '{medal}' not found"}
+        if user_id not in self.rows:
+            return {'success': False, 'error': 'User not found'}
+        if params.get('hasMedal') == 'true':
+            self.rows[user_id].add(medal)
+        else:
+            self.rows[user_id].discard(medal)
+        return {'success': True}
+
+    def getAllMedalTypes(self, params):
+        return {'success': True, 'medals': list(self.medal_types)}
+
+    def addMedalType(self, params):
+        medal = params['medalName']
+        if medal in self.medal_types:
+            return {'success': False, 'error': 'Medal already exists'}
+        self.medal_types.append(medal)
+        return {'success': True}
+
+    def deleteMedalType(self, params):
+        medal = params['medalName']
+        if medal not in self.medal_types:
+            return {'success': False, 'error': 'Medal not found'}
+        self.medal_types.remove(medal)
+        for held in self.rows.values():
+            held.discard(medal)
+        return {'success': True}
+
+    def getMedalStats(self, params):
+        distribution = {m: sum(1 for held in self.rows.values() if m in held) for m in self.medal_types}
+        data = {'totalUsers': len(self.rows), 'totalMedalTypes': len(self.medal_types),
+                'medalDistribution': distribution}
+        if distribution:
+            name = max(distribution, key=distribution.get)
+            data['mostAwarded'] = {'name': name, 'count': distribution[name]}
+        return {'success': True, 'data': data}
+
+    def getMedalMatrix(self, params):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 1000))
+        user_ids = list(self.rows)[offset:offset + limit]
+        return {
+            'success': True,
+            'medals': list(self.medal_types),
+            'rows': [{'userId': uid, 'medals': [m for m in self.medal_types if m in self.rows[uid]]}
+                     for uid in user_ids],
+            'total': len(self.rows)
+        }
+
+    def functions(self) -> Dict[str, Callable[[dict], dict]]:
+        names = ('test', 'findUserRow', 'addUser', 'getUserMedals', 'getUsersMedals', 'updateMedal',
+                 'getAllMedalTypes', 'addMedalType', 'deleteMedalType', 'getMedalStats', 'getMedalMatrix')
+        return {name: getattr(self, name) for name in names}
+
+    def populate(self, users: int, medal_types: int, rng: random.Random) -> List[str]:
+        """Synthetic sheet: common (late) medals are held far more often than rare ones"""
+        self.medal_types = [f"Medal {i + 1}" for i in range(medal_types)]
+        weights = [i + 1 for i in range(medal_types)]
+        user_ids = [str(100000000000000000 + i) for i in range(users)]
+        for user_id in user_ids:
+            held = rng.choices(self.medal_types, weights, k=rng.randint(0, 8)) if self.medal_types else []
+            self.rows[user_id] = set(held)
+        return user_ids
+
+
+class ReferencePersonnel:
+    """Personnel sheets: one record per RP name, as returned by findPersonnel"""
+
+    def __init__(self):
+        self.records: Dict[str, dict] = {}   # casefolded RP name -> record (with 'sheet')
+
+    def test(self, params):
+        return {'success': True, 'message': 'Reference personnel sheets are reachable'}
+
+    def findPersonnel(self, params):
+        record = self.records.get(params['rpName'].strip().casefold())
+        if record is None:
+            return {'success': True, 'found': False}
+        personnel = {key: value for key, value in record.items() if key != 'sheet'}
+        return {'success': True, 'found': True, 'personnel': personnel, 'sheet': record['sheet']}
+
+    def getAllPersonnel(self, params):
+        return {'success': True, 'personnel': list(self.records.values())}
+
+    def functions(self) -> Dict[str, Callable[[dict], dict]]:
+        names = ('test', 'findPersonnel', 'getAllPersonnel')
+        return {name: getattr(self, name) for name in names}
+
+    def populate(self, count: int, rng: random.Random, user_ids: Optional[List[str]] = None):
+        """Synthetic roster; the first len(user_ids) records carry a discordId"""
+        user_ids = user_ids or []
+        for i in range(count):
+            rp_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i + 1}"
+            days = rng.randint(1, 900)
+            record = {
+                'rpName': rp_name,
+                'rank': rng.choice(RANKS),
+                'activityPoints': rng.choice([0, 0, 1, 2, 3, 4, 5, 7, 9, 12, 20]),
+                'dateOfEnlistment': f"{days} days ago",
+                'daysEnlisted': days,
+                'seadad': rng.choice(['None', 'John Smith 1', 'Jane Doe 2']),
+                'loaDaysLeft': rng.choice([0] * 9 + [rng.randint(1, 30)]),
+                'sheet': rng.choice(SHEETS),
+            }
+            if i < len(user_ids):
+                record['discordId'] = user_ids[i]
+            self.records[rp_name.casefold()] = record
+
+
+class Simulation:
+    """Per-request latency and failures, applied to every round trip"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+    async def delay(self):
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def fails(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+
+def dispatch(functions: Dict[str, Callable[[dict], dict]], function: str, params: dict) -> dict:
+    handler = functions.get(function)
+    if not handler:
+        return {'success': False, 'error': f"Unknown function: {function}"}
+    try:
+        return handler(params)
+    except KeyError as e:
+        return {'success': False, 'error': f"Missing parameter: {e.args[0]}"}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def handle_batch(functions: Dict[str, Callable[[dict], dict]], payload: dict) -> dict:
+    """Run every call of an envelope in order and return the results array"""
+    batch = payload.get('batch')
+    if not isinstance(batch, list):
+        return {'success': False, 'error': 'Expected {"batch": [...]}'}
+    return {'success': True, 'results': [
+        dispatch(functions, call.get('function'), call.get('params') or {}) for call in batch
+    ]}
+
+
+def add_script_routes(app: web.Application, path: str, functions: Dict[str, Callable[[dict], dict]],
+                      simulation: Simulation, stats: Counter):
+    """GET (single call) and POST (batch envelope) handlers for one script at `path`"""
+
+    async def simulate() -> Optional[web.Response]:
+        stats['requests'] += 1
+        await simulation.delay()
+        if simulation.fails():
+            # What a failing deployment returns: an HTML error page, not JSON
+            stats['errors'] += 1
+            return web.Response(status=500, text="<html><body>Service error: Apps Script</body></html>",
+                                content_type='text/html')
+        return None
+
+    async def handle_get(request: web.Request):
+        params = dict(request.query)
+        function = params.pop('function', '')
+        error = await simulate()
+        if error is not None:
+            return error
+        stats[function] += 1
+        return web.json_response(dispatch(functions, function, params))
+
+    async def handle_post(request: web.Request):
+        error = await simulate()
+        if error is not None:
+            return error
+        try:
+            payload = json.loads(await request.text())
+        except json.JSONDecodeError:
+            return web.json_response({'success': False, 'error': 'Invalid JSON'})
+        stats['envelopes'] += 1
+        for call in payload.get('batch') or []:
+            stats[call.get('function')] += 1
+        return web.json_response(handle_batch(functions, payload))
+
+    app.router.add_get(path, handle_get)
+    app.router.add_post(path, handle_post)
+
+
+def make_app(functions: Dict[str, Callable[[dict], dict]], simulation: Optional[Simulation] = None) -> web.Application:
+    app = web.Application()
+    app['stats'] = Counter()
+    add_script_routes(app, '/exec', functions, simulation or Simulation(), app['stats'])
+    return app
+
+
+def make_server(sheet: ReferenceSheet, personnel: ReferencePersonnel,
+                simulation: Optional[Simulation] = None) -> web.Application:
+    """Medal script at /exec, personnel script at /personnel/exec, counters at /stats"""
+    simulation = simulation or Simulation()
+    app = make_app(sheet.functions(), simulation)
+    app['personnel_stats'] = Counter()
+    add_script_routes(app, '/personnel/exec', personnel.functions(), simulation, app['personnel_stats'])
+
+    async def handle_stats(request: web.Request):
+        return web.json_response({'medals': dict(app['stats']), 'personnel': dict(app['personnel_stats'])})
+
+    app.router.add_get('/stats', handle_stats)
+    return app
+
+
+def build(args: argparse.Namespace) -> web.Application:
+    rng = random.Random(args.seed)
+    sheet = ReferenceSheet()
+    user_ids = sheet.populate(args.users, args.medal_types, rng)
+    personnel = ReferencePersonnel()
+    personnel.populate(args.personnel, rng, user_ids)
+    simulation = Simulation(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.seed)
+    return make_server(sheet, personnel, simulation)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added to every request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Latency varies by +/- this much")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--users', type=int, default=0, help="Users seeded into the medal sheet")
+    parser.add_argument('--medal-types', type=int, default=0, help="Medal types seeded into row 1")
+    parser.add_argument('--personnel', type=int, default=0, help="Records seeded into the personnel sheets")
+    parser.add_argument('--seed', type=int, default=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Apps Script stand-in")
+    parser.add_argument('port', type=int, nargs='?', default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(build(args), port=args.port)
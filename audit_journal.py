@@ -0,0 +1,155 @@
+"""
+Append-only audit journal of discharge and medal decisions.
+
+Each request, approval and denial is appended as one JSON line. On startup the
+file is replayed into memory and indexed by target, requester, approver,
+medal and kind, so /history can answer "everything that happened to user X"
+or "every award of medal Y in the last 30 days" without scanning the journal.
+Records are appended in time order, so time ranges are a bisect.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger("pennybot.audit")
+
+KINDS = ('discharge', 'medal_award', 'medal_removal')
+ACTIONS = ('request', 'approve', 'deny')
+
+# Fields that get a secondary index; 'target' is multi-valued
+INDEXED_FIELDS = ('target', 'requester', 'approver', 'medal', 'kind', 'action')
+
+
+def _medal_key(name: str) -> str:
+    return name.strip().casefold()
+
+
+def _contains(posting: List[int], position: int) -> bool:
+    i = bisect.bisect_left(posting, position)
+    return i < len(posting) and posting[i] == position
+
+
+class AuditJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.records: List[dict] = []
+        self._times: List[float] = []
+        self._index: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self._lock = asyncio.Lock()
+        self._load()
+
+    @property
+    def version(self) -> int:
+        """Changes with every appended record (the journal is append-only)"""
+        return len(self.records)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._add(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+
+        log.info(f"📜 Loaded audit journal: {len(self.records)} records")
+
+    def _keys(self, record: dict) -> Iterable[tuple]:
+        for target in dict.fromkeys(record.get('targets') or ()):
+            yield 'target', str(target)
+        for field in ('requester', 'approver', 'kind', 'action'):
+            if record.get(field):
+                yield field, str(record[field])
+        if record.get('medal'):
+            yield 'medal', _medal_key(record['medal'])
+
+    def _add(self, record: dict):
+        position = len(self.records)
+        self.records.append(record)
+        self._times.append(record['ts'])
+        for field, value in self._keys(record):
+            self._index[field].setdefault(value, []).append(position)
+
+    def _append_sync(self, record: dict):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def append(self, kind: str, action: str, *, requester: Optional[int] = None,
+                     approver: Optional[int] = None, targets: Iterable[int] = (),
+                     medal: Optional[str] = None, reason: Optional[str] = None,
+                     ref: Optional[int] = None, **extra) -> dict:
+        """Record one action. `ref` is the approval message id tying a request to its decision"""
+        if kind not in KINDS or action not in ACTIONS:
+            raise ValueError(f"Unknown audit entry: {kind}/{action}")
+
+        record = {
+            'ts': time.time(),
+            'kind': kind,
+            'action': action,
+            'requester': str(requester) if requester else None,
+            'approver': str(approver) if approver else None,
+            'targets': [str(t) for t in targets],
+            'medal': medal,
+            'reason': reason,
+            'ref': str(ref) if ref else None,
+        }
+        record.update(extra)
+
+        async with self._lock:
+            await asyncio.to_thread(self._append_sync, record)
+            self._add(record)
+        return record
+
+    def query(self, *, target: Optional[int] = None, requester: Optional[int] = None,
+              approver: Optional[int] = None, medal: Optional[str] = None,
+              kind: Optional[str] = None, action: Optional[str] = None,
+              since: Optional[float] = None, limit: int = 25) -> Tuple[List[dict], int]:
+        """
+        Return up to `limit` matching records, newest first, plus the total
+        number of matches. Every filter is an index lookup; the smallest
+        posting list drives the scan and the others are bisect membership
+        checks (posting lists are kept in append order, i.e. sorted).
+        """
+        filters = {
+            'target': str(target) if target else None,
+            'requester': str(requester) if requester else None,
+            'approver': str(approver) if approver else None,
+            'medal': _medal_key(medal) if medal else None,
+            'kind': kind,
+            'action': action,
+        }
+        postings = [self._index[field].get(value, []) for field, value in filters.items() if value]
+
+        start = bisect.bisect_left(self._times, since) if since else 0
+
+        if postings:
+            postings.sort(key=len)
+            driver = postings[0]
+            others = postings[1:]
+            first = bisect.bisect_left(driver, start)
+            candidates = (driver[i] for i in range(len(driver) - 1, first - 1, -1))
+        else:
+            others = []
+            candidates = iter(range(len(self.records) - 1, start - 1, -1))
+
+        matches = []
+        total = 0
+        for position in candidates:
+            if all(_contains(other, position) for other in others):
+                total += 1
+                if len(matches) < limit:
+                    matches.append(self.records[position])
+
+        return matches, total
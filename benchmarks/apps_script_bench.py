@@ -0,0 +1,234 @@
+"""
+End-to-end latency of the sheet helper layer against the local Apps Script stand-in.
+
+    python benchmarks/apps_script_bench.py [--latency-ms 300] [--jitter-ms 100] [--error-rate 0.02]
+                                           [--users 500] [--medal-types 30] [--personnel 500]
+                                           [--iterations 40] [--concurrency 1 8]
+
+Starts apps_script_reference.py in-process with the given latency, error
+rate and dataset size, points the bot's configuration at it and drives the
+real helpers in sheets.py (read cache, batching client, write queue) plus
+the medal approval flow. For every operation it reports p50/p99 latency and
+the HTTP round trips it cost, counted on the server side. Each concurrency
+level runs every operation with that many callers at once, which is where
+the client's batch envelopes pay off.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web  # noqa: E402
+
+import apps_script_reference  # noqa: E402
+from interaction_tracing import percentile  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Result:
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.samples: List[float] = []
+        self.failures = 0
+        self.round_trips = 0
+
+    def line(self) -> str:
+        n = len(self.samples)
+        return (f"{self.name:<34} c={self.concurrency:<3} n={n:<5} p50={percentile(self.samples, 50):8.1f}ms "
+                f"p99={percentile(self.samples, 99):8.1f}ms round trips/op={self.round_trips / max(n, 1):5.2f} "
+                f"failed={self.failures}")
+
+
+async def measure(name: str, op: Callable[[int], Awaitable[bool]], iterations: int, concurrency: int,
+                  app: web.Application, prepare: Callable[[], None] = lambda: None) -> Result:
+    """Run op(i) `iterations` times, `concurrency` at a time; op returns False on a failed call"""
+    result = Result(name, concurrency)
+    stats = [app['stats'], app['personnel_stats']]
+    before = sum(s['requests'] for s in stats)
+
+    async def one(i: int):
+        started = time.perf_counter()
+        try:
+            ok = await op(i)
+        except Exception:
+            ok = False
+        result.samples.append((time.perf_counter() - started) * 1000)
+        if not ok:
+            result.failures += 1
+
+    for start in range(0, iterations, concurrency):
+        prepare()
+        await asyncio.gather(*(one(i) for i in range(start, min(iterations, start + concurrency))))
+    result.round_trips = sum(s['requests'] for s in stats) - before
+    return result
+
+
+async def run(args: argparse.Namespace):
+    port = free_port()
+    data_dir = tempfile.mkdtemp(prefix="pennybot-bench-")
+    # config.py reads these at import time and refuses to start without them
+    os.environ.update({
+        'DISCORD_TOKEN': os.environ.get('DISCORD_TOKEN', 'benchmark'),
+        'APPS_SCRIPT_WEB_APP_URL': f"http://127.0.0.1:{port}/exec",
+        'PERSONNEL_SCRIPT_URL': f"http://127.0.0.1:{port}/personnel/exec",
+        'DATA_DIR': data_dir,
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'CRITICAL'),
+        'LOG_FORMAT': 'text',
+    })
+
+    app = apps_script_reference.build(args)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    import sheets
+    from approvals import ApprovalRegistry
+
+    user_ids = [str(100000000000000000 + i) for i in range(args.users)]
+    new_users = iter(str(200000000000000000 + i) for i in range(10 ** 6))
+    roster = await sheets.fetch_roster() or []
+    rp_names = [record.rp_name for record in roster]
+    medal_types = await sheets.fetch_medal_types() or ["Medal 1"]
+    cache = sheets.sheet_cache
+    approvals = ApprovalRegistry()
+    approval_keys = itertools.count()
+    print(f"Stand-in on :{port} • latency {args.latency_ms:g}±{args.jitter_ms:g} ms • error rate {args.error_rate:g} • "
+          f"{len(user_ids)} users, {len(medal_types)} medal types, {len(rp_names)} personnel records")
+
+    def user(i: int) -> str:
+        return user_ids[i % len(user_ids)] if user_ids else next(new_users)
+
+    def clear_medal_cache():
+        cache.user_medals.clear()
+        cache.medal_types = None
+
+    def clear_personnel_cache():
+        cache.personnel.clear()
+        cache.put_roster([], fetched=0.0)
+
+    async def get_user_medals_cold(i):
+        return await sheets.fetch_user_medals(user(i)) is not None
+
+    async def get_user_medals_cached(i):
+        return await sheets.get_user_medals(user(i)) is not None
+
+    async def get_medal_types_cold(i):
+        return await sheets.fetch_medal_types() is not None
+
+    async def get_users_medals(i):
+        batch = [user(i * 25 + j) for j in range(25)]
+        return len(await sheets.get_users_medals(batch)) == len(batch)
+
+    async def medal_stats(i):
+        return await sheets.get_medal_stats() is not None
+
+    async def find_personnel(i):
+        return await sheets.find_personnel(rp_names[i % len(rp_names)] if rp_names else f"Nobody {i}") is not None
+
+    async def roster_pull(i):
+        return await sheets.fetch_roster() is not None
+
+    async def profile_with_medals(i):
+        name = rp_names[i % len(rp_names)] if rp_names else f"Nobody {i}"
+        personnel, _ = await asyncio.gather(sheets.find_personnel(name), sheets.get_user_medals(user(i)))
+        return personnel is not None
+
+    async def ensure_user_row(i):
+        return await sheets.ensure_user_row(next(new_users))
+
+    async def award_approval(i):
+        # MedalApprovalView.approve for 3 targets, then the write queue applying it
+        async with approvals.decide(f"bench:{next(approval_keys)}", 'approve', 1) as decision:
+            if decision.duplicate:
+                return False
+            await sheets.sheet_queue.enqueue_many([
+                ('updateMedal', {'userId': user(i * 3 + j), 'medalName': medal_types[i % len(medal_types)],
+                                 'hasMedal': 'true'})
+                for j in range(3)
+            ])
+        await sheets.sheet_queue.flush()
+        return not sheets.sheet_queue.failed
+
+    async def double_click_approval(i):
+        # Two approvers clicking at once: exactly one write goes through
+        key = f"double:{next(approval_keys)}"
+
+        async def click(actor):
+            async with approvals.decide(key, 'approve', actor) as decision:
+                if decision.duplicate:
+                    return False
+                await sheets.sheet_queue.enqueue('updateMedal', {
+                    'userId': user(i), 'medalName': medal_types[0], 'hasMedal': 'false'})
+                await sheets.sheet_queue.flush()
+                return True
+        return sum(await asyncio.gather(click(1), click(2))) == 1
+
+    async def warm_medals():
+        await sheets.get_users_medals([user(i) for i in range(args.iterations)])
+        await sheets.fetch_medal_types()
+
+    async def warm_roster():
+        await sheets.fetch_roster()
+
+    async def nothing():
+        pass
+
+    # (name, operation, before each group of concurrent calls, once before the operation)
+    operations = [
+        ("getUserMedals (cold)", get_user_medals_cold, clear_medal_cache, nothing),
+        ("getUserMedals (cached)", get_user_medals_cached, lambda: None, warm_medals),
+        ("getAllMedalTypes (cold)", get_medal_types_cold, clear_medal_cache, nothing),
+        ("getUsersMedals x25 (cold)", get_users_medals, clear_medal_cache, nothing),
+        ("getMedalStats", medal_stats, lambda: None, nothing),
+        ("findPersonnel (cold)", find_personnel, clear_personnel_cache, nothing),
+        ("getAllPersonnel", roster_pull, lambda: None, nothing),
+        ("findPersonnel (roster loaded)", find_personnel, lambda: None, warm_roster),
+        ("profile + medals (cold)", profile_with_medals,
+         lambda: (clear_personnel_cache(), clear_medal_cache()), nothing),
+        ("profile + medals (roster loaded)", profile_with_medals, clear_medal_cache, warm_roster),
+        ("ensureUserRow (new user)", ensure_user_row, lambda: None, nothing),
+        ("medal award approval x3", award_approval, lambda: None, warm_medals),
+        ("double-click approval", double_click_approval, lambda: None, warm_medals),
+    ]
+
+    try:
+        for concurrency in args.concurrency:
+            print()
+            for name, op, prepare, setup in operations:
+                await setup()
+                result = await measure(name, op, args.iterations, concurrency, app, prepare)
+                print(result.line())
+        print(f"\nServer: {app['stats']['requests'] + app['personnel_stats']['requests']} request(s), "
+              f"{app['stats']['errors'] + app['personnel_stats']['errors']} simulated error(s), "
+              f"{app['stats']['envelopes'] + app['personnel_stats']['envelopes']} batch envelope(s)")
+    finally:
+        await sheets.apps_script.close()
+        await sheets.personnel_script.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    apps_script_reference.add_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=40, help="Calls per operation and concurrency level")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8])
+    parser.set_defaults(latency_ms=300.0, jitter_ms=100.0, users=500, medal_types=30, personnel=500)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
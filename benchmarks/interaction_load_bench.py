@@ -0,0 +1,557 @@
+"""
+Interaction throughput under load, against a fake Discord REST API.
+
+    python benchmarks/interaction_load_bench.py [--concurrency 1 8 32 128] [--iterations 64] [--mixed]
+                                                [--discord-latency-ms 80] [--discord-jitter-ms 30]
+                                                [--channel-bucket 5] [--latency-ms 300] [--jitter-ms 100] ...
+
+Builds the real bot from bot.py with its extensions (minus the keep-alive web
+server), logs it in against a local stand-in for the Discord REST API and
+feeds it synthetic INTERACTION_CREATE payloads through the same entry point
+the gateway uses, so the command tree, modal and view dispatch, the
+`traced()` watchdog and discord.py's own HTTP and rate-limit handling are
+all in the loop. The sheet side is apps_script_reference.py in-process.
+
+Scenarios: /showmedals, /profile, MedalAwardModal and DischargeModal
+submissions, and Approve clicks on MedalApprovalView and
+DischargeApprovalView (the approval messages are seeded untimed). Each
+concurrency level runs every scenario with that many interactions in
+flight; --mixed also runs them all interleaved. For each handler it
+reports throughput, latency from dispatch to the acknowledgment arriving
+at Discord and to the handler finishing, and deadline misses. Like the real
+API, the fake one rejects callbacks that arrive more than 3 seconds after
+the interaction was created. --channel-bucket emulates the per-channel
+message rate limit (messages per 5 seconds, 0 = none) that every request
+posted to the approval channel shares. Member edits carry no rate-limit
+headers, so discord.py sends them one at a time per guild, which is the
+most it may assume before Discord has told it the bucket size.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web  # noqa: E402
+
+import apps_script_reference  # noqa: E402
+from interaction_tracing import percentile, INTERACTION_DEADLINE  # noqa: E402
+
+GUILD_ID = 900000000000000001
+COMMANDS_CHANNEL_ID = 900000000000000002
+APPLICATION_ID = 900000000000000003
+BOT_USER_ID = APPLICATION_ID
+STAFF_BASE_ID = 300000000000000000
+STAFF = 32
+UNKNOWN_INTERACTION = 10062
+UNKNOWN_MEMBER = 10007
+BUCKET_WINDOW = 5.0
+UNLIMITED_BUCKET = 10000   # --channel-bucket 0 still sends headers, or discord.py sends one at a time
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+_snowflake_seq = itertools.count()
+
+
+def snowflake() -> int:
+    """A unique ID carrying the current time, like the ones Discord hands out"""
+    millis = int(time.time() * 1000) - 1420070400000
+    return (millis << 22) | (next(_snowflake_seq) & 0x3FFFFF)
+
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {'id': str(user_id), 'username': name, 'global_name': name, 'discriminator': '0', 'avatar': None,
+            'bot': bot}
+
+
+def json_response(data, status: int = 200, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    # discord.py only decodes bodies whose Content-Type is exactly application/json (no charset)
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers={'Content-Type': 'application/json', **(headers or {})})
+
+
+def member_payload(user_id: int, name: str, roles: List[int], nick: Optional[str] = None) -> dict:
+    return {'user': user_payload(user_id, name), 'nick': nick, 'roles': [str(role) for role in roles],
+            'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False, 'mute': False, 'flags': 0}
+
+
+# ────────────────────────────────────────────────
+#   1. Fake Discord REST API
+# ────────────────────────────────────────────────
+class FakeDiscord:
+    """
+    Just enough of the REST API for the handlers under test. Half the
+    simulated latency is spent before a request is handled and half after,
+    so an acknowledgment is timestamped when it would reach Discord.
+    """
+
+    def __init__(self, latency: float, jitter: float, channel_bucket: int, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.channel_bucket = channel_bucket
+        self.rng = random.Random(seed)
+        self.bot_user = user_payload(BOT_USER_ID, "PennyBot", bot=True)
+        self.members: Dict[int, dict] = {}
+        self.messages: Dict[int, dict] = {}
+        self.created: Dict[int, float] = {}   # interaction ID -> monotonic time it was dispatched
+        self.acks: Dict[int, float] = {}      # interaction ID -> monotonic time its callback arrived
+        self.requests: Dict[str, int] = {}
+        self.rate_limited = 0
+        self.expired = 0
+        self._buckets: Dict[int, Tuple[float, int]] = {}   # channel ID -> (window start, messages sent)
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.network])
+        app.router.add_get('/api/v10/users/@me', self.get_me)
+        app.router.add_post('/api/v10/interactions/{interaction_id}/{token}/callback', self.callback)
+        app.router.add_post('/api/v10/webhooks/{application_id}/{token}', self.followup)
+        app.router.add_route('*', '/api/v10/webhooks/{application_id}/{token}/messages/{message_id}',
+                             self.webhook_message)
+        app.router.add_post('/api/v10/channels/{channel_id}/messages', self.channel_message)
+        app.router.add_get('/api/v10/guilds/{guild_id}/members/{user_id}', self.get_member)
+        app.router.add_patch('/api/v10/guilds/{guild_id}/members/{user_id}', self.edit_member)
+        return app
+
+    @web.middleware
+    async def network(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unknown"
+        key = f"{request.method} {route.replace('/api/v10', '')}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)) / 2
+        await asyncio.sleep(delay)
+        response = await handler(request)
+        await asyncio.sleep(delay)
+        return response
+
+    @staticmethod
+    def error(status: int, code: int, message: str) -> web.Response:
+        return json_response({'message': message, 'code': code}, status=status)
+
+    @staticmethod
+    async def body(request: web.Request) -> dict:
+        if request.content_type == 'application/json':
+            return await request.json()
+        if request.content_type.startswith('multipart/'):
+            form = await request.post()
+            return json.loads(form.get('payload_json') or '{}')
+        await request.read()
+        return {}
+
+    def message(self, channel_id: int, body: dict, message_id: Optional[int] = None) -> dict:
+        message_id = message_id or snowflake()
+        message = {
+            'id': str(message_id), 'channel_id': str(channel_id), 'author': self.bot_user,
+            'content': body.get('content') or '', 'embeds': body.get('embeds') or [],
+            'components': body.get('components') or [], 'attachments': [], 'mentions': [], 'mention_roles': [],
+            'mention_everyone': False, 'pinned': False, 'tts': False, 'type': 0, 'flags': body.get('flags') or 0,
+            'timestamp': datetime.now(timezone.utc).isoformat(), 'edited_timestamp': None,
+        }
+        self.messages[message_id] = message
+        return message
+
+    async def get_me(self, request: web.Request):
+        return json_response(self.bot_user)
+
+    async def callback(self, request: web.Request):
+        interaction_id = int(request.match_info['interaction_id'])
+        now = time.monotonic()
+        await self.body(request)
+        created = self.created.get(interaction_id)
+        if created is None or now - created > INTERACTION_DEADLINE:
+            self.expired += 1
+            return self.error(404, UNKNOWN_INTERACTION, "Unknown interaction")
+        self.acks.setdefault(interaction_id, now)
+        return web.Response(status=204)
+
+    async def followup(self, request: web.Request):
+        return json_response(self.message(COMMANDS_CHANNEL_ID, await self.body(request)))
+
+    async def webhook_message(self, request: web.Request):
+        body = await self.body(request)
+        message_id = request.match_info['message_id']
+        message_id = snowflake() if message_id == '@original' else int(message_id)
+        if request.method == 'DELETE':
+            return web.Response(status=204)
+        return json_response(self.message(COMMANDS_CHANNEL_ID, body, message_id))
+
+    def take_channel_slot(self, channel_id: int) -> Optional[float]:
+        """None if the message may be sent now, else seconds until the bucket resets"""
+        now = time.monotonic()
+        started, sent = self._buckets.get(channel_id, (now, 0))
+        if now - started >= BUCKET_WINDOW:
+            started, sent = now, 0
+        if sent >= (self.channel_bucket or UNLIMITED_BUCKET):
+            return started + BUCKET_WINDOW - now
+        self._buckets[channel_id] = (started, sent + 1)
+        return None
+
+    async def channel_message(self, request: web.Request):
+        channel_id = int(request.match_info['channel_id'])
+        body = await self.body(request)
+        retry_after = self.take_channel_slot(channel_id)
+        started, sent = self._buckets[channel_id]
+        reset_after = max(0.0, started + BUCKET_WINDOW - time.monotonic())
+        limit = self.channel_bucket or UNLIMITED_BUCKET
+        headers = {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(max(0, limit - sent)),
+            'X-RateLimit-Reset-After': f"{reset_after:.3f}",
+            'X-RateLimit-Reset': f"{time.time() + reset_after:.3f}",
+            'X-RateLimit-Bucket': f"channel-messages-{channel_id}",
+        }
+        if retry_after is not None:
+            self.rate_limited += 1
+            headers.update({'Via': '1.1 google', 'X-RateLimit-Scope': 'user'})
+            return json_response({'message': "You are being rate limited.", 'retry_after': retry_after,
+                                      'global': False}, status=429, headers=headers)
+        return json_response(self.message(channel_id, body), headers=headers)
+
+    async def get_member(self, request: web.Request):
+        member = self.members.get(int(request.match_info['user_id']))
+        if member is None:
+            return self.error(404, UNKNOWN_MEMBER, "Unknown Member")
+        return json_response(member)
+
+    async def edit_member(self, request: web.Request):
+        member = self.members.get(int(request.match_info['user_id']))
+        if member is None:
+            return self.error(404, UNKNOWN_MEMBER, "Unknown Member")
+        body = await self.body(request)
+        if 'nick' in body:
+            member['nick'] = body['nick']
+        if 'roles' in body:
+            member['roles'] = [str(role) for role in body['roles']]
+        return json_response(member)
+
+
+# ────────────────────────────────────────────────
+#   2. Synthetic interactions
+# ────────────────────────────────────────────────
+class Interactions:
+    """INTERACTION_CREATE payloads as the gateway delivers them"""
+
+    def __init__(self, fake: FakeDiscord, permissions: int):
+        self.fake = fake
+        self.permissions = str(permissions)
+
+    def _payload(self, kind: int, user_id: int, data: dict, **extra) -> dict:
+        interaction_id = snowflake()
+        member = dict(self.fake.members[user_id], permissions=self.permissions)
+        return {'id': str(interaction_id), 'application_id': str(APPLICATION_ID), 'type': kind,
+                'token': f"token-{interaction_id}", 'version': 1, 'guild_id': str(GUILD_ID),
+                'channel_id': str(COMMANDS_CHANNEL_ID), 'member': member, 'data': data,
+                'locale': 'en-US', 'guild_locale': 'en-US', 'app_permissions': self.permissions, **extra}
+
+    def command(self, user_id: int, name: str, member_options: Dict[str, int]) -> dict:
+        options = [{'name': option, 'type': 6, 'value': str(target)} for option, target in member_options.items()]
+        resolved_users = {str(target): self.fake.members[target]['user'] for target in member_options.values()}
+        resolved_members = {str(target): {k: v for k, v in self.fake.members[target].items() if k != 'user'}
+                            for target in member_options.values()}
+        return self._payload(2, user_id, {
+            'id': str(snowflake()), 'name': name, 'type': 1, 'options': options,
+            'resolved': {'users': resolved_users, 'members': resolved_members} if options else {},
+        })
+
+    def modal_submit(self, user_id: int, modal, values: Dict[str, str]) -> dict:
+        components = [{'type': 1, 'components': [{'type': 4, 'custom_id': getattr(modal, field).custom_id,
+                                                  'value': value}]}
+                      for field, value in values.items()]
+        return self._payload(5, user_id, {'custom_id': modal.custom_id, 'components': components})
+
+    def click(self, user_id: int, message: dict, custom_id: str) -> dict:
+        return self._payload(3, user_id, {'custom_id': custom_id, 'component_type': 2}, message=message)
+
+
+# ────────────────────────────────────────────────
+#   3. Measurement
+# ────────────────────────────────────────────────
+class Result:
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.ack_ms: List[float] = []
+        self.done_ms: List[float] = []
+        self.count = 0
+        self.misses = 0
+        self.errors = 0
+        self.auto_defers = 0
+        self.elapsed = 0.0
+
+    def line(self) -> str:
+        def ms(value):
+            return f"{value:7.0f}" if value is not None else "      -"
+        return (f"{self.name:<32} c={self.concurrency:<4} n={self.count:<5} "
+                f"{self.count / self.elapsed if self.elapsed else 0:7.1f}/s "
+                f"ack p50={ms(percentile(self.ack_ms, 50))} p99={ms(percentile(self.ack_ms, 99))}  "
+                f"done p50={ms(percentile(self.done_ms, 50))} p99={ms(percentile(self.done_ms, 99))}  "
+                f"missed={self.misses:<4} auto-deferred={self.auto_defers:<4} errors={self.errors}")
+
+
+class Harness:
+    def __init__(self, client, fake: FakeDiscord):
+        self.client = client
+        self.state = client._connection
+        self.fake = fake
+
+    async def dispatch(self, payload: dict, result: Result):
+        """Hand the payload to discord.py like the gateway would and wait for the handler task"""
+        interaction_id = int(payload['id'])
+        before = asyncio.all_tasks()
+        dispatched = time.monotonic()
+        self.fake.created[interaction_id] = dispatched
+        self.state.parse_interaction_create(payload)
+        handlers = asyncio.all_tasks() - before
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+        result.done_ms.append((time.monotonic() - dispatched) * 1000)
+        result.count += 1
+        acked = self.fake.acks.pop(interaction_id, None)
+        self.fake.created.pop(interaction_id, None)
+        if acked is None:
+            result.misses += 1
+        else:
+            result.ack_ms.append((acked - dispatched) * 1000)
+
+    async def run(self, name: str, builds: List[Tuple[str, Callable[[int], dict]]], iterations: int,
+                  concurrency: int, results: Dict[str, Result]):
+        """`iterations` interactions per scenario in `builds`, at most `concurrency` in flight in total"""
+        from interaction_tracing import tracer
+
+        before = {handler: (tracer.handler(handler).errors, tracer.handler(handler).auto_defers)
+                  for handler, _ in builds}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(handler: str, build: Callable[[int], dict], i: int):
+            async with semaphore:
+                await self.dispatch(build(i), results[handler])
+
+        order = [(handler, build, i) for i in range(iterations) for handler, build in builds]
+        started = time.monotonic()
+        await asyncio.gather(*(one(*item) for item in order))
+        elapsed = time.monotonic() - started
+
+        for handler, _ in builds:
+            result = results[handler]
+            result.elapsed = elapsed
+            stats = tracer.handler(handler)
+            result.errors = stats.errors - before[handler][0]
+            result.auto_defers = stats.auto_defers - before[handler][1]
+
+
+# ────────────────────────────────────────────────
+#   4. Setup and run
+# ────────────────────────────────────────────────
+async def run(args: argparse.Namespace):
+    sheets_port, discord_port = free_port(), free_port()
+    data_dir = tempfile.mkdtemp(prefix="pennybot-load-")
+    # config.py reads these at import time and refuses to start without them
+    os.environ.update({
+        'DISCORD_TOKEN': 'load-test',
+        'APPS_SCRIPT_WEB_APP_URL': f"http://127.0.0.1:{sheets_port}/exec",
+        'PERSONNEL_SCRIPT_URL': f"http://127.0.0.1:{sheets_port}/personnel/exec",
+        'DATA_DIR': data_dir,
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'CRITICAL'),
+        'LOG_FORMAT': 'text',
+    })
+
+    sheets_app = apps_script_reference.build(args)
+    fake = FakeDiscord(args.discord_latency_ms / 1000, args.discord_jitter_ms / 1000, args.channel_bucket, args.seed)
+    runners = []
+    for app, port in ((sheets_app, sheets_port), (fake.app(), discord_port)):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        runners.append(runner)
+
+    import discord
+    discord.http.Route.BASE = f"http://127.0.0.1:{discord_port}/api/v10"
+
+    import bot as bot_module
+    import runtime
+    import sheets
+    from config import (EXTENSIONS, REQUESTER_ROLE_ID, APPROVER_ROLE_ID, TARGET_ROLE_1_ID, TARGET_ROLE_2_ID,
+                        APPROVAL_CHANNEL_ID)
+
+    client = bot_module.bot
+    state = client._connection
+
+    # Seed the guild from the stand-in's roster so nicknames and discordId pins line up
+    roster = await sheets.fetch_roster() or []
+    medal_types = await sheets.fetch_medal_types() or []
+    linked = [(int(record.discord_id), record.rp_name) for record in roster if record.discord_id]
+    if not linked or not medal_types:
+        raise SystemExit("The stand-in needs --users, --personnel and --medal-types > 0")
+    staff = [STAFF_BASE_ID + i for i in range(STAFF)]
+    for user_id in staff:
+        fake.members[user_id] = member_payload(user_id, f"staff{user_id - STAFF_BASE_ID}",
+                                               [REQUESTER_ROLE_ID, APPROVER_ROLE_ID])
+    for user_id, rp_name in linked:
+        fake.members[user_id] = member_payload(user_id, f"user{user_id}", [], nick=rp_name)
+
+    roles = [{'id': str(role_id), 'name': name, 'permissions': '0', 'position': position, 'color': 0,
+              'hoist': False, 'managed': False, 'mentionable': False}
+             for position, (role_id, name) in enumerate([(GUILD_ID, "@everyone"), (TARGET_ROLE_1_ID, "Discharged"),
+                                                         (TARGET_ROLE_2_ID, "Civilian"),
+                                                         (APPROVER_ROLE_ID, "Approver"),
+                                                         (REQUESTER_ROLE_ID, "Requester")])]
+    channels = [{'id': str(channel_id), 'type': 0, 'name': name, 'position': position, 'guild_id': str(GUILD_ID),
+                 'permission_overwrites': [], 'nsfw': False, 'parent_id': None}
+                for position, (channel_id, name) in enumerate([(COMMANDS_CHANNEL_ID, "commands"),
+                                                               (APPROVAL_CHANNEL_ID, "approvals")])]
+
+    # Log in against the fake API; the gateway is replaced by parse_interaction_create below
+    await client._async_setup_hook()
+    data = await client.http.static_login('load-test')
+    state.user = discord.ClientUser(state=state, data=data)
+    state.application_id = APPLICATION_ID
+    guild = state._add_guild_from_data({
+        'id': str(GUILD_ID), 'name': "Load Test", 'owner_id': str(staff[0]), 'roles': roles, 'channels': channels,
+        'members': list(fake.members.values()), 'member_count': len(fake.members), 'emojis': [], 'stickers': [],
+        'features': [], 'unavailable': False,
+    })
+    runtime.loop_monitor.start(asyncio.get_running_loop(), threading.get_ident())
+    for extension in EXTENSIONS:
+        if extension != 'cogs.webserver':
+            await client.load_extension(extension)
+    runtime.start_background_task("sheet_queue", sheets.sheet_queue.run)
+
+    from cogs.discharge import DischargeApprovalView, DischargeModal
+    from cogs.medals import MedalApprovalView, MedalAwardModal
+
+    interactions = Interactions(fake, permissions=(1 << 11) | (1 << 31))   # send messages, use app commands
+    rng = random.Random(args.seed)
+
+    def requester(i: int) -> int:
+        return staff[i % len(staff)]
+
+    def target(i: int) -> int:
+        return linked[i % len(linked)][0]
+
+    def show_medals(i):
+        return interactions.command(requester(i), 'showmedals', {'user': target(i)})
+
+    def profile(i):
+        return interactions.command(requester(i), 'profile', {'member': target(i)})
+
+    def award_submission(i):
+        modal = MedalAwardModal()
+        state.store_view(modal)
+        ids = " ".join(str(target(i * 3 + j)) for j in range(3))
+        return interactions.modal_submit(requester(i), modal, {
+            'user_ids': ids, 'medal_name': medal_types[i % len(medal_types)], 'reason': "Load test"})
+
+    def discharge_submission(i):
+        modal = DischargeModal()
+        state.store_view(modal)
+        return interactions.modal_submit(requester(i), modal, {'user_ids': str(target(i)), 'reason': "Load test"})
+
+    def pending_request(view, title: str) -> dict:
+        # What the modal posted to the approval channel, seeded without the channel's rate limit
+        embed = discord.Embed(title=title, description="Seeded by the load test")
+        message = fake.message(APPROVAL_CHANNEL_ID, {'embeds': [embed.to_dict()], 'components': view.to_components()})
+        state.store_view(view, int(message['id']))
+        return message
+
+    def medal_approval(i):
+        members = [guild.get_member(target(i * 3 + j)) for j in range(3)]
+        view = MedalApprovalView(members, medal_types[i % len(medal_types)], "Load test", is_award=True,
+                                 requester_id=requester(i))
+        message = pending_request(view, "🏅 Medal Award Request")
+        return interactions.click(requester(i + 1), message, view.approve.custom_id)
+
+    def discharge_approval(i):
+        view = DischargeApprovalView([guild.get_member(target(rng.randrange(len(linked))))], "Load test",
+                                     requester_id=requester(i))
+        message = pending_request(view, "USS Pennsylvania Discharge Request")
+        return interactions.click(requester(i + 1), message, view.approve.custom_id)
+
+    scenarios = [
+        ("/showmedals", show_medals),
+        ("/profile", profile),
+        ("MedalAwardModal.on_submit", award_submission),
+        ("MedalApprovalView.approve", medal_approval),
+        ("DischargeModal.on_submit", discharge_submission),
+        ("DischargeApprovalView.approve", discharge_approval),
+    ]
+
+    def clear_medal_cache():
+        sheets.sheet_cache.user_medals.clear()
+        sheets.sheet_cache.medal_types = None
+
+    print(f"Discord :{discord_port} {args.discord_latency_ms:g}±{args.discord_jitter_ms:g} ms, "
+          f"channel bucket {args.channel_bucket or 'off'} • sheets :{sheets_port} "
+          f"{args.latency_ms:g}±{args.jitter_ms:g} ms, error rate {args.error_rate:g} • "
+          f"{len(linked)} members, {len(medal_types)} medal types, {len(roster)} personnel records")
+
+    harness = Harness(client, fake)
+    clean: Dict[str, int] = {}
+    groups = [[scenario] for scenario in scenarios] + ([scenarios] if args.mixed else [])
+    try:
+        for concurrency in args.concurrency:
+            print()
+            runtime.loop_monitor.reset()
+            for group in groups:
+                clear_medal_cache()
+                label = "mixed" if len(group) > 1 else group[0][0]
+                results = {handler: Result(handler if len(group) == 1 else f"{handler} [mixed]", concurrency)
+                           for handler, _ in group}
+                iterations = max(args.iterations, concurrency) // len(group) or 1
+                await harness.run(label, group, iterations, concurrency, results)
+                for handler, _ in group:
+                    print(results[handler].line())
+                    if results[handler].misses == 0 and len(group) == 1:
+                        clean[handler] = concurrency
+            loop = runtime.loop_monitor.summary()
+            print(f"{'event loop':<32} c={concurrency:<4} lag p50={loop['lag_p50'] or 0:.1f}ms "
+                  f"p99={loop['lag_p99'] or 0:.1f}ms max={loop['lag_max'] or 0:.1f}ms blocks={loop['blocks']}")
+
+        print(f"\nDiscord API: {sum(fake.requests.values())} request(s), {fake.rate_limited} rate limited, "
+              f"{fake.expired} expired callback(s)")
+        for key, count in sorted(fake.requests.items(), key=lambda item: -item[1]):
+            print(f"  {count:>7}  {key}")
+        print("\nHighest concurrency without deadline misses:")
+        for handler, _ in scenarios:
+            print(f"  {handler:<32} {('c=' + str(clean[handler])) if handler in clean else 'none'}")
+    finally:
+        runtime.loop_monitor.stop()
+        runtime.stop_background_task("sheet_queue")
+        await client.http.close()
+        await sheets.apps_script.close()
+        await sheets.personnel_script.close()
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    apps_script_reference.add_arguments(parser)
+    parser.add_argument('--discord-latency-ms', type=float, default=80.0, help="Round trip to the Discord API")
+    parser.add_argument('--discord-jitter-ms', type=float, default=30.0)
+    parser.add_argument('--channel-bucket', type=int, default=5,
+                        help="Messages per channel per 5 seconds before a 429 (0 = no limit)")
+    parser.add_argument('--iterations', type=int, default=64,
+                        help="Interactions per scenario and level (at least the concurrency)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--mixed', action='store_true', help="Also run every scenario interleaved at each level")
+    parser.set_defaults(latency_ms=300.0, jitter_ms=100.0, users=500, medal_types=30, personnel=500)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cold vs cached ribbon-rack rendering.
+
+    python benchmarks/ribbon_rack_bench.py [--medals 40] [--users 500] [--racks 2000]
+
+Generates a synthetic medal list and user population (common combinations
+repeat, as they do on the real sheet) and reports per-rack latency for:
+
+    cold     every rack composed from the atlas (caches cleared each time)
+    disk     rack PNGs read back from the disk cache (fresh renderer)
+    memory   rack PNGs served from the in-memory LRU
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ribbon_rack  # noqa: E402
+from interaction_tracing import percentile  # noqa: E402
+
+
+def timed(fn, racks):
+    samples = []
+    for medals in racks:
+        started = time.perf_counter()
+        fn(medals)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(name, samples):
+    print(f"{name:<8} n={len(samples):<6} p50={percentile(samples, 50):8.3f}ms "
+          f"p99={percentile(samples, 99):8.3f}ms total={sum(samples):9.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--medals', type=int, default=40)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--racks', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if not ribbon_rack.AVAILABLE:
+        sys.exit("Pillow is not installed")
+
+    rng = random.Random(args.seed)
+    precedence = [f"Medal {i}" for i in range(args.medals)]
+    # Low-precedence (common) medals are far more likely than the rare top ones
+    weights = [i + 1 for i in range(args.medals)]
+    users = [sorted(set(rng.choices(precedence, weights, k=rng.randint(1, 12)))) for _ in range(args.users)]
+    racks = [rng.choice(users) for _ in range(args.racks)]
+    distinct = len({tuple(medals) for medals in racks})
+    print(f"{args.racks} rack views, {distinct} distinct medal sets, {args.medals} medal types")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assets = os.path.join(tmp, "ribbons")
+        cache = os.path.join(tmp, "cache")
+        os.makedirs(assets)
+
+        renderer = ribbon_rack.RibbonRackRenderer(assets, cache)
+        started = time.perf_counter()
+        renderer.atlas(precedence)
+        print(f"atlas    built in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        def cold(medals):
+            atlas = renderer.atlas(precedence)
+            renderer._compose(medals, atlas)
+
+        report("cold", timed(cold, racks[:min(len(racks), 500)]))
+
+        # Populate the disk cache, then measure with empty memory
+        warm = ribbon_rack.RibbonRackRenderer(assets, cache, cache_size=max(distinct, ribbon_rack.MEMORY_CACHE_SIZE))
+        for medals in users:
+            warm.render(medals, precedence)
+        fresh = ribbon_rack.RibbonRackRenderer(assets, cache, cache_size=0)
+        report("disk", timed(lambda medals: fresh.render(medals, precedence), racks))
+
+        report("memory", timed(lambda medals: warm.render(medals, precedence), racks))
+        print(f"stats    {warm.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Decode time and memory of Apps Script responses: raw dicts vs typed models.
+
+    python benchmarks/script_models_bench.py [--users 2000] [--medal-types 2000] [--personnel 20000]
+                                             [--repeat 20]
+
+Builds getMedalStats, getAllPersonnel and getUsersMedals payloads from the
+Apps Script stand-in (apps_script_reference.py) and decodes each one the
+old way and the new way, in-process:
+
+    dict          body decoded to text, json.loads, the dict kept as is
+    model         body parsed as bytes (orjson when installed) into the
+                  script_models.py model the client hands out
+    model (json)  the same with the standard library parser, as on an
+                  install without orjson
+
+For each it reports decode p50/p99 over --repeat runs, the memory still held
+by the decoded result (what a cache entry costs) and the peak allocated
+while decoding, both measured with tracemalloc.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import apps_script_batch  # noqa: E402
+import apps_script_reference  # noqa: E402
+from interaction_tracing import percentile  # noqa: E402
+from script_models import MedalStats, Roster, UsersMedals  # noqa: E402
+
+
+def timed(decode: Callable[[bytes], object], body: bytes, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decode(body)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def memory(decode: Callable[[bytes], object], body: bytes):
+    """(bytes held by the result, peak bytes while decoding)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = decode(body)
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return held - before, peak - before
+
+
+def report(name: str, samples: List[float], held: int, peak: int):
+    print(f"  {name:<13} p50={percentile(samples, 50):8.2f}ms p99={percentile(samples, 99):8.2f}ms "
+          f"held={held / 1024:9.1f} KiB peak={peak / 1024:9.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--medal-types', type=int, default=2000)
+    parser.add_argument('--personnel', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sheet = apps_script_reference.ReferenceSheet()
+    user_ids = sheet.populate(args.users, args.medal_types, rng)
+    personnel = apps_script_reference.ReferencePersonnel()
+    personnel.populate(args.personnel, rng, user_ids)
+
+    payloads = [
+        ("getMedalStats", sheet.getMedalStats({}), MedalStats.decode, lambda result: result),
+        ("getAllPersonnel", personnel.getAllPersonnel({}), Roster.decode, lambda result: result.get('personnel', [])),
+        ("getUsersMedals", sheet.getUsersMedals({'userIds': ",".join(user_ids)}), UsersMedals.decode,
+         lambda result: result.get('users', {})),
+    ]
+    parser_name = "orjson" if apps_script_batch.loads is not json.loads else "json (orjson not installed)"
+    print(f"{args.users} users, {args.medal_types} medal types, {args.personnel} personnel records • "
+          f"bytes parser: {parser_name}")
+
+    for name, result, decode_model, keep in payloads:
+        body = json.dumps(result).encode('utf-8')
+        print(f"\n{name} ({len(body) / 1024:.1f} KiB)")
+        paths = [
+            ("dict", lambda body: keep(json.loads(body.decode('utf-8')))),
+            ("model", lambda body: decode_model(apps_script_batch.loads(body))),
+            ("model (json)", lambda body: decode_model(json.loads(body))),
+        ]
+        for path, decode in paths:
+            decode(body)  # warm up (orjson's key cache, interned names)
+            held, peak = min(memory(decode, body) for _ in range(3))
+            report(path, timed(decode, body, args.repeat), held, peak)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Structured, non-blocking logging for the bot.
+
+Records are handed to a QueueHandler on the calling thread (usually the
+event loop) and formatted/written by a QueueListener thread, so stdout I/O
+never stalls the loop. Output is one JSON object per line carrying any
+structured fields passed via `extra=` (guild, member, function, latency_ms,
+...). Set LOG_FORMAT=text for human-readable lines while developing.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from collections import Counter
+from typing import Optional
+
+APP_LOGGER = "pennybot"
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = {k: v for k, v in record.__dict__.items() if k not in _STANDARD_ATTRS and not k.startswith("_")}
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json"):
+    """Route all logging through a queue drained by a background thread"""
+    global _listener
+    if _listener:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.WARNING)
+
+    # discord.py is chatty at INFO only for connect/resume events, which are worth keeping
+    logging.getLogger("discord").setLevel(logging.INFO)
+    logging.getLogger(APP_LOGGER).setLevel(level.upper())
+
+
+def set_level(level: str, logger_name: str = APP_LOGGER) -> str:
+    """Change verbosity at runtime; returns the previous level name"""
+    logger = logging.getLogger(logger_name or None)
+    previous = logging.getLevelName(logger.getEffectiveLevel())
+    logger.setLevel(level.upper())
+    return previous
+
+
+def get_level(logger_name: str = APP_LOGGER) -> str:
+    return logging.getLevelName(logging.getLogger(logger_name or None).getEffectiveLevel())
+
+
+class EventSummary:
+    """
+    Aggregates repetitive per-item events (e.g. one per member in the role
+    sweep) into a single summary line. The first `sample` events of each kind
+    are still logged individually at DEBUG; errors are logged at WARNING up to
+    the same limit and counted beyond it.
+    """
+
+    def __init__(self, logger: logging.Logger, sample: int = 5, **fields):
+        self.logger = logger
+        self.sample = sample
+        self.fields = fields
+        self.counts: Counter = Counter()
+        self.started = time.monotonic()
+
+    def event(self, kind: str, message: str, **fields):
+        self.counts[kind] += 1
+        if self.counts[kind] <= self.sample and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message, extra={**self.fields, **fields, "event": kind})
+
+    def error(self, kind: str, message: str, **fields):
+        self.counts[kind] += 1
+        if self.counts[kind] <= self.sample:
+            self.logger.warning(message, extra={**self.fields, **fields, "event": kind})
+
+    def flush(self, message: str, level: int = logging.INFO, **fields):
+        elapsed_ms = round((time.monotonic() - self.started) * 1000, 1)
+        self.logger.log(level, message, extra={**self.fields, **fields,
+                                               "counts": dict(self.counts), "elapsed_ms": elapsed_ms})
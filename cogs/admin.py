@@ -0,0 +1,497 @@
+"""
+Admin extension: command sync, extension reload and the diagnostics commands
+(write queue, latency, log level, footprint, action history, profiler).
+"""
+import asyncio
+import io
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import bot_logging
+import footprint
+import runtime
+from config import APPROVER_ROLE_ID, EXTENSIONS, GUILD_ALLOWLIST, REQUESTER_ROLE_ID, bot_profile
+from interaction_tracing import traced, tracer, respond, ensure_deferred
+from pagination import Paginator, send_paginated
+from runtime import footprint_recorder, page_cache, served_guilds, cached_member_count
+from sheets import sheet_cache, sheet_queue, audit_journal
+
+log = logging.getLogger("pennybot")
+
+# ────────────────────────────────────────────────
+#   1. Sync Command (Admin Only)
+# ────────────────────────────────────────────────
+@app_commands.command(name="sync", description="Sync slash commands (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@traced("/sync")
+async def sync_command(interaction: discord.Interaction):
+    """Force sync all slash commands"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+    
+    await ensure_deferred(interaction, ephemeral=True)
+    
+    try:
+        synced = await interaction.client.tree.sync()
+        
+        embed = discord.Embed(
+            title="✅ Commands Synced",
+            description=f"Successfully synced {len(synced)} commands globally.",
+            color=discord.Color.green(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        
+        command_list = "\n".join([f"• /{cmd.name}" for cmd in synced])
+        if command_list:
+            embed.add_field(name="Commands Available", value=command_list, inline=False)
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        
+    except Exception as e:
+        await interaction.followup.send(f"Error syncing commands: {str(e)}", ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   2. Write Queue Command (Admin Only)
+# ────────────────────────────────────────────────
+def format_age(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "—"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+QUEUE_FAILURES_PER_PAGE = 10
+
+@app_commands.command(name="queue", description="Show the Google Sheets write queue (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(action="Optionally retry or discard failed writes")
+@app_commands.choices(action=[
+    app_commands.Choice(name="view", value="view"),
+    app_commands.Choice(name="retry failed", value="retry"),
+    app_commands.Choice(name="discard failed", value="clear"),
+])
+@traced("/queue")
+async def queue_command(interaction: discord.Interaction, action: str = "view"):
+    """Show pending and failed sheet writes"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    note = None
+    if action == "retry":
+        count = await sheet_queue.retry_failed()
+        note = f"🔁 Re-queued {count} failed write(s)."
+    elif action == "clear":
+        count = await sheet_queue.clear_failed()
+        note = f"🗑️ Discarded {count} failed write(s)."
+
+    stats = sheet_queue.stats()
+    color = discord.Color.red() if stats['failed'] else (discord.Color.orange() if stats['pending'] else discord.Color.green())
+
+    embed = discord.Embed(
+        title="📒 Sheet Write Queue",
+        description=note,
+        color=color,
+        timestamp=datetime.now(timezone.utc)
+    )
+    embed.add_field(name="Pending", value=str(stats['pending']), inline=True)
+    embed.add_field(name="Retrying", value=str(stats['retrying']), inline=True)
+    embed.add_field(name="Failed", value=str(stats['failed']), inline=True)
+    embed.add_field(name="Oldest Pending", value=format_age(stats['oldest_age']), inline=True)
+    last_flush = stats['last_flush']
+    embed.add_field(name="Last Flush", value=format_age(time.time() - last_flush) + " ago" if last_flush else "—", inline=True)
+    embed.add_field(name="Written Since Start", value=str(stats['flushed_total']), inline=True)
+
+    if stats['by_op']:
+        embed.add_field(
+            name="Backlog",
+            value="\n".join(f"• {op}: {count}" for op, count in sorted(stats['by_op'].items())),
+            inline=False
+        )
+
+    # Everything above is on every page; the failures are paged
+    def render(failures, page, pages):
+        page_embed = embed.copy()
+        if failures:
+            text = "\n".join(f"• {e.describe()} — {e.error}" for e in failures)
+            page_embed.add_field(name="Failures" + (f" ({page + 1}/{pages})" if pages > 1 else ""),
+                                 value=text[:1024], inline=False)
+        return page_embed
+
+    failures = sorted(sheet_queue.failed.values(), key=lambda e: e.seq, reverse=True)
+    await send_paginated(interaction, Paginator(failures, render, QUEUE_FAILURES_PER_PAGE), ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   3. Interaction Latency Command (Admin Only)
+# ────────────────────────────────────────────────
+def format_ms(value: Optional[float]) -> str:
+    if value is None:
+        return "—"
+    return f"{value / 1000:.2f}s" if value >= 1000 else f"{value:.0f}ms"
+
+@app_commands.command(name="latency", description="Show interaction latency per handler and event loop lag (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(reset="Clear the collected samples after showing them")
+@traced("/latency")
+async def latency_command(interaction: discord.Interaction, reset: bool = False):
+    """Per-handler acknowledgment/total latency percentiles and deadline misses, plus event loop lag"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    report = tracer.report()
+    embed = discord.Embed(
+        title="⏱️ Interaction Latency",
+        description="Ack = time from Discord creating the interaction to our first response (limit 3s).",
+        color=discord.Color.blurple(),
+        timestamp=datetime.now(timezone.utc)
+    )
+
+    loop_stats = runtime.loop_monitor.summary()
+    if runtime.loop_monitor.running:
+        value = (f"lag p50 {format_ms(loop_stats['lag_p50'])} • p90 {format_ms(loop_stats['lag_p90'])} • "
+                 f"p99 {format_ms(loop_stats['lag_p99'])} • max {format_ms(loop_stats['lag_max'])}\n"
+                 f"{loop_stats['blocks']} block(s) over {format_ms(runtime.loop_monitor.threshold * 1000)}")
+        for offender in runtime.loop_monitor.worst_offenders(3):
+            value += (f"\n`{offender.site}` ×{offender.count} • total {format_ms(offender.total * 1000)} • "
+                      f"worst {format_ms(offender.worst * 1000)}")
+    else:
+        value = "Monitor is off (LOOP_MONITOR=0)."
+    embed.add_field(name="🌀 Event loop", value=value[:1024], inline=False)
+
+    if not report:
+        embed.description += "\n\nNo interactions recorded yet."
+
+    # Busiest handlers first; embeds allow at most 25 fields
+    for name, stats in sorted(report.items(), key=lambda item: -item[1]['calls'])[:24]:
+        value = (f"ack p50 {format_ms(stats['ack_p50'])} • p95 {format_ms(stats['ack_p95'])} • p99 {format_ms(stats['ack_p99'])}\n"
+                 f"total p50 {format_ms(stats['total_p50'])} • p99 {format_ms(stats['total_p99'])}\n"
+                 f"{stats['calls']} call(s) • {stats['auto_defers']} auto-defer(s) • "
+                 f"{stats['deadline_misses']} miss(es) • {stats['errors']} error(s)")
+        embed.add_field(name=name, value=value, inline=False)
+
+    if reset:
+        tracer.reset()
+        runtime.loop_monitor.reset()
+        embed.set_footer(text="Samples cleared")
+
+    await respond(interaction, embed=embed, ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   4. Log Level Command (Admin Only)
+# ────────────────────────────────────────────────
+@app_commands.command(name="loglevel", description="Change log verbosity at runtime (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(level="New log level (omit to show current levels)", logger="Which logger to change")
+@app_commands.choices(
+    level=[app_commands.Choice(name=name, value=name) for name in bot_logging.LEVELS],
+    logger=[
+        app_commands.Choice(name="bot", value=bot_logging.APP_LOGGER),
+        app_commands.Choice(name="discord.py", value="discord"),
+        app_commands.Choice(name="everything else", value=""),
+    ]
+)
+@traced("/loglevel")
+async def log_level_command(interaction: discord.Interaction, level: str = None, logger: str = bot_logging.APP_LOGGER):
+    """Adjust logging verbosity without a restart"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    if level:
+        previous = bot_logging.set_level(level, logger)
+        log.warning(f"Log level for '{logger or 'root'}' changed {previous} → {level}",
+                    extra={'requested_by': interaction.user.id})
+        message = f"📝 Log level for `{logger or 'root'}` changed from **{previous}** to **{level}**."
+    else:
+        message = "\n".join(
+            f"• `{name or 'root'}`: **{bot_logging.get_level(name)}**"
+            for name in (bot_logging.APP_LOGGER, "discord", "")
+        )
+
+    await respond(interaction, message, ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   5. Footprint Command (Admin Only)
+# ────────────────────────────────────────────────
+def format_measurement(data: dict) -> str:
+    parts = []
+    if 'ready_s' in data:
+        parts.append(f"ready {data['ready_s']}s @ {data.get('rss_mb_ready')} MB")
+    if 'chunked_s' in data:
+        parts.append(f"chunked {data['chunked_s']}s @ {data.get('rss_mb_chunked')} MB")
+    parts.append(f"peak {data.get('peak_rss_mb')} MB")
+    parts.append(f"{data.get('cached_members', 0)} cached member(s) in {data.get('guilds', 0)} guild(s)")
+    return " • ".join(parts)
+
+@app_commands.command(name="footprint", description="Show memory use and startup time of the gateway profile (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@traced("/footprint")
+async def footprint_command(interaction: discord.Interaction):
+    """Current RSS/cache size plus the last measurement recorded for each profile"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    guilds = served_guilds()
+    chunked = sum(1 for guild in guilds if guild.chunked)
+    embed = discord.Embed(
+        title=f"🦶 Footprint: {bot_profile.name}",
+        description=bot_profile.describe(),
+        color=discord.Color.blurple(),
+        timestamp=datetime.now(timezone.utc)
+    )
+    embed.add_field(name="Now", value=(
+        f"RSS {footprint.rss_bytes() / 2**20:.1f} MB • peak {footprint.peak_rss_bytes() / 2**20:.1f} MB\n"
+        f"{cached_member_count()} cached member(s) • {chunked}/{len(guilds)} served guild(s) chunked\n"
+        f"Allowlist: {', '.join(str(g) for g in sorted(GUILD_ALLOWLIST)) if GUILD_ALLOWLIST else 'all guilds'}"
+    ), inline=False)
+
+    snapshot_state = ", ".join(f"{name} {state}" for name, state in runtime.snapshots.last_load.items())
+    embed.add_field(name="Warm start", value=(
+        f"Snapshot at load: {snapshot_state or 'n/a'}\n"
+        f"Last save: {f'<t:{int(runtime.snapshots.last_save)}:R>' if runtime.snapshots.last_save else 'not yet'} • "
+        f"cache {sheet_cache.stats()} • pages {runtime.page_cache.stats()}"
+    )[:1024], inline=False)
+
+    measurements = await asyncio.to_thread(footprint_recorder.load)
+    for name in footprint.PROFILES:
+        if name in measurements:
+            label = f"{name} (this run)" if name == bot_profile.name else name
+            embed.add_field(name=label, value=format_measurement(measurements[name]), inline=False)
+
+    embed.set_footer(text="Set BOT_PROFILE to compare: " + ", ".join(footprint.PROFILES))
+    await respond(interaction, embed=embed, ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   6. History Command
+# ────────────────────────────────────────────────
+AUDIT_LABELS = {
+    ('discharge', 'request'): "📝 Discharge requested",
+    ('discharge', 'approve'): "✅ Discharge approved",
+    ('discharge', 'deny'): "⛔ Discharge denied",
+    ('medal_award', 'request'): "📝 Medal award requested",
+    ('medal_award', 'approve'): "🏅 Medal awarded",
+    ('medal_award', 'deny'): "⛔ Medal award denied",
+    ('medal_removal', 'request'): "📝 Medal removal requested",
+    ('medal_removal', 'approve'): "❌ Medal removed",
+    ('medal_removal', 'deny'): "⛔ Medal removal denied",
+}
+
+def format_audit_record(record: dict) -> str:
+    label = AUDIT_LABELS.get((record['kind'], record['action']), f"{record['kind']} {record['action']}")
+    line = f"<t:{int(record['ts'])}:d> {label}"
+    if record.get('medal'):
+        line += f" — **{record['medal']}**"
+
+    targets = record.get('targets') or []
+    if targets:
+        shown = " ".join(f"<@{t}>" for t in targets[:5])
+        if len(targets) > 5:
+            shown += f" (+{len(targets) - 5})"
+        line += f" → {shown}"
+
+    if record['action'] == 'request' and record.get('requester'):
+        line += f" by <@{record['requester']}>"
+    elif record.get('approver'):
+        line += f" by <@{record['approver']}>"
+    if record.get('reason'):
+        line += f"\n  ↳ {record['reason'][:80]}"
+    return line
+
+HISTORY_LIMIT = 200     # newest matches that can be paged through
+HISTORY_PER_PAGE = 10
+
+def history_pages(user, medal, requester, approver, days, kind, action) -> Paginator:
+    since = time.time() - days * 86400 if days else None
+    records, total = audit_journal.query(
+        target=user.id if user else None,
+        requester=requester.id if requester else None,
+        approver=approver.id if approver else None,
+        medal=medal, kind=kind, action=action, since=since, limit=HISTORY_LIMIT
+    )
+
+    filters = []
+    if user:
+        filters.append(f"user {user.mention}")
+    if medal:
+        filters.append(f"medal **{medal}**")
+    if requester:
+        filters.append(f"requester {requester.mention}")
+    if approver:
+        filters.append(f"approver {approver.mention}")
+    if kind:
+        filters.append(kind.replace('_', ' '))
+    if action:
+        filters.append(f"action {action}")
+    if days:
+        filters.append(f"last {days} day(s)")
+
+    def render(page_records, page, pages):
+        embed = discord.Embed(
+            title="📜 Action History",
+            color=discord.Color.blurple(),
+            timestamp=datetime.now(timezone.utc)
+        )
+
+        if page_records:
+            text = ""
+            for record in page_records:
+                line = format_audit_record(record) + "\n"
+                if len(text) + len(line) > 4000:
+                    break
+                text += line
+            embed.description = (f"**Filters:** {', '.join(filters)}\n\n" if filters else "") + text
+            first = page * HISTORY_PER_PAGE + 1
+            footer = f"Showing {first}-{first + len(page_records) - 1} of {total} matching action(s)"
+            if total > len(records):
+                footer += f" • newest {len(records)} listed"
+        else:
+            embed.description = "No matching actions found." + (f"\n**Filters:** {', '.join(filters)}" if filters else "")
+            footer = f"Showing 0 of {total} matching action(s)"
+
+        embed.set_footer(text=footer)
+        return embed
+    return Paginator(records, render, HISTORY_PER_PAGE)
+
+@app_commands.command(name="history", description="Search the discharge and medal action history")
+@app_commands.describe(
+    user="Actions targeting this user",
+    medal="Actions involving this medal",
+    requester="Actions requested by this user",
+    approver="Actions approved or denied by this user",
+    days="Only include the last N days",
+    kind="Only this type of action",
+    action="Only requests, approvals or denials"
+)
+@app_commands.choices(
+    kind=[
+        app_commands.Choice(name="Discharges", value="discharge"),
+        app_commands.Choice(name="Medal awards", value="medal_award"),
+        app_commands.Choice(name="Medal removals", value="medal_removal"),
+    ],
+    action=[
+        app_commands.Choice(name="Requested", value="request"),
+        app_commands.Choice(name="Approved", value="approve"),
+        app_commands.Choice(name="Denied", value="deny"),
+    ]
+)
+@traced("/history")
+async def history_command(interaction: discord.Interaction, user: discord.User = None, medal: str = None,
+                          requester: discord.User = None, approver: discord.User = None,
+                          days: app_commands.Range[int, 1, 3650] = None, kind: str = None, action: str = None):
+    """Indexed lookup over the audit journal"""
+    allowed_roles = {REQUESTER_ROLE_ID, APPROVER_ROLE_ID}
+    if not (interaction.user.guild_permissions.administrator or any(role.id in allowed_roles for role in interaction.user.roles)):
+        await respond(interaction, "You lack permission to view action history.", ephemeral=True)
+        return
+
+    # Cached per filter set until the journal grows (or max_age passes, which moves the `days` window)
+    key = ('history', user.id if user else None, medal, requester.id if requester else None,
+           approver.id if approver else None, days, kind, action)
+    paginator = page_cache.get(key, audit_journal.version)
+    if paginator is None:
+        paginator = history_pages(user, medal, requester, approver, days, kind, action)
+        page_cache.put(key, audit_journal.version, paginator)
+    await send_paginated(interaction, paginator, ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   7. Reload Command (Admin Only)
+# ────────────────────────────────────────────────
+@app_commands.command(name="reload", description="Reload a bot module in place without reconnecting (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(module="Module to reload", sync="Also re-sync slash commands (only needed when command options changed)")
+@app_commands.choices(module=[app_commands.Choice(name=ext.split('.')[-1], value=ext) for ext in EXTENSIONS])
+@traced("/reload")
+async def reload_command(interaction: discord.Interaction, module: str, sync: bool = False):
+    """Swap one extension's code; caches, sessions and the gateway connection are untouched"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    await ensure_deferred(interaction, ephemeral=True)
+
+    started = time.perf_counter()
+    try:
+        await interaction.client.reload_extension(module)
+    except commands.ExtensionError as e:
+        log.exception(f"❌ Reload of {module} failed", extra={'extension': module})
+        cause = e.__cause__ or e
+        await interaction.followup.send(
+            f"❌ Reload of `{module}` failed; the previous version is still loaded.\n```{str(cause)[:1500]}```",
+            ephemeral=True
+        )
+        return
+    reload_ms = (time.perf_counter() - started) * 1000
+
+    message = f"♻️ Reloaded `{module}` in **{format_ms(reload_ms)}**."
+    fields = {'extension': module, 'reload_ms': round(reload_ms, 1), 'requested_by': interaction.user.id}
+    if sync:
+        started = time.perf_counter()
+        synced = await interaction.client.tree.sync()
+        fields['sync_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        message += f"\nSynced {len(synced)} command(s) in {format_ms(fields['sync_ms'])}."
+
+    log.warning("♻️ Extension reloaded", extra=fields)
+    await interaction.followup.send(message, ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   8. Profiler Command (Admin Only)
+# ────────────────────────────────────────────────
+@app_commands.command(name="profiler", description="Profile the running bot for a few seconds (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(seconds="How long to sample (5-120)")
+@traced("/profiler")
+async def profiler_command(interaction: discord.Interaction, seconds: app_commands.Range[int, 5, 120] = 30):
+    """Sample the event loop and every task's await chain, then attach the summary and collapsed stacks"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    if runtime.profiler.active:
+        await respond(interaction, "A profile is already being captured; try again when it finishes.", ephemeral=True)
+        return
+
+    await ensure_deferred(interaction, ephemeral=True)
+    log.warning(f"🔬 Profiler started for {seconds}s", extra={'requested_by': interaction.user.id})
+
+    try:
+        capture = await runtime.profiler.capture(seconds)
+    except RuntimeError as e:
+        await interaction.followup.send(f"❌ {e}", ephemeral=True)
+        return
+    path = await asyncio.to_thread(runtime.profiler.write, capture)
+    summary = capture.summary()
+    log.info("🔬 Profile captured", extra={'path': path, 'loop_samples': capture.cpu_samples,
+                                          'task_samples': capture.task_samples})
+
+    files = [discord.File(path, filename=os.path.basename(path))]
+    if len(summary) > 1900:
+        files.append(discord.File(io.BytesIO(summary.encode('utf-8')), filename="summary.txt"))
+        summary = summary[:1900] + "\n…"
+    await interaction.followup.send(
+        f"🔬 **Profile captured** (collapsed stacks for flamegraph.pl / speedscope attached)\n```{summary}```",
+        files=files, ephemeral=True
+    )
+
+# ────────────────────────────────────────────────
+#   9. Extension setup
+# ────────────────────────────────────────────────
+COMMANDS = [
+    sync_command, reload_command, queue_command, latency_command, log_level_command, footprint_command,
+    history_command, profiler_command
+]
+
+async def setup(bot: commands.Bot):
+    for command in COMMANDS:
+        bot.tree.add_command(command)
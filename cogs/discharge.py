@@ -0,0 +1,543 @@
+"""
+Discharge extension: /d and /bulkdischarge with their modals and approval views.
+"""
+import asyncio
+import io
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import aiohttp
+import discord
+from discord import app_commands, ui
+from discord.ext import commands
+
+import medal_csv
+import runtime
+from config import REQUESTER_ROLE_ID, APPROVER_ROLE_ID, TARGET_ROLE_1_ID, TARGET_ROLE_2_ID, APPROVAL_CHANNEL_ID
+from discharge_jobs import DischargeJob, DischargeJobStore, iter_user_ids
+from interaction_tracing import traced, respond, ensure_deferred, edit_response, send_modal
+from runtime import approvals, discharge_jobs, start_background_task, ensure_chunked, resolve_member
+from sheets import audit
+
+log = logging.getLogger("pennybot")
+
+# ────────────────────────────────────────────────
+#   1. Discharge Modal
+# ────────────────────────────────────────────────
+def higher_roles_than(requester: discord.Member, member: discord.Member) -> List[str]:
+    """Names of the target's roles that outrank the requester (none for administrators)"""
+    if requester.guild_permissions.administrator:
+        return []
+    requester_role_ids = {role.id for role in requester.roles}
+    return [role.name for role in member.roles
+            if role.id not in requester_role_ids and role > requester.top_role]
+
+class DischargeModal(ui.Modal, title="Discharge Request"):
+    user_ids = ui.TextInput(
+        label="User IDs (space separated)",
+        style=discord.TextStyle.paragraph,
+        placeholder="123456789012345678 987654321098765432 ...",
+        required=True,
+        max_length=1024
+    )
+    reason = ui.TextInput(
+        label="Reason",
+        style=discord.TextStyle.short,
+        placeholder="Inactivity / Rule violation / etc.",
+        required=True,
+        max_length=200
+    )
+
+    @traced("DischargeModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        if not any(role.id == REQUESTER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "You lack permission to request discharges.", ephemeral=True)
+            return
+
+        id_list = self.user_ids.value.split()
+        if not id_list:
+            await respond(interaction, "At least one user ID is required.", ephemeral=True)
+            return
+
+        guild = interaction.guild
+        targets = []
+        errors = []
+        hierarchy_violations = []
+
+        for id_str in id_list:
+            try:
+                uid = int(id_str.strip())
+                # Cache first: a REST fetch per ID would blow the 3 s acknowledgment budget
+                member = guild.get_member(uid) or await guild.fetch_member(uid)
+                
+                higher_roles = higher_roles_than(interaction.user, member)
+                if higher_roles:
+                    hierarchy_violations.append(f"{member.mention} has higher role(s): {', '.join(higher_roles)}")
+                    continue
+                
+                targets.append(member)
+            except ValueError:
+                errors.append(f"Invalid ID: {id_str}")
+            except discord.NotFound:
+                errors.append(f"Member not found: {id_str}")
+            except Exception as e:
+                errors.append(f"Error ({id_str}): {str(e)}")
+
+        if hierarchy_violations:
+            error_message = "**Cannot discharge members with higher roles:**\n"
+            error_message += "\n".join(hierarchy_violations)
+            
+            if targets:
+                error_message += "\n\n**Note:** Other valid targets were ignored due to hierarchy violations."
+            
+            await respond(interaction, error_message, ephemeral=True)
+            return
+
+        if errors and not targets:
+            await respond(interaction, "No valid members found.\n" + "\n".join(errors), ephemeral=True)
+            return
+
+        if not targets:
+            await respond(interaction, "No valid targets to discharge.", ephemeral=True)
+            return
+
+        approval_channel = guild.get_channel(APPROVAL_CHANNEL_ID)
+        if not approval_channel:
+            await respond(interaction, "Approval channel not found.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="USS Pennsylvania Discharge Request",
+            description=(
+                f"**Requested by:** {interaction.user.mention} ({interaction.user.top_role.name})\n\n"
+                f"**Targets:**\n" + "\n".join(f"{m.mention} ({m.top_role.name})" for m in targets) + "\n\n"
+                f"**Reason:** {self.reason.value}"
+            ),
+            color=discord.Color.blue()
+        )
+        
+        embed.add_field(
+            name="Role Hierarchy Check", 
+            value="✅ All targets have lower roles than requester", 
+            inline=False
+        )
+
+        view = DischargeApprovalView(targets, self.reason.value, requester_id=interaction.user.id)
+
+        message = await approval_channel.send(
+            content=f"<@&{APPROVER_ROLE_ID}> New discharge request requires review!",
+            embed=embed,
+            view=view
+        )
+
+        await respond(interaction, "Request submitted for review.", ephemeral=True)
+
+        await audit('discharge', 'request', requester=interaction.user.id,
+                    targets=[m.id for m in targets], reason=self.reason.value, ref=message.id)
+
+# ────────────────────────────────────────────────
+#   2. Discharge Approval View
+# ────────────────────────────────────────────────
+class DischargeApprovalView(ui.View):
+    def __init__(self, targets: list[discord.Member], reason: str, requester_id: Optional[int] = None):
+        super().__init__(timeout=None)
+        self.targets = targets
+        self.reason = reason
+        self.requester_id = requester_id
+        self.new_nickname = f"Discharged for {reason}"
+
+    @ui.button(label="Approve", style=discord.ButtonStyle.green)
+    @traced("DischargeApprovalView.approve")
+    async def approve(self, interaction: discord.Interaction, button: ui.Button):
+        if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "Only approved personnel can confirm.", ephemeral=True)
+            return
+
+        # Checked before the decision is taken, so the request stays open to approve once they exist
+        guild = interaction.guild
+        role1 = guild.get_role(TARGET_ROLE_1_ID)
+        role2 = guild.get_role(TARGET_ROLE_2_ID)
+
+        if not role1 or not role2:
+            await respond(interaction, "One or both target roles are missing.", ephemeral=True)
+            return
+
+        async with approvals.decide(interaction.message.id, 'approve', interaction.user.id) as decision:
+            if decision.duplicate:
+                await respond(interaction, decision.duplicate_message(), ephemeral=True)
+                return
+
+            embed = interaction.message.embeds[0]
+            embed.color = discord.Color.green()
+            await edit_response(interaction, embed=embed, view=None)
+
+            success = 0
+            errors = []
+
+            for member in self.targets:
+                try:
+                    await member.edit(nick=self.new_nickname, reason=f"Discharge approved - {self.reason}")
+                    await member.edit(roles=[role1, role2], reason=f"Discharge approved - {self.reason}")
+                    success += 1
+                except discord.Forbidden as e:
+                    errors.append(f"{member.mention}: Missing permissions ({str(e)})")
+                except discord.HTTPException as e:
+                    errors.append(f"{member.mention}: API error ({str(e)})")
+                except Exception as e:
+                    errors.append(f"{member.mention}: Unexpected error ({str(e)})")
+
+            msg = f"**Approved** — Processed {success}/{len(self.targets)} users.\nNickname set to: `{self.new_nickname}`"
+            if errors:
+                msg += "\n\n**Errors:**\n" + "\n".join(errors)
+
+            await respond(interaction, msg, ephemeral=True)
+
+            await audit('discharge', 'approve', requester=self.requester_id, approver=interaction.user.id,
+                        targets=[m.id for m in self.targets], reason=self.reason, ref=interaction.message.id,
+                        processed=success, errors=len(errors))
+
+    @ui.button(label="Deny", style=discord.ButtonStyle.red)
+    @traced("DischargeApprovalView.deny")
+    async def deny(self, interaction: discord.Interaction, button: ui.Button):
+        if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "Only approved personnel can confirm.", ephemeral=True)
+            return
+
+        async with approvals.decide(interaction.message.id, 'deny', interaction.user.id) as decision:
+            if decision.duplicate:
+                await respond(interaction, decision.duplicate_message(), ephemeral=True)
+                return
+
+            embed = interaction.message.embeds[0]
+            embed.color = discord.Color.red()
+            await edit_response(interaction, embed=embed, view=None)
+
+            await respond(interaction, "Request **denied**.", ephemeral=True)
+
+            await audit('discharge', 'deny', requester=self.requester_id, approver=interaction.user.id,
+                        targets=[m.id for m in self.targets], reason=self.reason, ref=interaction.message.id)
+
+# ────────────────────────────────────────────────
+#   2b. Bulk Discharge (file attachment, chunked + resumable)
+# ────────────────────────────────────────────────
+BULK_DISCHARGE_CHUNK_SIZE = 10     # members edited per chunk
+BULK_DISCHARGE_CHUNK_DELAY = 3.0   # seconds between chunks, keeps us well under rate limits
+
+class BulkDischargeApprovalView(ui.View):
+    """Persistent approval buttons; custom IDs carry the job ID so they survive restarts"""
+
+    def __init__(self, job: DischargeJob):
+        super().__init__(timeout=None)
+        self.job = job
+
+        approve = ui.Button(label="Approve", style=discord.ButtonStyle.green, custom_id=f"bulkdischarge:{job.id}:approve")
+        deny = ui.Button(label="Deny", style=discord.ButtonStyle.red, custom_id=f"bulkdischarge:{job.id}:deny")
+        approve.callback = self.approve
+        deny.callback = self.deny
+        self.add_item(approve)
+        self.add_item(deny)
+
+    @traced("BulkDischargeApprovalView.approve")
+    async def approve(self, interaction: discord.Interaction):
+        if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "Only approved personnel can confirm.", ephemeral=True)
+            return
+
+        # Checked before the decision is taken, as in DischargeApprovalView.approve
+        guild = interaction.guild
+        if not guild or not guild.get_role(TARGET_ROLE_1_ID) or not guild.get_role(TARGET_ROLE_2_ID):
+            await respond(interaction, "One or both target roles are missing.", ephemeral=True)
+            return
+
+        async with approvals.decide(f"bulkdischarge:{self.job.id}", 'approve', interaction.user.id) as decision:
+            if decision.duplicate:
+                await respond(interaction, decision.duplicate_message(), ephemeral=True)
+                return
+
+            if self.job.status != 'pending':
+                await respond(interaction, f"This request is already **{self.job.status}**.", ephemeral=True)
+                return
+
+            self.job.status = 'running'
+            self.job.approver_id = interaction.user.id
+            await discharge_jobs.save(self.job)
+
+            embed = interaction.message.embeds[0]
+            embed.color = discord.Color.green()
+            await edit_response(interaction, content=f"⏳ Discharging... 0/{self.job.total}", embed=embed, view=None)
+            self.stop()
+
+            await interaction.followup.send(
+                f"**Approved** — discharging {self.job.total} member(s) in chunks of {BULK_DISCHARGE_CHUNK_SIZE}. "
+                f"Progress is shown on the request message.",
+                ephemeral=True
+            )
+
+            targets = await discharge_jobs.load_targets(self.job.id)
+            await audit('discharge', 'approve', requester=self.job.requester_id, approver=interaction.user.id,
+                        targets=targets, reason=self.job.reason,
+                        ref=interaction.message.id, bulk=True, job=self.job.id)
+
+            start_background_task(f"bulk_discharge:{self.job.id}", lambda: run_bulk_discharge(self.job, targets))
+
+    @traced("BulkDischargeApprovalView.deny")
+    async def deny(self, interaction: discord.Interaction):
+        if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "Only approved personnel can confirm.", ephemeral=True)
+            return
+
+        async with approvals.decide(f"bulkdischarge:{self.job.id}", 'deny', interaction.user.id) as decision:
+            if decision.duplicate:
+                await respond(interaction, decision.duplicate_message(), ephemeral=True)
+                return
+
+            if self.job.status != 'pending':
+                await respond(interaction, f"This request is already **{self.job.status}**.", ephemeral=True)
+                return
+
+            self.job.status = 'denied'
+            self.job.approver_id = interaction.user.id
+            await discharge_jobs.save(self.job)
+
+            embed = interaction.message.embeds[0]
+            embed.color = discord.Color.red()
+            await edit_response(interaction, embed=embed, view=None)
+            self.stop()
+
+            await interaction.followup.send("Bulk discharge **denied**.", ephemeral=True)
+
+            await audit('discharge', 'deny', requester=self.job.requester_id, approver=interaction.user.id,
+                        targets=await discharge_jobs.load_targets(self.job.id), reason=self.job.reason,
+                        ref=interaction.message.id, bulk=True, job=self.job.id)
+
+async def fail_bulk_discharge(job: DischargeJob, message: Optional[discord.PartialMessage], why: str):
+    """Stop a job that cannot run, so a restart does not pick it up again"""
+    job.status = 'failed'
+    await discharge_jobs.save(job)
+    if message:
+        try:
+            await message.edit(content=f"❌ **Bulk discharge stopped** at {job.next_index}/{job.total} — {why}. "
+                                       f"Submit a new request for the remaining members.")
+        except discord.HTTPException:
+            pass
+
+async def run_bulk_discharge(job: DischargeJob, targets: Optional[List[int]] = None):
+    """Apply an approved bulk discharge in rate-limited chunks, checkpointing after each chunk"""
+    await runtime.bot.wait_until_ready()
+
+    guild = runtime.bot.get_guild(job.guild_id)
+    channel = guild.get_channel(job.channel_id) if guild else None
+    message = channel.get_partial_message(job.message_id) if channel and job.message_id else None
+
+    if not guild:
+        log.error("❌ Bulk discharge guild not available", extra={'job': job.id, 'guild': job.guild_id})
+        await fail_bulk_discharge(job, None, "the server is not available")
+        return
+
+    role1 = guild.get_role(TARGET_ROLE_1_ID)
+    role2 = guild.get_role(TARGET_ROLE_2_ID)
+    if not role1 or not role2:
+        log.error("❌ Bulk discharge target roles missing", extra={'job': job.id, 'guild': guild.id})
+        await fail_bulk_discharge(job, message, "one or both target roles are missing")
+        return
+
+    if targets is None:
+        targets = await discharge_jobs.load_targets(job.id)
+    audit_reason = f"Bulk discharge approved - {job.reason}"
+    log.info(f"🪖 Running bulk discharge {job.id} from {job.next_index}/{job.total}", extra={'guild': guild.id, 'job': job.id})
+
+    while job.next_index < len(targets):
+        chunk = targets[job.next_index:job.next_index + BULK_DISCHARGE_CHUNK_SIZE]
+        for uid in chunk:
+            try:
+                member = guild.get_member(uid) or await guild.fetch_member(uid)
+                # One edit per member: nickname and roles together
+                await member.edit(nick=job.nickname, roles=[role1, role2], reason=audit_reason)
+                job.success += 1
+            except discord.NotFound:
+                job.error(f"<@{uid}>: No longer in the server")
+            except discord.Forbidden as e:
+                job.error(f"<@{uid}>: Missing permissions ({str(e)})")
+            except discord.HTTPException as e:
+                job.error(f"<@{uid}>: API error ({str(e)})")
+            except Exception as e:
+                job.error(f"<@{uid}>: Unexpected error ({str(e)})")
+
+        job.next_index += len(chunk)
+        await discharge_jobs.save(job)
+
+        if message:
+            try:
+                await message.edit(content=f"⏳ Discharging... {job.next_index}/{job.total} "
+                                           f"({job.success} done, {job.error_count} error(s))")
+            except discord.HTTPException:
+                pass
+
+        if job.next_index < len(targets):
+            await asyncio.sleep(BULK_DISCHARGE_CHUNK_DELAY)
+
+    job.status = 'done'
+    await discharge_jobs.save(job)
+    log.info(f"✅ Bulk discharge {job.id} complete", extra={'guild': guild.id, 'job': job.id,
+                                                            'success': job.success, 'errors': job.error_count})
+
+    if message:
+        summary = f"✅ **Bulk discharge complete** — {job.success}/{job.total} member(s) discharged."
+        if job.error_count:
+            summary += f" {job.error_count} error(s), see attached."
+        try:
+            await message.edit(content=summary)
+            if job.error_count:
+                errors = "\n".join(job.errors)
+                if job.error_count > len(job.errors):
+                    errors += f"\n...and {job.error_count - len(job.errors)} more"
+                await channel.send(
+                    content=summary,
+                    file=discord.File(io.BytesIO(errors.encode('utf-8')), filename=f"discharge-{job.id}-errors.txt"),
+                    reference=message
+                )
+        except discord.HTTPException:
+            pass
+
+@app_commands.command(name="bulkdischarge", description="Request discharge of many members from a txt/CSV file of IDs (requires approval)")
+@app_commands.default_permissions(manage_roles=True)
+@app_commands.describe(file="Text or CSV file containing user IDs", reason="Reason for the discharge")
+@traced("/bulkdischarge")
+async def bulk_discharge_command(interaction: discord.Interaction, file: discord.Attachment,
+                                 reason: app_commands.Range[str, 1, 200]):
+    """Stream-parse an ID file, check hierarchy against cached members and submit for approval"""
+    if not any(role.id == REQUESTER_ROLE_ID for role in interaction.user.roles):
+        await respond(interaction, "You lack permission to request discharges.", ephemeral=True)
+        return
+
+    await ensure_deferred(interaction, ephemeral=True)
+
+    guild = interaction.guild
+    approval_channel = guild.get_channel(APPROVAL_CHANNEL_ID)
+    if not approval_channel:
+        await interaction.followup.send("Approval channel not found.", ephemeral=True)
+        return
+
+    await ensure_chunked(guild)
+
+    targets = []
+    seen = set()
+    invalid = 0
+    not_found = 0
+    hierarchy_violations = []
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(file.url) as response:
+            if response.status != 200:
+                await interaction.followup.send(f"❌ Could not download attachment ({response.status})", ephemeral=True)
+                return
+
+            async for line_number, token, uid in iter_user_ids(medal_csv.iter_lines(response.content)):
+                if uid is None:
+                    invalid += 1
+                    continue
+                if uid in seen:
+                    continue
+                seen.add(uid)
+
+                member = await resolve_member(guild, uid)
+                if not member:
+                    not_found += 1
+                    continue
+
+                higher_roles = higher_roles_than(interaction.user, member)
+                if higher_roles:
+                    hierarchy_violations.append(f"{member.mention} has higher role(s): {', '.join(higher_roles)}")
+                    continue
+
+                targets.append(member.id)
+
+    if hierarchy_violations:
+        error_message = f"**Cannot discharge {len(hierarchy_violations)} member(s) with higher roles:**\n"
+        error_message += "\n".join(hierarchy_violations[:20])
+        if len(hierarchy_violations) > 20:
+            error_message += f"\n...and {len(hierarchy_violations) - 20} more"
+        error_message += "\n\nRemove them from the file and submit again."
+        await interaction.followup.send(error_message[:2000], ephemeral=True)
+        return
+
+    if not targets:
+        await interaction.followup.send(
+            f"No valid targets to discharge. ({invalid} invalid ID(s), {not_found} not in server)", ephemeral=True
+        )
+        return
+
+    job = DischargeJob(DischargeJobStore.new_id(), guild.id, interaction.user.id, reason, total=len(targets),
+                       channel_id=approval_channel.id)
+    await discharge_jobs.save_targets(job.id, targets)
+
+    preview = "\n".join(f"<@{uid}>" for uid in targets[:15])
+    if len(targets) > 15:
+        preview += f"\n...and {len(targets) - 15} more (see attached list)"
+
+    embed = discord.Embed(
+        title="USS Pennsylvania Bulk Discharge Request",
+        description=(
+            f"**Requested by:** {interaction.user.mention} ({interaction.user.top_role.name})\n\n"
+            f"**Targets:** {len(targets)} member(s)\n{preview}\n\n"
+            f"**Reason:** {reason}"
+        ),
+        color=discord.Color.blue(),
+        timestamp=datetime.now(timezone.utc)
+    )
+    embed.add_field(name="Role Hierarchy Check", value="✅ All targets have lower roles than requester", inline=False)
+    if invalid or not_found:
+        embed.add_field(name="Skipped", value=f"{invalid} invalid ID(s), {not_found} not in server", inline=False)
+    embed.set_footer(text=f"Bulk discharge {job.id}")
+
+    target_list = "\n".join(
+        f"{uid}\t{guild.get_member(uid).display_name if guild.get_member(uid) else ''}" for uid in targets
+    )
+    view = BulkDischargeApprovalView(job)
+
+    message = await approval_channel.send(
+        content=f"<@&{APPROVER_ROLE_ID}> New bulk discharge request requires review!",
+        embed=embed,
+        view=view,
+        file=discord.File(io.BytesIO(target_list.encode('utf-8')), filename=f"discharge-{job.id}-targets.txt")
+    )
+
+    job.message_id = message.id
+    await discharge_jobs.save(job)
+
+    await interaction.followup.send(f"Bulk discharge of {len(targets)} member(s) submitted for review.", ephemeral=True)
+
+    await audit('discharge', 'request', requester=interaction.user.id, targets=targets, reason=reason,
+                ref=message.id, bulk=True, job=job.id)
+
+def resume_discharge_jobs():
+    """Re-register pending approval buttons and resume interrupted discharges"""
+    for job in discharge_jobs.load_all():
+        if job.status == 'pending' and job.message_id:
+            runtime.bot.add_view(BulkDischargeApprovalView(job), message_id=job.message_id)
+        elif job.status == 'running':
+            start_background_task(f"bulk_discharge:{job.id}", lambda job=job: run_bulk_discharge(job))
+
+# ────────────────────────────────────────────────
+#   3. Commands
+# ────────────────────────────────────────────────
+@app_commands.command(name="d", description="Request discharge of members (requires approval)")
+@app_commands.default_permissions(manage_roles=True)
+@traced("/d", auto_defer=False)
+async def d_command(interaction: discord.Interaction):
+    await send_modal(interaction, DischargeModal())
+
+# ────────────────────────────────────────────────
+#   4. Extension setup
+# ────────────────────────────────────────────────
+async def on_ready():
+    resume_discharge_jobs()
+
+async def setup(bot: commands.Bot):
+    bot.tree.add_command(d_command)
+    bot.tree.add_command(bulk_discharge_command)
+    bot.add_listener(on_ready)
+    if bot.is_ready():
+        # Reloaded: point pending bulk buttons at the new view class
+        resume_discharge_jobs()
@@ -0,0 +1,770 @@
+"""
+Medals extension: award/removal requests, medal type management, listings,
+ribbon racks and CSV import/export.
+"""
+import asyncio
+import io
+import logging
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import aiohttp
+import discord
+from discord import app_commands, ui
+from discord.ext import commands
+
+import medal_csv
+from config import APPROVER_ROLE_ID, APPROVAL_CHANNEL_ID, REQUESTER_ROLE_ID
+from interaction_tracing import traced, respond, ensure_deferred, edit_response, send_modal
+from pagination import Paginator, send_paginated
+from runtime import approvals, ensure_chunked, page_cache, resolve_members, ribbon_renderer
+from script_models import MedalList, MedalStats
+from sheets import (apps_script, sheet_cache, sheet_queue, audit, get_user_medals, get_all_medal_types,
+                    get_medal_stats, get_users_medals, get_medal_matrix_page)
+
+log = logging.getLogger("pennybot")
+
+# ────────────────────────────────────────────────
+#   1. Medal Award Modal
+# ────────────────────────────────────────────────
+class MedalAwardModal(ui.Modal, title="Medal Award Request"):
+    user_ids = ui.TextInput(
+        label="User IDs (space separated)",
+        style=discord.TextStyle.paragraph,
+        placeholder="123456789012345678 987654321098765432 ...",
+        required=True,
+        max_length=1024
+    )
+    medal_name = ui.TextInput(
+        label="Medal Name",
+        style=discord.TextStyle.short,
+        placeholder="Purple Heart / Medal of Honor / etc.",
+        required=True,
+        max_length=100
+    )
+    reason = ui.TextInput(
+        label="Reason for Award",
+        style=discord.TextStyle.short,
+        placeholder="Bravery in combat / Exceptional service / etc.",
+        required=True,
+        max_length=200
+    )
+
+    @traced("MedalAwardModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        if not any(role.id == REQUESTER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "You lack permission to request medal awards.", ephemeral=True)
+            return
+
+        await ensure_deferred(interaction, ephemeral=True)
+
+        id_list = self.user_ids.value.split()
+        if not id_list:
+            await interaction.followup.send("At least one user ID is required.", ephemeral=True)
+            return
+
+        # Look up medal types while the targets are being resolved
+        medal_types_task = asyncio.create_task(get_all_medal_types())
+
+        guild = interaction.guild
+        targets = []
+        errors = []
+
+        for id_str in id_list:
+            try:
+                uid = int(id_str.strip())
+                # Cache first: a REST fetch per ID would blow the 3 s acknowledgment budget
+                member = guild.get_member(uid) or await guild.fetch_member(uid)
+                targets.append(member)
+            except ValueError:
+                errors.append(f"Invalid ID: {id_str}")
+            except discord.NotFound:
+                errors.append(f"Member not found: {id_str}")
+            except Exception as e:
+                errors.append(f"Error ({id_str}): {str(e)}")
+
+        existing_medals = await medal_types_task
+        if self.medal_name.value not in existing_medals:
+            await interaction.followup.send(
+                f"Medal '{self.medal_name.value}' doesn't exist.\n**Existing medals:** {', '.join(existing_medals) if existing_medals else 'No medals configured yet. Use `/addmedal` first.'}", 
+                ephemeral=True
+            )
+            return
+
+        if errors and not targets:
+            await interaction.followup.send("No valid members found.\n" + "\n".join(errors), ephemeral=True)
+            return
+
+        approval_channel = guild.get_channel(APPROVAL_CHANNEL_ID)
+        if not approval_channel:
+            await interaction.followup.send("Approval channel not found.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="🏅 Medal Award Request",
+            description=(
+                f"**Requested by:** {interaction.user.mention}\n\n"
+                f"**Medal:** {self.medal_name.value}\n"
+                f"**Reason:** {self.reason.value}\n\n"
+                f"**Recipients:**\n" + "\n".join(m.mention for m in targets)
+            ),
+            color=discord.Color.gold(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_footer(text="Medal Award Request")
+
+        view = MedalApprovalView(targets, self.medal_name.value, self.reason.value, is_award=True,
+                                 requester_id=interaction.user.id)
+
+        message = await approval_channel.send(
+            content=f"<@&{APPROVER_ROLE_ID}> New medal award request requires review!",
+            embed=embed,
+            view=view
+        )
+
+        await interaction.followup.send("Medal award request submitted for review.", ephemeral=True)
+
+        await audit('medal_award', 'request', requester=interaction.user.id, targets=[m.id for m in targets],
+                    medal=self.medal_name.value, reason=self.reason.value, ref=message.id)
+
+# ────────────────────────────────────────────────
+#   2. Medal Removal Modal
+# ────────────────────────────────────────────────
+class MedalRemovalModal(ui.Modal, title="Medal Removal Request"):
+    user_ids = ui.TextInput(
+        label="User IDs (space separated)",
+        style=discord.TextStyle.paragraph,
+        placeholder="123456789012345678 987654321098765432 ...",
+        required=True,
+        max_length=1024
+    )
+    medal_name = ui.TextInput(
+        label="Medal Name to Remove",
+        style=discord.TextStyle.short,
+        placeholder="Purple Heart / Medal of Honor / etc.",
+        required=True,
+        max_length=100
+    )
+    reason = ui.TextInput(
+        label="Reason for Removal",
+        style=discord.TextStyle.short,
+        placeholder="Awarded in error / Conduct violation / etc.",
+        required=True,
+        max_length=200
+    )
+
+    @traced("MedalRemovalModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        if not any(role.id == REQUESTER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "You lack permission to request medal removals.", ephemeral=True)
+            return
+
+        await ensure_deferred(interaction, ephemeral=True)
+
+        id_list = self.user_ids.value.split()
+        if not id_list:
+            await interaction.followup.send("At least one user ID is required.", ephemeral=True)
+            return
+
+        guild = interaction.guild
+        targets = []
+        errors = []
+
+        for id_str in id_list:
+            try:
+                uid = int(id_str.strip())
+                # Cache first: a REST fetch per ID would blow the 3 s acknowledgment budget
+                member = guild.get_member(uid) or await guild.fetch_member(uid)
+                targets.append(member)
+            except ValueError:
+                errors.append(f"Invalid ID: {id_str}")
+            except discord.NotFound:
+                errors.append(f"Member not found: {id_str}")
+            except Exception as e:
+                errors.append(f"Error ({id_str}): {str(e)}")
+
+        if errors and not targets:
+            await interaction.followup.send("No valid members found.\n" + "\n".join(errors), ephemeral=True)
+            return
+
+        approval_channel = guild.get_channel(APPROVAL_CHANNEL_ID)
+        if not approval_channel:
+            await interaction.followup.send("Approval channel not found.", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title="❌ Medal Removal Request",
+            description=(
+                f"**Requested by:** {interaction.user.mention}\n\n"
+                f"**Medal to Remove:** {self.medal_name.value}\n"
+                f"**Reason:** {self.reason.value}\n\n"
+                f"**Targets:**\n" + "\n".join(m.mention for m in targets)
+            ),
+            color=discord.Color.orange(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.set_footer(text="Medal Removal Request")
+
+        view = MedalApprovalView(targets, self.medal_name.value, self.reason.value, is_award=False,
+                                 requester_id=interaction.user.id)
+
+        message = await approval_channel.send(
+            content=f"<@&{APPROVER_ROLE_ID}> New medal removal request requires review!",
+            embed=embed,
+            view=view
+        )
+
+        await interaction.followup.send("Medal removal request submitted for review.", ephemeral=True)
+
+        await audit('medal_removal', 'request', requester=interaction.user.id, targets=[m.id for m in targets],
+                    medal=self.medal_name.value, reason=self.reason.value, ref=message.id)
+
+# ────────────────────────────────────────────────
+#   3. Medal Approval View
+# ────────────────────────────────────────────────
+class MedalApprovalView(ui.View):
+    def __init__(self, targets: list[discord.Member], medal_name: str, reason: str, is_award: bool,
+                 requester_id: Optional[int] = None):
+        super().__init__(timeout=None)
+        self.targets = targets
+        self.medal_name = medal_name
+        self.reason = reason
+        self.is_award = is_award
+        self.requester_id = requester_id
+
+    @property
+    def audit_kind(self) -> str:
+        return 'medal_award' if self.is_award else 'medal_removal'
+
+    @ui.button(label="Approve", style=discord.ButtonStyle.green)
+    @traced("MedalApprovalView.approve")
+    async def approve(self, interaction: discord.Interaction, button: ui.Button):
+        if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "Only approved personnel can confirm.", ephemeral=True)
+            return
+
+        async with approvals.decide(interaction.message.id, 'approve', interaction.user.id) as decision:
+            if decision.duplicate:
+                await respond(interaction, decision.duplicate_message(), ephemeral=True)
+                return
+
+            # Queued before the buttons go, so a failure leaves the request open to approve again
+            has_medal = 'true' if self.is_award else 'false'
+            try:
+                await sheet_queue.enqueue_many([
+                    ('updateMedal', {'userId': str(member.id), 'medalName': self.medal_name, 'hasMedal': has_medal})
+                    for member in self.targets
+                ])
+            except Exception as e:
+                decision.release()
+                await respond(interaction, f"❌ Failed to queue medal changes: {str(e)}", ephemeral=True)
+                return
+
+            embed = interaction.message.embeds[0]
+            embed.color = discord.Color.green()
+            await edit_response(interaction, embed=embed, view=None)
+
+            action = "award" if self.is_award else "removal"
+            msg = (f"**Approved** — {len(self.targets)} medal {action}(s) queued for {len(self.targets)} user(s).\n"
+                   f"Changes are written to the sheet in the background; use `/queue` to check progress.")
+            if self.reason:
+                msg += f"\n**Reason:** {self.reason}"
+
+            await respond(interaction, msg, ephemeral=True)
+
+            await audit(self.audit_kind, 'approve', requester=self.requester_id, approver=interaction.user.id,
+                        targets=[m.id for m in self.targets], medal=self.medal_name, reason=self.reason,
+                        ref=interaction.message.id)
+
+    @ui.button(label="Deny", style=discord.ButtonStyle.red)
+    @traced("MedalApprovalView.deny")
+    async def deny(self, interaction: discord.Interaction, button: ui.Button):
+        if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+            await respond(interaction, "Only approved personnel can confirm.", ephemeral=True)
+            return
+
+        async with approvals.decide(interaction.message.id, 'deny', interaction.user.id) as decision:
+            if decision.duplicate:
+                await respond(interaction, decision.duplicate_message(), ephemeral=True)
+                return
+
+            embed = interaction.message.embeds[0]
+            embed.color = discord.Color.red()
+            await edit_response(interaction, embed=embed, view=None)
+
+            await respond(interaction, "Medal request **denied**.", ephemeral=True)
+
+            await audit(self.audit_kind, 'deny', requester=self.requester_id, approver=interaction.user.id,
+                        targets=[m.id for m in self.targets], medal=self.medal_name, reason=self.reason,
+                        ref=interaction.message.id)
+
+# ────────────────────────────────────────────────
+#   4. Medal Management Modals
+# ────────────────────────────────────────────────
+class AddMedalModal(ui.Modal, title="Add New Medal Type"):
+    medal_name = ui.TextInput(
+        label="Medal Name",
+        style=discord.TextStyle.short,
+        placeholder="Purple Heart / Medal of Honor / etc.",
+        required=True,
+        max_length=100
+    )
+    description = ui.TextInput(
+        label="Description (Optional)",
+        style=discord.TextStyle.paragraph,
+        placeholder="Description of what this medal represents...",
+        required=False,
+        max_length=500
+    )
+
+    @traced("AddMedalModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        await ensure_deferred(interaction, ephemeral=True)
+        
+        try:
+            await sheet_queue.enqueue('addMedalType', {'medalName': self.medal_name.value})
+
+            embed = discord.Embed(
+                title="✅ Medal Type Added",
+                description=f"**Medal:** {self.medal_name.value}\n**Description:** {self.description.value or 'No description provided'}",
+                color=discord.Color.green(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            embed.set_footer(text="Queued for Google Sheets • see /queue for status")
+            await interaction.followup.send(embed=embed, ephemeral=True)
+                
+        except Exception as e:
+            await interaction.followup.send(f"❌ Exception: {str(e)}", ephemeral=True)
+
+class DeleteMedalModal(ui.Modal, title="Delete Medal Type"):
+    medal_name = ui.TextInput(
+        label="Medal Name to Delete",
+        style=discord.TextStyle.short,
+        placeholder="Purple Heart / Medal of Honor / etc.",
+        required=True,
+        max_length=100
+    )
+    reason = ui.TextInput(
+        label="Reason for Deletion",
+        style=discord.TextStyle.short,
+        placeholder="No longer used / Replaced by another medal / etc.",
+        required=True,
+        max_length=200
+    )
+
+    @traced("DeleteMedalModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        await ensure_deferred(interaction, ephemeral=True)
+        
+        try:
+            await sheet_queue.enqueue('deleteMedalType', {'medalName': self.medal_name.value})
+
+            embed = discord.Embed(
+                title="❌ Medal Type Deleted",
+                description=f"**Medal:** {self.medal_name.value}\n**Reason:** {self.reason.value}",
+                color=discord.Color.red(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            embed.set_footer(text="Queued for Google Sheets • see /queue for status")
+            await interaction.followup.send(embed=embed, ephemeral=True)
+                
+        except Exception as e:
+            await interaction.followup.send(f"❌ Exception: {str(e)}", ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   5. Commands
+# ────────────────────────────────────────────────
+@app_commands.command(name="awardmedal", description="Request to award medal(s) to users (requires approval)")
+@traced("/awardmedal", auto_defer=False)
+async def award_medal_command(interaction: discord.Interaction):
+    await send_modal(interaction, MedalAwardModal())
+
+@app_commands.command(name="removemedal", description="Request to remove medal(s) from users (requires approval)")
+@traced("/removemedal", auto_defer=False)
+async def remove_medal_command(interaction: discord.Interaction):
+    await send_modal(interaction, MedalRemovalModal())
+
+async def render_ribbon_rack(medals: List[str], precedence: List[str]) -> Optional[discord.File]:
+    if not ribbon_renderer or not medals:
+        return None
+    try:
+        data = await asyncio.to_thread(ribbon_renderer.render, medals, precedence)
+        return discord.File(io.BytesIO(data), filename="ribbons.png")
+    except Exception as e:
+        log.warning(f"⚠️ Ribbon rack rendering failed: {e}")
+        return None
+
+@app_commands.command(name="showmedals", description="Show medals for a user (defaults to yourself)")
+@app_commands.describe(user="The user to check medals for (defaults to yourself)")
+@traced("/showmedals", ephemeral=False)
+async def show_medals_command(interaction: discord.Interaction, user: discord.Member = None):
+    user = user or interaction.user
+    
+    await ensure_deferred(interaction)
+    
+    try:
+        if ribbon_renderer:
+            # Medal types give the rack its precedence order; fetched alongside (one batched request)
+            user_medals, precedence = await asyncio.gather(get_user_medals(str(user.id)), get_all_medal_types())
+            rack = await render_ribbon_rack(user_medals, precedence)
+        else:
+            user_medals = await get_user_medals(str(user.id))
+            rack = None
+        
+        embed = discord.Embed(
+            title=f"🏅 {user.display_name}'s Medals",
+            color=discord.Color.blue()
+        )
+        embed.set_thumbnail(url=user.display_avatar.url)
+        
+        if user_medals:
+            medal_list = "\n".join(f"• {medal}" for medal in user_medals)
+            embed.description = medal_list
+            embed.set_footer(text=f"Total: {len(user_medals)} medal(s)")
+        else:
+            embed.description = "No medals awarded yet."
+            embed.set_footer(text="This user has no medals")
+        
+        if rack:
+            embed.set_image(url="attachment://ribbons.png")
+            await interaction.followup.send(embed=embed, file=rack)
+        else:
+            await interaction.followup.send(embed=embed)
+        
+    except Exception as e:
+        await interaction.followup.send(f"Error showing medals: {str(e)}", ephemeral=True)
+
+@app_commands.command(name="addmedal", description="Add a new medal type (Approver role only)")
+@traced("/addmedal", auto_defer=False)
+async def add_medal_command(interaction: discord.Interaction):
+    if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+        await respond(interaction, "You lack permission to add medal types.", ephemeral=True)
+        return
+    
+    await send_modal(interaction, AddMedalModal())
+
+@app_commands.command(name="deletemedal", description="Delete a medal type (Approver role only)")
+@traced("/deletemedal", auto_defer=False)
+async def delete_medal_command(interaction: discord.Interaction):
+    if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+        await respond(interaction, "You lack permission to delete medal types.", ephemeral=True)
+        return
+    
+    await send_modal(interaction, DeleteMedalModal())
+
+MEDALS_PER_PAGE = 25        # /listmedals, one line each in the description
+DISTRIBUTION_PER_PAGE = 20  # /medalstats
+TEST_MEDALS_PER_PAGE = 10   # /testconnection, inside a 1024-character field
+
+def medal_data_version() -> tuple:
+    """Changes whenever the medal types or anything written through the queue might have"""
+    return sheet_cache.medal_version, sheet_queue.version
+
+def medal_list_pages(medal_types: List[str]) -> Paginator:
+    def render(medals, page, pages):
+        embed = discord.Embed(
+            title="🏅 Available Medal Types",
+            description="\n".join(f"• {medal}" for medal in medals),
+            color=discord.Color.green()
+        )
+        embed.set_footer(text=f"Total: {len(medal_types)} medal types" + (f" • Page {page + 1}/{pages}" if pages > 1 else ""))
+        return embed
+    return Paginator(medal_types, render, MEDALS_PER_PAGE)
+
+@app_commands.command(name="listmedals", description="List all available medal types")
+@traced("/listmedals", ephemeral=False)
+async def list_medals_command(interaction: discord.Interaction):
+    await ensure_deferred(interaction)
+    
+    try:
+        paginator = page_cache.get('listmedals', medal_data_version())
+        if paginator is None:
+            medal_types = await get_all_medal_types()
+            
+            if not medal_types:
+                await interaction.followup.send(
+                    "No medal types configured yet. An approver must use `/addmedal` first.", 
+                    ephemeral=True
+                )
+                return
+            
+            paginator = medal_list_pages(medal_types)
+            page_cache.put('listmedals', medal_data_version(), paginator)
+        
+        await send_paginated(interaction, paginator)
+        
+    except Exception as e:
+        await interaction.followup.send(f"Error listing medals: {str(e)}", ephemeral=True)
+
+def medal_stats_pages(stats: MedalStats) -> Paginator:
+    fetched = datetime.now(timezone.utc)
+    most_awarded = stats.most_awarded
+    distribution = list(stats.distribution.items())
+    
+    def render(entries, page, pages):
+        embed = discord.Embed(
+            title="📊 Medal Statistics",
+            color=discord.Color.purple(),
+            timestamp=fetched
+        )
+        
+        embed.add_field(name="Total Users", value=str(stats.total_users), inline=True)
+        embed.add_field(name="Total Medal Types", value=str(stats.total_medal_types), inline=True)
+        
+        if most_awarded:
+            name, count = most_awarded
+            embed.add_field(
+                name="Most Awarded Medal", 
+                value=f"{name} ({count} awards)", 
+                inline=False
+            )
+        
+        if entries:
+            embed.description = "**Medal Distribution**\n" + "\n".join(
+                f"**{medal}**: {count} awards" for medal, count in entries)
+        
+        embed.set_footer(text="Medal Database Statistics" + (f" • Page {page + 1}/{pages}" if pages > 1 else ""))
+        return embed
+    return Paginator(distribution, render, DISTRIBUTION_PER_PAGE)
+
+@app_commands.command(name="medalstats", description="Show statistics about medals")
+@traced("/medalstats", ephemeral=False)
+async def medal_stats_command(interaction: discord.Interaction):
+    await ensure_deferred(interaction)
+    
+    try:
+        # The sheet only changes under us through the write queue (or by hand, which max_age covers)
+        paginator = page_cache.get('medalstats', medal_data_version())
+        if paginator is None:
+            stats = await get_medal_stats()
+            
+            if stats is None:
+                await interaction.followup.send("Could not retrieve medal statistics.", ephemeral=True)
+                return
+            
+            paginator = medal_stats_pages(stats)
+            page_cache.put('medalstats', medal_data_version(), paginator)
+        
+        await send_paginated(interaction, paginator)
+        
+    except Exception as e:
+        await interaction.followup.send(f"Error getting statistics: {str(e)}", ephemeral=True)
+
+@app_commands.command(name="testconnection", description="Test connection to Google Sheets")
+@traced("/testconnection")
+async def test_connection_command(interaction: discord.Interaction):
+    if not any(role.id == APPROVER_ROLE_ID for role in interaction.user.roles):
+        await respond(interaction, "Only approvers can test the connection.", ephemeral=True)
+        return
+    
+    await ensure_deferred(interaction, ephemeral=True)
+    
+    try:
+        # Both calls travel in one batch envelope
+        test_result, types_result = await apps_script.call_many([('test', None), ('getAllMedalTypes', None)],
+                                                                models=[None, MedalList])
+        
+        if test_result and test_result.get('success'):
+            medal_types = sheet_queue.overlay_medal_types(types_result.medals if types_result else [])
+            
+            def render(medals, page, pages):
+                embed = discord.Embed(
+                    title="✅ Connection Test Successful",
+                    description=f"Connected to Google Sheets successfully!\n\n**Found {len(medal_types)} medal types**",
+                    color=discord.Color.green()
+                )
+                if medals:
+                    embed.add_field(
+                        name="Available Medals" + (f" ({page + 1}/{pages})" if pages > 1 else ""),
+                        value="\n".join(f"• {medal}" for medal in medals),
+                        inline=False
+                    )
+                return embed
+            
+            # Fresh from the sheet on purpose, so not cached
+            await send_paginated(interaction, Paginator(medal_types, render, TEST_MEDALS_PER_PAGE), ephemeral=True)
+        else:
+            error_msg = test_result.get('error', 'Unknown error') if test_result else 'No response'
+            await interaction.followup.send(f"❌ Connection test failed: {error_msg}", ephemeral=True)
+        
+    except Exception as e:
+        await interaction.followup.send(f"❌ Connection failed: {str(e)}", ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   6. Medal Import/Export Commands (Admin Only)
+# ────────────────────────────────────────────────
+EXPORT_PAGE_SIZE = 1000
+
+@app_commands.command(name="exportmedals", description="Export every user's medals as a CSV file (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@traced("/exportmedals")
+async def export_medals_command(interaction: discord.Interaction):
+    """Stream the medal matrix page by page into a CSV attachment"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    await ensure_deferred(interaction, ephemeral=True)
+
+    try:
+        # Spill to disk so the export never has to fit in memory
+        text = io.TextIOWrapper(tempfile.TemporaryFile(), encoding='utf-8', newline='')
+        medal_types = None
+        offset = 0
+        exported = 0
+
+        while True:
+            page = await get_medal_matrix_page(offset, EXPORT_PAGE_SIZE)
+            if medal_types is None:
+                medal_types = sheet_queue.overlay_medal_types(page.medals)
+                medal_csv.write_header(text, medal_types)
+
+            medal_csv.write_rows(text, medal_types, {
+                user_id: sheet_queue.overlay_user_medals(user_id, medals) for user_id, medals in page.rows
+            })
+            exported += len(page.rows)
+            offset += len(page.rows)
+
+            if not page.rows or offset >= page.total:
+                break
+
+        text.flush()
+        buffer = text.detach()
+        buffer.seek(0)
+        filename = f"medals-{datetime.now(timezone.utc):%Y%m%d-%H%M}.csv"
+
+        await interaction.followup.send(
+            f"📤 Exported {exported} user(s) × {len(medal_types)} medal type(s).",
+            file=discord.File(buffer, filename=filename),
+            ephemeral=True
+        )
+
+    except Exception as e:
+        await interaction.followup.send(f"❌ Export failed: {str(e)}", ephemeral=True)
+
+@app_commands.command(name="importmedals", description="Import medals from a CSV file (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.describe(
+    file="CSV with a user_id column followed by one column per medal (Y = has medal)",
+    dry_run="Only report what would change"
+)
+@traced("/importmedals")
+async def import_medals_command(interaction: discord.Interaction, file: discord.Attachment, dry_run: bool = False):
+    """Stream-parse a medal CSV, diff it against the sheet and queue the changes"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    await ensure_deferred(interaction, ephemeral=True)
+
+    guild = interaction.guild
+    await ensure_chunked(guild)
+
+    stats = medal_csv.ImportStats()
+    seen = set()
+    progress = await interaction.followup.send("📥 Reading import file...", ephemeral=True, wait=True)
+    last_progress = time.monotonic()
+
+    def summary(title: str) -> str:
+        text = (f"{title}\n"
+                f"Rows: {stats.rows} • Users: {stats.users} • Unchanged: {stats.unchanged}\n"
+                f"Changes: {stats.changes} ({stats.awards} award(s), {stats.removals} removal(s))")
+        if stats.error_count:
+            text += f"\n\n**{stats.error_count} error(s):**\n" + "\n".join(stats.errors)
+            if stats.error_count > len(stats.errors):
+                text += "\n..."
+        return text[:2000]
+
+    try:
+        medal_types = await get_all_medal_types()
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(file.url) as response:
+                if response.status != 200:
+                    await progress.edit(content=f"❌ Could not download attachment ({response.status})")
+                    return
+
+                records = medal_csv.iter_records(response.content)
+                try:
+                    _, header = await records.__anext__()
+                except StopAsyncIteration:
+                    await progress.edit(content="❌ The file is empty.")
+                    return
+
+                try:
+                    columns = medal_csv.parse_header(header, medal_types)
+                except ValueError as e:
+                    await progress.edit(content=f"❌ Invalid header: {e}")
+                    return
+
+                async for chunk in medal_csv.iter_row_chunks(records):
+                    candidates = []
+                    for line_number, cells in chunk:
+                        stats.rows += 1
+                        user_id = cells[0].strip() if cells else ""
+                        if not user_id.isdigit():
+                            stats.error(f"Line {line_number}: invalid user ID `{user_id}`")
+                            continue
+                        if len(cells) != len(columns) + 1:
+                            stats.error(f"Line {line_number}: expected {len(columns) + 1} columns, got {len(cells)}")
+                            continue
+                        if user_id in seen:
+                            stats.error(f"Line {line_number}: duplicate user {user_id}")
+                            continue
+                        seen.add(user_id)
+                        candidates.append((line_number, user_id, cells[1:]))
+
+                    # One lookup per chunk; a failed lookup costs its rows, not the import
+                    members, failed = await resolve_members(guild, [int(user_id) for _, user_id, _ in candidates])
+                    rows = []
+                    for line_number, user_id, cells in candidates:
+                        if int(user_id) in failed:
+                            stats.error(f"Line {line_number}: could not look up member {user_id}")
+                        elif int(user_id) not in members:
+                            stats.error(f"Line {line_number}: member {user_id} not found in server")
+                        else:
+                            rows.append((line_number, user_id, cells))
+
+                    if not rows:
+                        continue
+
+                    current = await get_users_medals([user_id for _, user_id, _ in rows])
+                    writes = []
+                    for line_number, user_id, cells in rows:
+                        stats.users += 1
+                        for medal, has_medal in medal_csv.diff_user(user_id, cells, columns, current[user_id], stats, line_number):
+                            writes.append(('updateMedal', {
+                                'userId': user_id,
+                                'medalName': medal,
+                                'hasMedal': 'true' if has_medal else 'false'
+                            }))
+
+                    if writes and not dry_run:
+                        await sheet_queue.enqueue_many(writes)
+
+                    if time.monotonic() - last_progress > 2:
+                        last_progress = time.monotonic()
+                        await progress.edit(content=summary("📥 Importing..."))
+
+        if dry_run:
+            title = "🔎 **Dry run complete** — nothing was written."
+        else:
+            title = "✅ **Import complete** — changes are queued for the sheet (see `/queue`)."
+        await progress.edit(content=summary(title))
+
+    except Exception as e:
+        await progress.edit(content=summary(f"❌ Import failed: {str(e)}"))
+
+# ────────────────────────────────────────────────
+#   7. Extension setup
+# ────────────────────────────────────────────────
+COMMANDS = [
+    award_medal_command, remove_medal_command, show_medals_command, add_medal_command, delete_medal_command,
+    list_medals_command, medal_stats_command, test_connection_command, export_medals_command, import_medals_command
+]
+
+async def setup(bot: commands.Bot):
+    for command in COMMANDS:
+        bot.tree.add_command(command)
@@ -0,0 +1,176 @@
+"""
+Notifier extension: delivers the LOA-expiry and low-activity alerts that
+personnel_alerts.py schedules from the roster pulls, and /alerts to see
+what is coming up.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import runtime
+from config import PERSONNEL_ALERT_CHANNEL_ID, PERSONNEL_ALERT_DM
+from interaction_tracing import traced, respond
+from pagination import Paginator, send_paginated
+from personnel_alerts import Alert
+from runtime import personnel_alerts, personnel_index
+
+log = logging.getLogger("pennybot")
+
+MAX_SLEEP = 3600   # re-check the heap at least hourly (clock changes, missed wake-ups)
+ALERTS_LIMIT = 150     # /alerts pages through this many of the earliest alerts
+ALERTS_PER_PAGE = 15
+
+# ────────────────────────────────────────────────
+#   1. Delivery
+# ────────────────────────────────────────────────
+def format_alert(alert: Alert, mention: bool = True) -> str:
+    user_id = personnel_index.user_id(alert.rp_name)
+    who = f"**{alert.rp_name}**" + (f" (<@{user_id}>)" if user_id and mention else "")
+    if alert.kind == 'loa-soon':
+        ends = int(alert.detail['ends'])
+        return f"🌴 {who}'s LOA ends <t:{ends}:R> (<t:{ends}:D>)"
+    if alert.kind == 'loa-end':
+        return f"🌴 {who}'s LOA has ended"
+    points = alert.detail.get('points', 0)
+    return f"📉 {who} has {points} activity point{'s' if points != 1 else ''} and is not on LOA"
+
+async def send_chunk(channel, alerts: List[Alert], lines: List[str]) -> List[Alert]:
+    """Post one message; returns the alerts it carried, or none if the send failed"""
+    try:
+        await channel.send("\n".join(lines), allowed_mentions=discord.AllowedMentions.none())
+        return alerts
+    except discord.HTTPException as e:
+        log.warning(f"⚠️ Failed to post {len(alerts)} alert(s): {e}", extra={'channel': channel.id})
+        return []
+
+async def deliver(alerts: List[Alert]) -> List[Alert]:
+    """Send alerts to the channel and/or DMs; returns the ones that were delivered"""
+    delivered = alerts
+    if PERSONNEL_ALERT_CHANNEL_ID:
+        channel = runtime.bot.get_channel(PERSONNEL_ALERT_CHANNEL_ID)
+        if channel is None:
+            log.warning("⚠️ Alert channel not found", extra={'channel': PERSONNEL_ALERT_CHANNEL_ID})
+            return []
+        # One message per batch, split at Discord's 2000 character limit
+        delivered = []
+        chunk_alerts, lines, size = [], [], 0
+        for alert in alerts:
+            line = format_alert(alert)
+            if lines and size + len(line) + 1 > 2000:
+                delivered += await send_chunk(channel, chunk_alerts, lines)
+                chunk_alerts, lines, size = [], [], 0
+            chunk_alerts.append(alert)
+            lines.append(line)
+            size += len(line) + 1
+        if lines:
+            delivered += await send_chunk(channel, chunk_alerts, lines)
+
+    if PERSONNEL_ALERT_DM:
+        # With a channel the DM is a courtesy copy; DM-only alerts are retried on transient errors
+        dm_only = not PERSONNEL_ALERT_CHANNEL_ID
+        failed = set()
+        for alert in delivered:
+            user_id = personnel_index.user_id(alert.rp_name)
+            if not user_id:
+                continue
+            try:
+                user = runtime.bot.get_user(user_id) or await runtime.bot.fetch_user(user_id)
+                await user.send(format_alert(alert, mention=False))
+            except discord.HTTPException as e:
+                log.info(f"ℹ️ Could not DM alert to {alert.rp_name}: {e}", extra={'user': user_id})
+                # Closed DMs or an unknown user will not change on a retry
+                if dm_only and not isinstance(e, (discord.Forbidden, discord.NotFound)):
+                    failed.add(alert.key)
+        delivered = [alert for alert in delivered if alert.key not in failed]
+    return delivered
+
+async def run_alerts():
+    """Sleep until the earliest alert is due or the schedule changes, then send what is due"""
+    while True:
+        personnel_alerts.changed.clear()
+        due_alerts = personnel_alerts.pop_due(time.time())
+        if due_alerts:
+            try:
+                delivered = {alert.key for alert in await deliver(due_alerts)}
+            except Exception as e:
+                log.exception(f"❌ Failed to deliver {len(due_alerts)} alert(s): {e}")
+                delivered = set()
+            now = time.time()
+            for alert in due_alerts:
+                if alert.key in delivered:
+                    personnel_alerts.mark_sent(alert)
+                else:
+                    personnel_alerts.retry(alert, now)
+            log.info(f"⏰ Sent {len(delivered)} personnel alert(s)",
+                     extra={'kinds': sorted({alert.kind for alert in due_alerts if alert.key in delivered}),
+                            'retrying': len(due_alerts) - len(delivered)})
+        try:
+            await personnel_alerts.save()
+        except OSError as e:
+            log.warning(f"⚠️ Failed to save alert schedule: {e}")
+
+        next_due = personnel_alerts.next_due()
+        timeout = MAX_SLEEP if next_due is None else min(MAX_SLEEP, max(0.0, next_due - time.time()))
+        try:
+            await asyncio.wait_for(personnel_alerts.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+# ────────────────────────────────────────────────
+#   2. Alerts Command (Admin Only)
+# ────────────────────────────────────────────────
+@app_commands.command(name="alerts", description="Show upcoming LOA and activity alerts (Admin only)")
+@app_commands.default_permissions(administrator=True)
+@traced("/alerts")
+async def alerts_command(interaction: discord.Interaction):
+    """The next scheduled alerts, earliest first"""
+    if not interaction.user.guild_permissions.administrator:
+        await respond(interaction, "This command is for administrators only.", ephemeral=True)
+        return
+
+    def render(alerts, page, pages):
+        embed = discord.Embed(
+            title="⏰ Upcoming Personnel Alerts",
+            color=discord.Color.blurple(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        if not runtime.alerts_enabled:
+            embed.description = ("Alerts are off. Set PERSONNEL_ALERT_CHANNEL_ID and/or PERSONNEL_ALERT_DM=1 "
+                                 "(and PERSONNEL_SCRIPT_URL) to enable them.")
+            return embed
+        lines = [f"<t:{int(alert.fires)}:R> — {format_alert(alert)}"
+                 + (f" (retry {alert.attempts})" if alert.attempts else "") for alert in alerts]
+        embed.description = "\n".join(lines)[:4000] if lines else "Nothing scheduled."
+        embed.set_footer(text=" • ".join(f"{count} {kind}" for kind, count in sorted(counts.items()))
+                         + (f" • Page {page + 1}/{pages}" if pages > 1 else "") or "No alerts scheduled")
+        return embed
+
+    counts: Dict[str, int] = {}
+    upcoming = []
+    if runtime.alerts_enabled:
+        for alert in personnel_alerts.alerts.values():
+            counts[alert.kind] = counts.get(alert.kind, 0) + 1
+        upcoming = personnel_alerts.upcoming(ALERTS_LIMIT)
+    await send_paginated(interaction, Paginator(upcoming, render, ALERTS_PER_PAGE), ephemeral=True)
+
+# ────────────────────────────────────────────────
+#   3. Extension setup
+# ────────────────────────────────────────────────
+async def on_ready():
+    if runtime.alerts_enabled:
+        runtime.start_background_task("personnel_alerts", run_alerts)
+
+async def setup(bot: commands.Bot):
+    bot.tree.add_command(alerts_command)
+    bot.add_listener(on_ready)
+    if bot.is_ready() and runtime.alerts_enabled:
+        runtime.start_background_task("personnel_alerts", run_alerts)
+
+async def teardown(bot: commands.Bot):
+    runtime.stop_background_task("personnel_alerts")
@@ -0,0 +1,196 @@
+"""
+Personnel extension: /profile lookups against the personnel sheets, and the
+member events and roster pulls that keep the ID <-> RP name index current.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+import runtime
+from activity_tiers import activity_tier
+from config import PERSONNEL_SCRIPT_URL, bot_profile
+from interaction_tracing import traced, ensure_deferred
+from runtime import personnel_index, served_guilds
+from sheet_cache import PERSONNEL_TTL
+from sheets import fetch_roster, find_personnel, get_user_medals
+
+log = logging.getLogger("pennybot")
+
+# ────────────────────────────────────────────────
+#   1. Profile Command (FIXED)
+# ────────────────────────────────────────────────
+@app_commands.command(name="profile", description="Check a personnel profile by member or RP name")
+@app_commands.describe(member="The member to look up (defaults to you)",
+                       roleplay_name="The roleplay name to search for")
+@traced("/profile", ephemeral=False)
+async def profile_command(interaction: discord.Interaction, member: Optional[discord.Member] = None,
+                          roleplay_name: Optional[str] = None):
+    """Check personnel profile from Google Sheets, with the member's medals when known"""
+    
+    await ensure_deferred(interaction)
+    
+    try:
+        if not PERSONNEL_SCRIPT_URL:
+            await interaction.followup.send(
+                "❌ Personnel profile system is not configured. Please contact an administrator.",
+                ephemeral=True
+            )
+            return
+        
+        if isinstance(interaction.user, discord.Member):
+            personnel_index.observe(interaction.user.id, interaction.user.display_name)
+        
+        # Resolve both keys locally: RP name for the personnel sheet, user ID for the medal sheet
+        if roleplay_name:
+            user_id = personnel_index.user_id(roleplay_name)
+        else:
+            member = member or interaction.user
+            personnel_index.observe(member.id, member.display_name)
+            roleplay_name = personnel_index.rp_name(member.id)
+            user_id = member.id
+            if not roleplay_name:
+                await interaction.followup.send(
+                    f"❌ No RP name is linked to {member.mention}. Their nickname should contain "
+                    f"their RP name, or search with `roleplay_name`.",
+                    ephemeral=True
+                )
+                return
+        
+        # Personnel comes from the roster when it is loaded, so this is at most one remote call
+        if user_id:
+            result, medals = await asyncio.gather(find_personnel(roleplay_name), get_user_medals(str(user_id)))
+        else:
+            result, medals = await find_personnel(roleplay_name), None
+        
+        if not result:
+            await interaction.followup.send(
+                "❌ Failed to connect to personnel database. Please try again later.",
+                ephemeral=True
+            )
+            return
+        
+        if not result.found:
+            embed = discord.Embed(
+                title="❌ Personnel Not Found",
+                description=f"Could not find personnel with RP name: **{roleplay_name}**\n\n"
+                           f"Please check the spelling and try again.",
+                color=discord.Color.red(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            embed.set_footer(text=f"Requested by {interaction.user.display_name}")
+            await interaction.followup.send(embed=embed)
+            return
+        
+        personnel = result.record
+        
+        # FIXED: LOA logic - 0 = Not on LOA, >0 = On LOA
+        loa_days = personnel.loa_days_left
+        if isinstance(loa_days, str):
+            loa_status = f"❔ **Unknown** ({loa_days})"
+            loa_color = discord.Color.light_grey()
+        elif loa_days > 0:
+            loa_status = f"⚠️ **On LOA** ({loa_days} days remaining)"
+            loa_color = discord.Color.orange()
+        else:
+            loa_status = "✅ **Not on LOA**"
+            loa_color = discord.Color.green()
+        
+        embed = discord.Embed(
+            title=f"📋 Personnel Profile: {personnel.rp_name}",
+            color=loa_color,
+            timestamp=datetime.now(timezone.utc)
+        )
+        
+        department = personnel.sheet.replace(" Personnel", "")
+        embed.add_field(name="🏢 Department", value=department, inline=True)
+        embed.add_field(name="⭐ Rank", value=personnel.rank, inline=True)
+        
+        activity_points = personnel.activity_points
+        embed.add_field(name="📊 Activity Points", value=str(activity_points), inline=True)
+        
+        # Date of Enlistment from Column E
+        date_of_enlistment = personnel.date_of_enlistment
+        embed.add_field(name="📅 Date of Enlistment", value=date_of_enlistment, inline=True)
+        
+        days_enlisted = personnel.days_enlisted
+        embed.add_field(name="⏱️ Days Enlisted", value=str(days_enlisted), inline=True)
+        
+        seadad = personnel.seadad
+        embed.add_field(name="⚓ SeaDad", value=seadad if seadad != "None" else "Not Assigned", inline=True)
+        embed.add_field(name="🌴 Leave of Absence", value=loa_status, inline=True)
+        
+        # Activity Status based on points (the same tiers drive the tier roles)
+        embed.add_field(name="📈 Activity Status", value=activity_tier(activity_points).label, inline=False)
+        
+        if user_id:
+            embed.add_field(name="👤 Member", value=f"<@{user_id}>", inline=True)
+        if medals is not None:
+            medal_list = ", ".join(medals) if medals else "No medals yet"
+            embed.add_field(name=f"🎖️ Medals ({len(medals)})", value=medal_list[:1024], inline=False)
+        
+        embed.set_footer(
+            text=f"Requested by {interaction.user.display_name} • Found in {personnel.sheet}",
+            icon_url=interaction.user.display_avatar.url
+        )
+        
+        await interaction.followup.send(embed=embed)
+        
+    except Exception as e:
+        log.exception(f"Error in profile command: {e}", extra={'function': 'profile'})
+        await interaction.followup.send(
+            f"❌ An error occurred while searching: {str(e)}",
+            ephemeral=True
+        )
+
+# ────────────────────────────────────────────────
+#   2. ID <-> RP name index upkeep
+# ────────────────────────────────────────────────
+def index_cached_members():
+    if bot_profile.member_cache:
+        for guild in served_guilds():
+            personnel_index.observe_all(guild.members)
+
+async def roster_refresh():
+    """Re-read cached nicknames and pull the roster every PERSONNEL_TTL"""
+    while True:
+        index_cached_members()
+        try:
+            if await fetch_roster() is not None:
+                log.info("🪪 Personnel roster loaded", extra=personnel_index.stats())
+        except Exception as e:
+            log.warning(f"⚠️ Roster refresh failed: {e}")
+        await asyncio.sleep(PERSONNEL_TTL)
+
+async def on_member_join(member: discord.Member):
+    personnel_index.observe(member.id, member.display_name)
+
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.display_name != after.display_name:
+        personnel_index.observe(after.id, after.display_name)
+
+async def on_member_remove(member: discord.Member):
+    personnel_index.forget(member.id)
+
+async def on_ready():
+    if PERSONNEL_SCRIPT_URL:
+        runtime.start_background_task("roster_refresh", roster_refresh)
+
+# ────────────────────────────────────────────────
+#   3. Extension setup
+# ────────────────────────────────────────────────
+async def setup(bot: commands.Bot):
+    bot.tree.add_command(profile_command)
+    bot.add_listener(on_member_join)
+    bot.add_listener(on_member_update)
+    bot.add_listener(on_member_remove)
+    bot.add_listener(on_ready)
+    if bot.is_ready() and PERSONNEL_SCRIPT_URL:
+        runtime.start_background_task("roster_refresh", roster_refresh)
+
+async def teardown(bot: commands.Bot):
+    runtime.stop_background_task("roster_refresh")
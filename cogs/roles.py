@@ -0,0 +1,261 @@
+"""
+Role management extension: the hourly role sweep (including activity tier
+roles joined from the personnel roster) and the member events that keep the
+sweep's role index current.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+import discord
+from discord.ext import commands
+
+import bot_logging
+import runtime
+from activity_tiers import UNKNOWN, activity_tier
+from config import (HOURLY_CHECK_ROLE_ID, ROLES_TO_ADD, ROLES_THAT_REMOVE, SPECIAL_ROLE_1, SPECIAL_ROLE_2,
+                    SPECIAL_ROLE_TO_ADD, SWEEP_ROLE_IDS, ACTIVITY_TIER_ROLES, TIER_ROLE_IDS, PERSONNEL_SCRIPT_URL,
+                    bot_profile)
+from runtime import personnel_index, role_index, ensure_chunked, resolve_member, served_guilds
+from script_models import PersonnelRecord
+from sheets import fetch_roster
+
+log = logging.getLogger("pennybot")
+
+# ────────────────────────────────────────────────
+#   1. Hourly Role Management Task
+# ────────────────────────────────────────────────
+async def sweep_candidates(guild: discord.Guild):
+    """Members holding a sweep role, from the role index; full REST paging only if the cache is incomplete"""
+    try:
+        await ensure_chunked(guild)
+    except Exception as e:
+        log.warning(f"⚠️ Could not chunk {guild.name}: {e}", extra={'guild': guild.id})
+
+    if guild.chunked:
+        if not role_index.is_built(guild.id):
+            role_index.build(guild)
+        members = [guild.get_member(uid) for uid in role_index.holders(guild.id, SWEEP_ROLE_IDS)]
+        return [member for member in members if member], 'cache'
+
+    # Chunking failed: look up the candidates remembered in the warm-start snapshot one by one
+    provisional = role_index.provisional_holders(guild.id, SWEEP_ROLE_IDS)
+    if provisional:
+        members = await asyncio.gather(*(resolve_member(guild, uid) for uid in provisional))
+        return [member for member in members if member], 'snapshot'
+
+    members = []
+    async for member in guild.fetch_members(limit=None):
+        members.append(member)
+    return members, 'rest'
+
+def join_tiers(roster: List[PersonnelRecord]) -> Dict[int, Optional[int]]:
+    """
+    Hash join of the roster with the ID <-> RP name index: user ID -> tier
+    role ID (0 = none, None = points unreadable, roles left as they are)
+    """
+    tier_roles = {}
+    for record in roster:
+        user_id = personnel_index.user_id(record.rp_name)
+        if user_id:
+            tier = activity_tier(record.activity_points)
+            tier_roles[user_id] = None if tier is UNKNOWN else ACTIVITY_TIER_ROLES.get(tier.key, 0)
+    return tier_roles
+
+async def reconcile_tier_roles(guild: discord.Guild, tier_roles: Dict[int, Optional[int]], summary: bot_logging.EventSummary):
+    """Give linked members exactly their tier's role, touching only the tier roles"""
+    candidates = set(tier_roles) | role_index.holders(guild.id, TIER_ROLE_IDS)
+    for user_id in candidates:
+        member = guild.get_member(user_id)
+        if member is None:
+            continue
+        if user_id not in tier_roles:
+            # Holds a tier role but is not linked to a roster entry; leave it for a human
+            summary.event('tier_unmatched', f"❔ {member.display_name} holds a tier role but has no roster entry",
+                          member=user_id)
+            continue
+
+        wanted = tier_roles[user_id]
+        if wanted is None:
+            continue
+        current = {role.id for role in member.roles}
+        if (current & set(TIER_ROLE_IDS)) == ({wanted} if wanted else set()):
+            continue
+        role = guild.get_role(wanted) if wanted else None
+        if wanted and role is None:
+            summary.error('errors', f"❌ Tier role {wanted} not found", member=user_id)
+            continue
+        # Only add/remove the tier roles: a full role list rebuilt from the cache would
+        # revert anything another bot, a moderator or a discharge changed in the meantime
+        stale = [r for r in member.roles if r.id in TIER_ROLE_IDS and r.id != wanted]
+        try:
+            if stale:
+                await member.remove_roles(*stale, reason="Activity tier update")
+            if role and wanted not in current:
+                await member.add_roles(role, reason="Activity tier update")
+            summary.event('tier_changed', f"📈 Updated activity tier role for {member.display_name}", member=user_id)
+        except Exception as e:
+            summary.error('errors', f"❌ Error updating tier role: {e}", member=user_id)
+
+async def hourly_role_management():
+    """Check every hour and manage roles based on criteria"""
+    await runtime.bot.wait_until_ready()
+    
+    if runtime.last_role_sweep is None:
+        log.info("⏰ Waiting 2 minutes before starting hourly role management...")
+        await asyncio.sleep(120)
+    else:
+        # Started by a reload: keep the previous module's hourly cadence
+        await asyncio.sleep(max(0.0, runtime.last_role_sweep + 3600 - time.monotonic()))
+    
+    while not runtime.bot.is_closed():
+        runtime.last_role_sweep = time.monotonic()
+        try:
+            log.info("🕐 Starting hourly role check...")
+            
+            if not bot_profile.member_cache:
+                log.warning(f"⚠️ Profile '{bot_profile.name}' has no members intent; skipping role check")
+                await asyncio.sleep(3600)
+                continue
+
+            # One bulk personnel pull per cycle (also refreshes the ID <-> RP name index)
+            tier_roles = None
+            if TIER_ROLE_IDS and PERSONNEL_SCRIPT_URL:
+                roster = await fetch_roster()
+                if roster is not None:
+                    tier_roles = join_tiers(roster)
+                else:
+                    log.warning("⚠️ Roster unavailable; skipping activity tier roles this hour")
+
+            for guild in served_guilds():
+                # One summary line per guild instead of one line per edited member
+                summary = bot_logging.EventSummary(log, guild=guild.id, guild_name=guild.name)
+                try:
+                    members, source = await sweep_candidates(guild)
+                    
+                    # Tier roles first, so the per-role sweep below sees the tiers already settled
+                    if tier_roles is not None and guild.chunked:
+                        await reconcile_tier_roles(guild, tier_roles, summary)
+                    
+                    log.debug(f"👥 Checking {len(members)} of {guild.member_count} members in {guild.name}",
+                              extra={'guild': guild.id, 'source': source})
+                    
+                    processed_count = 0
+                    for member in members:
+                        try:
+                            member_role_ids = [role.id for role in member.roles]
+                            has_hourly_check_role = HOURLY_CHECK_ROLE_ID in member_role_ids
+                            has_remove_trigger_role = any(role_id in member_role_ids for role_id in ROLES_THAT_REMOVE)
+                            
+                            if has_remove_trigger_role:
+                                roles_to_remove = []
+                                for role_id in ROLES_TO_ADD + [HOURLY_CHECK_ROLE_ID]:
+                                    if role_id in member_role_ids:
+                                        role = guild.get_role(role_id)
+                                        if role:
+                                            roles_to_remove.append(role)
+                                
+                                if roles_to_remove:
+                                    try:
+                                        await member.remove_roles(*roles_to_remove, reason="Hourly role cleanup")
+                                        summary.event('roles_removed', f"🔄 Removed roles from {member.display_name}", member=member.id)
+                                    except Exception as e:
+                                        summary.error('errors', f"❌ Error removing roles: {e}", member=member.id)
+                                
+                                processed_count += 1
+                                continue
+                            
+                            if has_hourly_check_role:
+                                roles_to_add = []
+                                for role_id in ROLES_TO_ADD:
+                                    if role_id not in member_role_ids:
+                                        role = guild.get_role(role_id)
+                                        if role:
+                                            roles_to_add.append(role)
+                                
+                                if roles_to_add:
+                                    try:
+                                        await member.add_roles(*roles_to_add, reason="Hourly role assignment")
+                                        summary.event('roles_added', f"🔄 Added roles to {member.display_name}", member=member.id)
+                                    except Exception as e:
+                                        summary.error('errors', f"❌ Error adding roles: {e}", member=member.id)
+                                
+                                processed_count += 1
+                            
+                            has_special_role = (SPECIAL_ROLE_1 in member_role_ids) or (SPECIAL_ROLE_2 in member_role_ids)
+                            special_role = guild.get_role(SPECIAL_ROLE_TO_ADD)
+                            
+                            if has_special_role and special_role:
+                                if SPECIAL_ROLE_TO_ADD not in member_role_ids:
+                                    try:
+                                        await member.add_roles(special_role, reason="Hourly role assignment")
+                                        summary.event('special_added', f"⭐ Added special role to {member.display_name}", member=member.id)
+                                    except Exception as e:
+                                        summary.error('errors', f"❌ Error adding special role: {e}", member=member.id)
+                                processed_count += 1
+                            elif special_role and SPECIAL_ROLE_TO_ADD in member_role_ids:
+                                try:
+                                    await member.remove_roles(special_role, reason="Hourly role cleanup")
+                                    summary.event('special_removed', f"⭐ Removed special role from {member.display_name}", member=member.id)
+                                except Exception as e:
+                                    summary.error('errors', f"❌ Error removing special role: {e}", member=member.id)
+                                processed_count += 1
+                                
+                        except Exception as e:
+                            summary.error('errors', f"⚠️ Error processing {member.display_name}: {e}", member=member.id)
+                            continue
+                    
+                    summary.flush(f"✅ Completed hourly check for {guild.name}",
+                                  members=len(members), guild_members=guild.member_count,
+                                  source=source, processed=processed_count)
+                    runtime.sweep_results[str(guild.id)] = {
+                        'at': time.time(), 'members': len(members), 'processed': processed_count,
+                        'source': source, 'counts': dict(summary.counts)
+                    }
+                    
+                except Exception as e:
+                    summary.flush(f"⚠️ Error processing guild {guild.name}: {e}", level=logging.ERROR)
+                    continue
+            
+            log.info("🕐 Hourly role check completed. Waiting 1 hour...")
+            
+        except Exception as e:
+            log.exception(f"💥 Critical error in hourly_role_management: {e}")
+        
+        await asyncio.sleep(3600)
+
+# ────────────────────────────────────────────────
+#   1a. Role index upkeep (gateway member events)
+# ────────────────────────────────────────────────
+async def on_guild_available(guild: discord.Guild):
+    # A new Guild object means a fresh member cache; rebuild the index from it
+    role_index.invalidate(guild.id)
+
+async def on_member_join(member: discord.Member):
+    role_index.update(member)
+
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.roles != after.roles:
+        role_index.update(after)
+
+async def on_member_remove(member: discord.Member):
+    role_index.remove(member.guild.id, member.id)
+
+async def on_ready():
+    runtime.start_background_task("role_sweep", hourly_role_management)
+
+# ────────────────────────────────────────────────
+#   2. Extension setup
+# ────────────────────────────────────────────────
+async def setup(bot: commands.Bot):
+    bot.add_listener(on_guild_available)
+    bot.add_listener(on_member_join)
+    bot.add_listener(on_member_update)
+    bot.add_listener(on_member_remove)
+    bot.add_listener(on_ready)
+    if bot.is_ready():
+        runtime.start_background_task("role_sweep", hourly_role_management)
+
+async def teardown(bot: commands.Bot):
+    runtime.stop_background_task("role_sweep")
@@ -0,0 +1,42 @@
+"""
+Keep-alive web server extension, also serving /metrics (Prometheus text format).
+
+Runs on the bot's event loop with aiohttp.web (instead of a Flask thread) so
+the server can be stopped and restarted when the extension is reloaded.
+"""
+import logging
+from typing import Optional
+
+from aiohttp import web
+from discord.ext import commands
+
+import runtime
+
+log = logging.getLogger("pennybot")
+
+WEB_HOST = '0.0.0.0'
+WEB_PORT = 8080
+
+runner: Optional[web.AppRunner] = None
+
+async def home(request: web.Request):
+    return web.Response(text="Bot is running!")
+
+async def metrics(request: web.Request):
+    return web.Response(text=runtime.loop_monitor.prometheus(), content_type='text/plain', charset='utf-8')
+
+async def setup(bot: commands.Bot):
+    global runner
+    app = web.Application()
+    app.router.add_get('/', home)
+    app.router.add_get('/metrics', metrics)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, WEB_HOST, WEB_PORT, reuse_address=True).start()
+    log.info(f"🌐 Web server started on port {WEB_PORT}")
+
+async def teardown(bot: commands.Bot):
+    if runner:
+        await runner.cleanup()
+        log.info("🌐 Web server stopped")
@@ -0,0 +1,119 @@
+"""
+Configuration shared by the bot and its extensions.
+
+Loaded once at startup and never reloaded: .env, logging, role IDs, URLs and
+the gateway footprint profile. Extensions import values from here.
+"""
+import logging
+import os
+
+from dotenv import load_dotenv
+
+import activity_tiers
+import bot_logging
+import footprint
+
+# ────────────────────────────────────────────────
+#   Logging (queue-backed, structured)
+# ────────────────────────────────────────────────
+load_dotenv()
+bot_logging.setup_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_FORMAT", "json"))
+log = logging.getLogger(bot_logging.APP_LOGGER)
+
+# ────────────────────────────────────────────────
+#   Constants
+# ────────────────────────────────────────────────
+REQUESTER_ROLE_ID    = 1332006727830339594
+APPROVER_ROLE_ID     = 1331831112963461120
+TARGET_ROLE_1_ID     = 1332058188933103677
+TARGET_ROLE_2_ID     = 935023208946606081
+APPROVAL_CHANNEL_ID  = 1468197242186764381
+
+# Role IDs for hourly management
+HOURLY_CHECK_ROLE_ID = 959996960834748416
+
+# Roles to add if they don't have them (when they have HOURLY_CHECK_ROLE_ID)
+ROLES_TO_ADD = [
+    1467443766423064641,
+    1467443606028816502,
+    1467443960996958219,
+    1467452194960707697,
+    1467452045132038284,
+    1467450300242595840,
+    1467444038645841941,
+    1467444148540932179,
+    1467444235853762714
+]
+
+# Roles that should remove all the above roles + HOURLY_CHECK_ROLE_ID
+ROLES_THAT_REMOVE = [
+    1332058188933103677,
+    935023208946606081,
+    1433102554840957010,
+    1332058285817466971,
+    1331957308703375401
+]
+
+# Special case roles that add another role
+SPECIAL_ROLE_1 = 1331826865744248892
+SPECIAL_ROLE_2 = 959997171648835594
+SPECIAL_ROLE_TO_ADD = 1467443465041477764
+
+# Roles for the activity tiers in activity_tiers.py, kept in step with the
+# personnel sheet by the hourly sweep (0 = no role for that tier)
+ACTIVITY_TIER_ROLES = {
+    'inactive': 0,
+    'enough': 0,
+    'decent': 0,
+    'extraordinary': 0
+}
+
+# Only holders of these roles can need a change in the hourly sweep
+SWEEP_ROLE_IDS = [HOURLY_CHECK_ROLE_ID, *ROLES_THAT_REMOVE, SPECIAL_ROLE_1, SPECIAL_ROLE_2, SPECIAL_ROLE_TO_ADD]
+
+# Apps Script Web App URLs
+APPS_SCRIPT_WEB_APP_URL = ""
+PERSONNEL_SCRIPT_URL = ""
+
+# LOA-expiry and low-activity alerts: channel to post them in (0 = none);
+# PERSONNEL_ALERT_DM=1 also DMs the member when their Discord ID is known
+PERSONNEL_ALERT_CHANNEL_ID = 0
+
+# Local state (write-behind journal etc.)
+DATA_DIR = "data"
+
+# Extensions loaded at startup; each can be reloaded in place with /reload
+EXTENSIONS = ('cogs.webserver', 'cogs.roles', 'cogs.discharge', 'cogs.medals', 'cogs.personnel', 'cogs.notifier',
+              'cogs.admin')
+
+# ────────────────────────────────────────────────
+#   Load token securely (.env is loaded with logging above)
+# ────────────────────────────────────────────────
+TOKEN = os.getenv("DISCORD_TOKEN")
+APPS_SCRIPT_WEB_APP_URL = os.getenv("APPS_SCRIPT_WEB_APP_URL", APPS_SCRIPT_WEB_APP_URL)
+PERSONNEL_SCRIPT_URL = os.getenv("PERSONNEL_SCRIPT_URL", PERSONNEL_SCRIPT_URL)
+DATA_DIR = os.getenv("DATA_DIR", DATA_DIR)
+PERSONNEL_ALERT_CHANNEL_ID = int(os.getenv("PERSONNEL_ALERT_CHANNEL_ID", PERSONNEL_ALERT_CHANNEL_ID))
+PERSONNEL_ALERT_DM = os.getenv("PERSONNEL_ALERT_DM", "0") == "1"
+ACTIVITY_TIER_ROLES.update(activity_tiers.parse_tier_roles(os.getenv("ACTIVITY_TIER_ROLES", "")))
+TIER_ROLE_IDS = [role_id for role_id in ACTIVITY_TIER_ROLES.values() if role_id]
+SWEEP_ROLE_IDS += TIER_ROLE_IDS
+
+if not TOKEN:
+    raise ValueError("DISCORD_TOKEN not found in .env file!")
+
+if not APPS_SCRIPT_WEB_APP_URL or APPS_SCRIPT_WEB_APP_URL == "YOUR_WEB_APP_URL_HERE":
+    raise ValueError("APPS_SCRIPT_WEB_APP_URL not configured in .env file!")
+
+if not PERSONNEL_SCRIPT_URL or PERSONNEL_SCRIPT_URL == "":
+    log.info("ℹ️ PERSONNEL_SCRIPT_URL not configured. Profile command will be disabled.")
+else:
+    log.info("✅ PERSONNEL_SCRIPT_URL configured")
+
+# ────────────────────────────────────────────────
+#   Gateway footprint
+# ────────────────────────────────────────────────
+# Gateway intents, member cache and chunking come from a footprint profile
+# (see footprint.py); GUILD_ALLOWLIST limits which guilds are served at all
+bot_profile = footprint.get_profile(os.getenv("BOT_PROFILE", "standard"))
+GUILD_ALLOWLIST = footprint.parse_allowlist(os.getenv("GUILD_ALLOWLIST", ""))
@@ -0,0 +1,145 @@
+"""
+Resumable bulk discharge jobs.
+
+A bulk discharge is requested with a file of user IDs rather than the 1024
+character modal field. Each job is stored as two files under DATA_DIR:
+`<id>.targets` (the validated ID list, written once) and `<id>.json` (status
+and progress, rewritten after every processed chunk). If the bot restarts
+mid-discharge the runner resumes from the recorded position, and pending
+approval buttons are re-registered as persistent views.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+log = logging.getLogger("pennybot.discharge_jobs")
+
+# Discord snowflakes are 17-20 digits; allow a little slack either side
+ID_PATTERN = re.compile(r"^\d{15,21}$")
+TOKEN_SPLIT = re.compile(r"[\s,;]+")
+MAX_RECORDED_ERRORS = 200
+
+STATUSES = ('pending', 'running', 'done', 'denied', 'failed')
+
+
+async def iter_user_ids(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, str, Optional[int]]]:
+    """
+    Yield (line_number, token, user_id) for every token in a txt/CSV stream.
+    user_id is None for tokens that are not snowflakes; a non-numeric first
+    line is treated as a CSV header and skipped silently.
+    """
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        tokens = [t.strip('"\'') for t in TOKEN_SPLIT.split(line.strip()) if t]
+        if line_number == 1 and tokens and not any(ID_PATTERN.match(t) for t in tokens):
+            continue
+        for token in tokens:
+            yield line_number, token, int(token) if ID_PATTERN.match(token) else None
+
+
+class DischargeJob:
+    def __init__(self, job_id: str, guild_id: int, requester_id: int, reason: str, total: int = 0,
+                 channel_id: Optional[int] = None, message_id: Optional[int] = None,
+                 status: str = 'pending', next_index: int = 0, success: int = 0,
+                 errors: Optional[List[str]] = None, error_count: int = 0,
+                 approver_id: Optional[int] = None, created: Optional[float] = None,
+                 updated: Optional[float] = None):
+        self.id = job_id
+        self.guild_id = guild_id
+        self.requester_id = requester_id
+        self.reason = reason
+        self.total = total
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.status = status
+        self.next_index = next_index
+        self.success = success
+        self.errors = errors or []
+        self.error_count = error_count
+        self.approver_id = approver_id
+        self.created = created or time.time()
+        self.updated = updated or self.created
+
+    @property
+    def nickname(self) -> str:
+        return f"Discharged for {self.reason}"
+
+    def error(self, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_RECORDED_ERRORS:
+            self.errors.append(message)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id, 'guild_id': self.guild_id, 'requester_id': self.requester_id,
+            'reason': self.reason, 'total': self.total, 'channel_id': self.channel_id,
+            'message_id': self.message_id, 'status': self.status, 'next_index': self.next_index,
+            'success': self.success, 'errors': self.errors, 'error_count': self.error_count,
+            'approver_id': self.approver_id, 'created': self.created, 'updated': self.updated
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DischargeJob":
+        data = dict(data)
+        return cls(data.pop('id'), **data)
+
+
+class DischargeJobStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{int(time.time())}-{secrets.token_hex(3)}"
+
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{job_id}{suffix}")
+
+    def _write_sync(self, path: str, text: str):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    async def save(self, job: DischargeJob):
+        job.updated = time.time()
+        await asyncio.to_thread(self._write_sync, self._path(job.id, ".json"), json.dumps(job.to_dict()))
+
+    async def save_targets(self, job_id: str, user_ids: List[int]):
+        await asyncio.to_thread(self._write_sync, self._path(job_id, ".targets"),
+                                "\n".join(str(uid) for uid in user_ids) + "\n")
+
+    def targets_path(self, job_id: str) -> str:
+        return self._path(job_id, ".targets")
+
+    def _read_targets_sync(self, job_id: str) -> List[int]:
+        with open(self._path(job_id, ".targets"), 'r', encoding='utf-8') as f:
+            return [int(line) for line in f if line.strip()]
+
+    async def load_targets(self, job_id: str) -> List[int]:
+        # Bulk jobs can list thousands of IDs; keep the read off the event loop
+        return await asyncio.to_thread(self._read_targets_sync, job_id)
+
+    def load_all(self) -> List[DischargeJob]:
+        if not os.path.isdir(self.directory):
+            return []
+
+        jobs = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                    jobs.append(DischargeJob.from_dict(json.load(f)))
+            except (OSError, ValueError, TypeError) as e:
+                log.warning(f"⚠️ Skipping unreadable discharge job {name}: {e}")
+        return jobs
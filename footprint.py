@@ -0,0 +1,151 @@
+"""
+Gateway and member-cache footprint profiles.
+
+A profile decides which gateway intents the bot asks for, which members
+discord.py keeps in its cache, and when guilds are chunked (the full member
+list download). Memory and startup time scale with these choices, so each
+run records its RSS and time-to-ready per profile in DATA_DIR, letting
+`/footprint` compare profiles that have actually been run.
+
+    full        original settings: members + message_content, chunk at startup
+    standard    members intent, no message_content, chunk at startup
+    lean        only guilds + members intents, chunk in the background after ready
+    lazy        like lean, but a guild is only chunked when something needs it
+    minimal     no members intent: nothing cached, members fetched over REST;
+                role reconciliation is disabled
+"""
+import json
+import os
+import resource
+import sys
+import time
+from typing import Dict, Optional, Set
+
+import discord
+
+STARTED = time.monotonic()
+
+
+class FootprintProfile:
+    def __init__(self, name: str, members: bool, message_content: bool, default_intents: bool,
+                 chunking: str, cache_voice: bool = False):
+        self.name = name
+        self.members = members
+        self.message_content = message_content
+        self.default_intents = default_intents
+        self.chunking = chunking
+        self.cache_voice = cache_voice
+
+    @property
+    def member_cache(self) -> bool:
+        """Whether the member cache can be complete (needed for role.members based reconciliation)"""
+        return self.members
+
+    @property
+    def chunk_at_startup(self) -> bool:
+        return self.members and self.chunking == 'startup'
+
+    def intents(self) -> discord.Intents:
+        if self.default_intents:
+            intents = discord.Intents.default()
+        else:
+            # Slash commands arrive as interactions and need no message/reaction/typing intents
+            intents = discord.Intents.none()
+            intents.guilds = True
+        intents.members = self.members
+        intents.message_content = self.message_content
+        return intents
+
+    def member_cache_flags(self) -> discord.MemberCacheFlags:
+        if not self.members:
+            return discord.MemberCacheFlags.none()
+        flags = discord.MemberCacheFlags.none()
+        flags.joined = True
+        flags.voice = self.cache_voice and self.default_intents
+        return flags
+
+    def describe(self) -> str:
+        intents = [name for name, enabled in self.intents() if enabled]
+        return (f"intents: {', '.join(intents)} • member cache: "
+                f"{'joined' if self.members else 'none'} • chunking: {self.chunking if self.members else 'n/a'}")
+
+
+PROFILES: Dict[str, FootprintProfile] = {
+    'full': FootprintProfile('full', members=True, message_content=True, default_intents=True,
+                             chunking='startup', cache_voice=True),
+    'standard': FootprintProfile('standard', members=True, message_content=False, default_intents=True,
+                                 chunking='startup'),
+    'lean': FootprintProfile('lean', members=True, message_content=False, default_intents=False,
+                             chunking='background'),
+    'lazy': FootprintProfile('lazy', members=True, message_content=False, default_intents=False,
+                             chunking='lazy'),
+    'minimal': FootprintProfile('minimal', members=False, message_content=False, default_intents=False,
+                                chunking='lazy'),
+}
+
+
+def get_profile(name: str) -> FootprintProfile:
+    try:
+        return PROFILES[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown BOT_PROFILE '{name}'. Choose one of: {', '.join(PROFILES)}")
+
+
+def parse_allowlist(value: str) -> Optional[Set[int]]:
+    """Comma/space separated guild IDs; empty means every guild is allowed"""
+    ids = {int(part) for part in value.replace(',', ' ').split() if part.strip()}
+    return ids or None
+
+
+def rss_bytes() -> int:
+    """Current resident set size"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def elapsed() -> float:
+    return time.monotonic() - STARTED
+
+
+class FootprintRecorder:
+    """Keeps the latest measurement of each profile in a small JSON file"""
+
+    def __init__(self, path: str, profile: FootprintProfile):
+        self.path = path
+        self.profile = profile
+        self.current: Dict[str, float] = {}
+
+    def load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, stage: str, guilds: int, cached_members: int):
+        """stage is 'ready' or 'chunked'"""
+        self.current.update({
+            f'{stage}_s': round(elapsed(), 2),
+            f'rss_mb_{stage}': round(rss_bytes() / 2**20, 1),
+            'peak_rss_mb': round(peak_rss_bytes() / 2**20, 1),
+            'guilds': guilds,
+            'cached_members': cached_members,
+            'measured_at': time.time(),
+        })
+
+        measurements = self.load()
+        measurements[self.profile.name] = dict(self.current)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(measurements, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,243 @@
+"""
+Interaction latency tracing with an auto-defer guard.
+
+Discord drops an interaction that is not acknowledged within 3 seconds of
+being created. `traced()` wraps a command, modal or view callback and
+records three spans per invocation, all measured from the interaction's
+creation time: when the handler started, when the interaction was
+acknowledged, and when the handler finished. A watchdog running alongside
+the handler defers the interaction once most of the budget is spent, so
+slow handlers degrade to a "thinking..." state instead of failing.
+
+Handlers should send through `respond()` / `ensure_deferred()` /
+`edit_response()` so they keep working after an automatic defer.
+"""
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+import discord
+
+log = logging.getLogger("pennybot.tracing")
+
+INTERACTION_DEADLINE = 3.0   # seconds Discord allows before the first response
+DEFER_MARGIN = 0.8           # defer when this much of the budget is left
+WATCHDOG_INTERVAL = 0.05     # how often the watchdog checks for an acknowledgment
+SLOW_HANDLER_SECONDS = 10.0  # total duration that gets a warning log line
+SAMPLE_SIZE = 500            # latency samples kept per handler
+
+# interaction.extras keys: set while a helper below is sending the first
+# response, and the monotonic time that response completed
+ACKING = '_tracing_acking'
+ACKED_AT = '_tracing_acked_at'
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class HandlerStats:
+    __slots__ = ('calls', 'errors', 'auto_defers', 'deadline_misses', 'ack_ms', 'total_ms', 'start_ms')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.auto_defers = 0
+        self.deadline_misses = 0
+        self.ack_ms: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.total_ms: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.start_ms: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+
+    def summary(self) -> dict:
+        ack = list(self.ack_ms)
+        total = list(self.total_ms)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'auto_defers': self.auto_defers,
+            'deadline_misses': self.deadline_misses,
+            'start_p50': percentile(list(self.start_ms), 50),
+            'ack_p50': percentile(ack, 50),
+            'ack_p95': percentile(ack, 95),
+            'ack_p99': percentile(ack, 99),
+            'total_p50': percentile(total, 50),
+            'total_p99': percentile(total, 99),
+        }
+
+
+class InteractionTracer:
+    def __init__(self):
+        self.stats: Dict[str, HandlerStats] = {}
+
+    def handler(self, name: str) -> HandlerStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = HandlerStats()
+        return stats
+
+    def report(self) -> Dict[str, dict]:
+        return {name: stats.summary() for name, stats in sorted(self.stats.items())}
+
+    def reset(self):
+        self.stats.clear()
+
+
+tracer = InteractionTracer()
+
+
+def _defer_kwargs(interaction: discord.Interaction, ephemeral: bool) -> dict:
+    if interaction.type == discord.InteractionType.component:
+        # Deferred update: acknowledges the click without posting anything
+        return {}
+    return {'ephemeral': ephemeral, 'thinking': True}
+
+
+async def _watchdog(interaction: discord.Interaction, defer_at: float, ephemeral: bool, span: dict):
+    """Record when the interaction gets acknowledged; defer it if the budget runs out first"""
+    while True:
+        if interaction.response.is_done():
+            span['ack'] = time.monotonic()
+            return
+
+        # Never race a response the handler already has in flight
+        if time.monotonic() >= defer_at and not interaction.extras.get(ACKING):
+            try:
+                await interaction.response.defer(**_defer_kwargs(interaction, ephemeral))
+                span['ack'] = time.monotonic()
+                span['auto_deferred'] = True
+                interaction.extras.setdefault(ACKED_AT, span['ack'])
+            except discord.InteractionResponded:
+                span['ack'] = time.monotonic()
+            except discord.HTTPException as e:
+                span['defer_error'] = str(e)
+            return
+
+        await asyncio.sleep(WATCHDOG_INTERVAL)
+
+
+def _find_interaction(args) -> Optional[discord.Interaction]:
+    for arg in args:
+        if isinstance(arg, discord.Interaction):
+            return arg
+    return None
+
+
+def traced(name: str, *, auto_defer: bool = True, ephemeral: bool = True):
+    """
+    Decorator for interaction callbacks (slash commands, Modal.on_submit,
+    button callbacks). `auto_defer=False` is for handlers whose first
+    response is a modal, which cannot follow a defer. `ephemeral` controls
+    the visibility of an automatic "thinking..." defer.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = _find_interaction(args)
+            if interaction is None:
+                return await func(*args, **kwargs)
+
+            stats = tracer.handler(name)
+            stats.calls += 1
+
+            entered = time.monotonic()
+            age = (datetime.now(timezone.utc) - interaction.created_at).total_seconds()
+            age = min(max(age, 0.0), INTERACTION_DEADLINE)
+            received = entered - age
+            span = {}
+
+            watchdog = None
+            if auto_defer:
+                defer_at = received + INTERACTION_DEADLINE - DEFER_MARGIN
+                watchdog = asyncio.create_task(_watchdog(interaction, defer_at, ephemeral, span))
+
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                stats.errors += 1
+                raise
+            finally:
+                finished = time.monotonic()
+                if watchdog:
+                    watchdog.cancel()
+                if ACKED_AT in interaction.extras:
+                    # Exact time from the respond helpers beats the watchdog's polling
+                    span['ack'] = interaction.extras[ACKED_AT]
+                elif 'ack' not in span and interaction.response.is_done():
+                    # Acknowledged directly, between the last watchdog tick and completion
+                    span['ack'] = finished
+
+                start_ms = (entered - received) * 1000
+                total_ms = (finished - received) * 1000
+                stats.start_ms.append(start_ms)
+                stats.total_ms.append(total_ms)
+
+                ack_ms = (span['ack'] - received) * 1000 if 'ack' in span else None
+                if ack_ms is not None:
+                    stats.ack_ms.append(ack_ms)
+                if span.get('auto_deferred'):
+                    stats.auto_defers += 1
+
+                missed = ack_ms is None or ack_ms > INTERACTION_DEADLINE * 1000
+                if missed:
+                    stats.deadline_misses += 1
+
+                fields = {
+                    'handler': name, 'guild': interaction.guild_id, 'user': interaction.user.id,
+                    'start_ms': round(start_ms, 1), 'ack_ms': round(ack_ms, 1) if ack_ms is not None else None,
+                    'total_ms': round(total_ms, 1), 'auto_deferred': bool(span.get('auto_deferred'))
+                }
+                if missed:
+                    log.warning("⏱️ Interaction missed its acknowledgment deadline",
+                                extra={**fields, 'defer_error': span.get('defer_error')})
+                elif total_ms > SLOW_HANDLER_SECONDS * 1000:
+                    log.warning("🐢 Slow interaction handler", extra=fields)
+                else:
+                    log.debug("⏱️ Interaction handled", extra=fields)
+
+        return wrapper
+    return decorator
+
+
+async def _acknowledge(interaction: discord.Interaction, coro):
+    interaction.extras[ACKING] = True
+    try:
+        result = await coro
+        interaction.extras.setdefault(ACKED_AT, time.monotonic())
+        return result
+    finally:
+        interaction.extras[ACKING] = False
+
+
+async def respond(interaction: discord.Interaction, *args, **kwargs):
+    """Send the first response, or a followup if the interaction was already acknowledged"""
+    if interaction.response.is_done():
+        return await interaction.followup.send(*args, **kwargs)
+    return await _acknowledge(interaction, interaction.response.send_message(*args, **kwargs))
+
+
+async def ensure_deferred(interaction: discord.Interaction, **kwargs):
+    """Defer unless something (e.g. the watchdog) already acknowledged the interaction"""
+    if not interaction.response.is_done():
+        try:
+            await _acknowledge(interaction, interaction.response.defer(**kwargs))
+        except discord.InteractionResponded:
+            pass
+
+
+async def edit_response(interaction: discord.Interaction, **kwargs):
+    """Edit the component's message as the acknowledgment, or afterwards if already deferred"""
+    if interaction.response.is_done():
+        return await interaction.edit_original_response(**kwargs)
+    return await _acknowledge(interaction, interaction.response.edit_message(**kwargs))
+
+
+async def send_modal(interaction: discord.Interaction, modal: discord.ui.Modal):
+    return await _acknowledge(interaction, interaction.response.send_modal(modal))
@@ -0,0 +1,169 @@
+"""
+Event loop lag monitor and blocking-call detector.
+
+A watchdog thread pings the loop with call_soon_threadsafe() every
+`interval` seconds and waits for the callback to run. The delay between the
+two is the loop's lag: how long any ready callback (a command handler, a
+response being decoded, one step of the sweep) currently waits for its turn.
+If the ping has not run after `threshold` seconds the loop is blocked by
+whatever is on its thread right now, so the watchdog takes that thread's
+stack while it is still stuck, then waits for the ping to record how long
+the block lasted.
+
+Lags go into a ring buffer for percentiles. Blocks are grouped by the
+deepest frame in the bot's own code, giving count, total and worst duration
+per offender. `reset()` clears what /latency shows; the Prometheus counters
+keep counting from startup.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from interaction_tracing import percentile
+
+log = logging.getLogger("pennybot.loop")
+
+INTERVAL = 0.25          # seconds between pings
+BLOCK_THRESHOLD = 0.1    # a ping this late means a blocking callback
+SAMPLE_SIZE = 2400       # lag samples kept (10 minutes at the default interval)
+RECENT_BLOCKS = 20
+STACK_DEPTH = 12
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Offender:
+    __slots__ = ('site', 'count', 'total', 'worst', 'stack', 'last_at')
+
+    def __init__(self, site: str):
+        self.site = site
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.stack: List[str] = []
+        self.last_at = 0.0
+
+
+def blocking_site(stack: List[traceback.FrameSummary]) -> str:
+    """Deepest frame in the bot's own files, else the innermost frame"""
+    for frame in reversed(stack):
+        if os.path.abspath(frame.filename).startswith(PROJECT_DIR + os.sep):
+            return f"{frame.name} ({os.path.relpath(frame.filename, PROJECT_DIR)}:{frame.lineno})"
+    frame = stack[-1]
+    return f"{frame.name} ({os.path.basename(frame.filename)}:{frame.lineno})"
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = INTERVAL, threshold: float = BLOCK_THRESHOLD):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: Deque[float] = deque(maxlen=SAMPLE_SIZE)
+        self.offenders: Dict[str, Offender] = {}
+        self.recent: Deque[dict] = deque(maxlen=RECENT_BLOCKS)
+        self.blocks = 0
+        self.blocks_total = 0                         # never reset (Prometheus counters)
+        self.blocked_seconds: Dict[str, float] = {}   # site -> total seconds blocked, never reset
+        self.started_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int):
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._watch, args=(loop, loop_thread_id),
+                                        name="loop-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self, loop: asyncio.AbstractEventLoop, loop_thread_id: int):
+        while not self._stop.wait(self.interval):
+            answered = threading.Event()
+            sent = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                return  # loop closed
+
+            if answered.wait(self.threshold):
+                self.lags.append(time.perf_counter() - sent)
+                continue
+
+            # Still blocked: the stack right now is the culprit
+            frame = sys._current_frames().get(loop_thread_id)
+            stack = traceback.extract_stack(frame)[-STACK_DEPTH:] if frame is not None else []
+            while not answered.wait(1.0):
+                if self._stop.is_set() or loop.is_closed():
+                    return
+            self._record_block(time.perf_counter() - sent, stack)
+
+    def _record_block(self, duration: float, stack: List[traceback.FrameSummary]):
+        self.lags.append(duration)
+        self.blocks += 1
+        self.blocks_total += 1
+        site = blocking_site(stack) if stack else "unknown"
+        self.blocked_seconds[site] = self.blocked_seconds.get(site, 0.0) + duration
+        offender = self.offenders.get(site)
+        if offender is None:
+            offender = self.offenders[site] = Offender(site)
+        offender.count += 1
+        offender.total += duration
+        offender.last_at = time.time()
+        frames = [f"{f.name} ({os.path.basename(f.filename)}:{f.lineno})" for f in stack]
+        if duration >= offender.worst:
+            offender.worst = duration
+            offender.stack = frames
+        self.recent.append({'at': time.time(), 'ms': round(duration * 1000, 1), 'site': site})
+        log.warning(f"🐢 Event loop blocked for {duration * 1000:.0f}ms in {site}",
+                    extra={'blocked_ms': round(duration * 1000, 1), 'site': site, 'stack': frames})
+
+    def summary(self) -> dict:
+        # The monitor thread appends while this runs on the loop; list() copies in one step
+        lags_ms = [lag * 1000 for lag in list(self.lags)]
+        return {
+            'samples': len(lags_ms),
+            'lag_p50': percentile(lags_ms, 50),
+            'lag_p90': percentile(lags_ms, 90),
+            'lag_p99': percentile(lags_ms, 99),
+            'lag_max': max(lags_ms) if lags_ms else None,
+            'blocks': self.blocks,
+        }
+
+    def worst_offenders(self, limit: int = 5) -> List[Offender]:
+        return sorted(list(self.offenders.values()), key=lambda o: -o.total)[:limit]
+
+    def reset(self):
+        """Start the /latency figures over (the Prometheus counters are left alone)"""
+        self.lags.clear()
+        self.offenders.clear()
+        self.recent.clear()
+        self.blocks = 0
+
+    def prometheus(self) -> str:
+        """Text exposition format for the /metrics endpoint"""
+        summary = self.summary()
+        lines = ["# TYPE pennybot_loop_lag_seconds summary"]
+        for quantile, key in (("0.5", 'lag_p50'), ("0.9", 'lag_p90'), ("0.99", 'lag_p99')):
+            if summary[key] is not None:
+                lines.append(f'pennybot_loop_lag_seconds{{quantile="{quantile}"}} {summary[key] / 1000:.6f}')
+        lines.append(f"pennybot_loop_lag_seconds_count {summary['samples']}")
+        lines.append("# TYPE pennybot_loop_blocks_total counter")
+        lines.append(f"pennybot_loop_blocks_total {self.blocks_total}")
+        lines.append("# TYPE pennybot_loop_blocked_seconds_total counter")
+        for site, total in sorted(list(self.blocked_seconds.items()), key=lambda item: -item[1])[:20]:
+            site = site.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'pennybot_loop_blocked_seconds_total{{site="{site}"}} {total:.6f}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,163 @@
+"""
+Streaming CSV import/export of the user × medal matrix.
+
+The CSV layout mirrors the sheet: a `user_id` column followed by one column
+per medal type, with `Y` marking a held medal. Imports are parsed record by
+record from the attachment stream (a quoted field may span lines, as
+`write_rows` produces for a medal name containing a newline) and handled in
+fixed-size chunks, so memory stays bounded by the chunk size rather than by
+the file size.
+"""
+import csv
+import io
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+USER_ID_COLUMN = "user_id"
+TRUE_VALUES = {'y', 'yes', 'true', '1', 'x'}
+FALSE_VALUES = {'', 'n', 'no', 'false', '0'}
+IMPORT_CHUNK_SIZE = 500
+
+
+def parse_cell(value: str) -> Optional[bool]:
+    """Interpret a matrix cell; None means the value is not recognised"""
+    value = value.strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    return None
+
+
+def parse_header(header: List[str], medal_types: List[str]) -> List[str]:
+    """Validate the header row and return the medal column names in order"""
+    if not header or header[0].strip().lower() != USER_ID_COLUMN:
+        raise ValueError(f"First column must be `{USER_ID_COLUMN}`")
+
+    columns = [name.strip() for name in header[1:]]
+    if not columns:
+        raise ValueError("No medal columns found in header")
+
+    known = set(medal_types)
+    unknown = [name for name in columns if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown medal type(s): {', '.join(unknown[:10])}")
+
+    duplicates = {name for name in columns if columns.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate medal column(s): {', '.join(sorted(duplicates))}")
+
+    return columns
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte line stream (e.g. aiohttp's response.content) into text lines"""
+    first = True
+    async for raw in stream:
+        line = raw.decode('utf-8', errors='replace')
+        if first:
+            line = line.lstrip('\ufeff')
+            first = False
+        line = line.rstrip('\r\n')
+        if line.strip():
+            yield line
+
+
+def parse_record(text: str) -> List[str]:
+    return next(csv.reader(io.StringIO(text, newline='')), [])
+
+
+async def iter_records(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, List[str]]]:
+    """
+    Parse a byte line stream into CSV records: (line number the record starts
+    on, cells). Physical lines are joined while a quoted field is still open
+    (an odd number of quote characters so far); blank lines between records
+    are skipped.
+    """
+    pending: List[str] = []
+    quotes = 0
+    start = line_number = 0
+    async for raw in stream:
+        line_number += 1
+        line = raw.decode('utf-8', errors='replace')
+        if line_number == 1:
+            line = line.lstrip('\ufeff')
+        if not pending:
+            if not line.strip():
+                continue
+            start = line_number
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        yield start, parse_record("".join(pending))
+        pending, quotes = [], 0
+    if pending:
+        # Unterminated quote at the end of the file: the csv module takes the rest as the field
+        yield start, parse_record("".join(pending))
+
+
+async def iter_row_chunks(records: AsyncIterator[Tuple[int, List[str]]],
+                          chunk_size: int = IMPORT_CHUNK_SIZE) -> AsyncIterator[List[Tuple[int, List[str]]]]:
+    """Group parsed CSV rows into chunks of (line_number, cells)"""
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.users = 0
+        self.changes = 0
+        self.awards = 0
+        self.removals = 0
+        self.unchanged = 0
+        self.errors: List[str] = []
+        self.error_count = 0
+
+    def error(self, message: str):
+        self.error_count += 1
+        if len(self.errors) < 20:
+            self.errors.append(message)
+
+
+def diff_user(user_id: str, cells: List[str], columns: List[str], current: Iterable[str],
+              stats: ImportStats, line_number: int) -> List[Tuple[str, bool]]:
+    """
+    Compare one CSV row with the user's current medals and return the
+    (medal, has_medal) changes. A row with any unrecognised cell is skipped
+    entirely rather than half-applied.
+    """
+    held = set(current)
+    changes = []
+    for medal, cell in zip(columns, cells):
+        wanted = parse_cell(cell)
+        if wanted is None:
+            stats.error(f"Line {line_number}: unrecognised value `{cell}` for {medal}")
+            return []
+        if wanted != (medal in held):
+            changes.append((medal, wanted))
+
+    if changes:
+        stats.changes += len(changes)
+        stats.awards += sum(1 for _, has in changes if has)
+        stats.removals += sum(1 for _, has in changes if not has)
+    else:
+        stats.unchanged += 1
+    return changes
+
+
+def write_header(f: io.TextIOBase, medal_types: List[str]):
+    csv.writer(f).writerow([USER_ID_COLUMN] + medal_types)
+
+
+def write_rows(f: io.TextIOBase, medal_types: List[str], rows: Dict[str, List[str]]):
+    writer = csv.writer(f)
+    for user_id, medals in rows.items():
+        held = set(medals)
+        writer.writerow([user_id] + ['Y' if medal in held else '' for medal in medal_types])
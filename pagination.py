@@ -0,0 +1,155 @@
+"""
+Paginated embeds, rendered a page at a time.
+
+A `Paginator` holds one query's result and builds a page's embed the first
+time that page is shown, so a listing costs one page of rendering per
+interaction however large the result is. `PageCache` keeps paginators (and
+the pages they already built) per query key together with a version of the
+data behind them: the next identical query reuses them, and a different
+version (a write went through, the cached sheet data was refetched) or an
+entry older than `max_age` builds a fresh one. `PaginatedView` adds
+previous/next buttons that only the person who ran the command can use.
+
+    paginator = page_cache.get(key, version)
+    if paginator is None:
+        paginator = Paginator(items, render_page, per_page=20)
+        page_cache.put(key, version, paginator)
+    await send_paginated(interaction, paginator)
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import discord
+from discord import ui
+
+from interaction_tracing import traced, respond, edit_response
+
+log = logging.getLogger("pennybot.pages")
+
+PAGE_CACHE_SIZE = 64      # queries kept
+PAGE_CACHE_MAX_AGE = 600  # seconds; catches sheet edits the bot did not make (same as the sheet cache TTL)
+VIEW_TIMEOUT = 600        # seconds the buttons stay active (interaction tokens last 15 minutes)
+
+# render(items on the page, page index, page count) -> embed
+PageRenderer = Callable[[Sequence, int, int], discord.Embed]
+
+
+class Paginator:
+    def __init__(self, items: Sequence, render: PageRenderer, per_page: int):
+        self.items = items
+        self.render = render
+        self.per_page = per_page
+        self.pages: Dict[int, discord.Embed] = {}
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.items) // self.per_page))
+
+    def page(self, index: int) -> discord.Embed:
+        index = min(max(index, 0), self.page_count - 1)
+        embed = self.pages.get(index)
+        if embed is None:
+            start = index * self.per_page
+            embed = self.pages[index] = self.render(self.items[start:start + self.per_page], index, self.page_count)
+        return embed
+
+
+class PageCache:
+    def __init__(self, size: int = PAGE_CACHE_SIZE, max_age: float = PAGE_CACHE_MAX_AGE):
+        self.size = size
+        self.max_age = max_age
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, float, Paginator]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Paginator]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        entry_version, built, paginator = entry
+        if entry_version != version or time.time() - built > self.max_age:
+            del self._entries[key]
+            self.invalidated += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return paginator
+
+    def put(self, key: Hashable, version: Hashable, paginator: Paginator):
+        self._entries[key] = (version, time.time(), paginator)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            'queries': len(self._entries),
+            'pages': sum(len(paginator.pages) for _, _, paginator in self._entries.values()),
+            'hits': self.hits, 'misses': self.misses, 'invalidated': self.invalidated,
+        }
+
+
+class PaginatedView(ui.View):
+    def __init__(self, paginator: Paginator, owner_id: int, timeout: float = VIEW_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.paginator = paginator
+        self.owner_id = owner_id
+        self.index = 0
+        self.message: Optional[discord.Message] = None
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.previous.disabled = self.index == 0
+        self.next.disabled = self.index >= self.paginator.page_count - 1
+        self.position.label = f"{self.index + 1}/{self.paginator.page_count}"
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await respond(interaction, "Only the person who ran the command can turn these pages.", ephemeral=True)
+            return False
+        return True
+
+    async def turn(self, interaction: discord.Interaction, index: int):
+        self.index = min(max(index, 0), self.paginator.page_count - 1)
+        self._sync_buttons()
+        await edit_response(interaction, embed=self.paginator.page(self.index), view=self)
+
+    @ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    @traced("PaginatedView.previous")
+    async def previous(self, interaction: discord.Interaction, button: ui.Button):
+        await self.turn(interaction, self.index - 1)
+
+    @ui.button(label="1/1", style=discord.ButtonStyle.secondary, disabled=True)
+    async def position(self, interaction: discord.Interaction, button: ui.Button):
+        pass
+
+    @ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    @traced("PaginatedView.next")
+    async def next(self, interaction: discord.Interaction, button: ui.Button):
+        await self.turn(interaction, self.index + 1)
+
+    async def on_timeout(self):
+        if self.message is None:
+            return
+        try:
+            await self.message.edit(view=None)
+        except discord.HTTPException as e:
+            log.debug(f"Could not remove page buttons: {e}")
+
+
+async def send_paginated(interaction: discord.Interaction, paginator: Paginator, ephemeral: bool = False):
+    """Send the first page, with page buttons when there is more than one"""
+    if paginator.page_count == 1:
+        await respond(interaction, embed=paginator.page(0), ephemeral=ephemeral)
+        return
+    view = PaginatedView(paginator, interaction.user.id)
+    message = await respond(interaction, embed=paginator.page(0), view=view, ephemeral=ephemeral)
+    view.message = message or await interaction.original_response()
@@ -0,0 +1,229 @@
+"""
+LOA-expiry reminders and low-activity alerts, scheduled on a heap.
+
+Every bulk personnel pull (see sheets.fetch_roster) is diffed against the
+schedule: a member's alerts are only touched when their LOA end date or
+activity state changed, and members that left the roster are dropped. The
+runner sleeps until the earliest due time (or until the schedule changes)
+instead of re-checking everyone on an interval.
+
+    loa-soon:<name>   LOA_REMINDER_LEAD before the LOA ends
+    loa-end:<name>    the day the LOA ends
+    activity:<name>   in the 'Not Active' activity tier while not on LOA;
+                      repeated every ACTIVITY_REPEAT while it stays low
+
+`loa_days_left` counts whole days, so an LOA ends at midnight UTC that many
+days after the day of the pull, and consecutive pulls agree on the date.
+An alert that could not be delivered stays scheduled and is retried with
+a backoff. The first pull after alerts are turned on does not alert the
+whole inactive roster at once: those members' first alerts are spread over
+one ACTIVITY_REPEAT. The schedule and the alerts already sent are stored in
+one JSON file so nothing is lost or repeated across restarts.
+"""
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from activity_tiers import INACTIVE, activity_tier
+from script_models import PersonnelRecord
+
+log = logging.getLogger("pennybot.alerts")
+
+DAY = 86400
+LOA_REMINDER_LEAD = DAY          # remind this long before an LOA ends
+ACTIVITY_REPEAT = 7 * DAY        # re-alert a member whose activity stays low
+RETRY_BASE = 300                 # first retry of an undelivered alert, doubling each time
+RETRY_MAX = 6 * 3600
+
+
+def day_start(now: float) -> float:
+    return now - now % DAY
+
+
+class Alert:
+    __slots__ = ('key', 'kind', 'rp_name', 'due', 'detail', 'attempts', 'retry_at')
+
+    def __init__(self, key: str, kind: str, rp_name: str, due: float, detail: dict,
+                 attempts: int = 0, retry_at: Optional[float] = None):
+        self.key = key
+        self.kind = kind
+        self.rp_name = rp_name
+        self.due = due
+        self.detail = detail
+        self.attempts = attempts       # failed deliveries so far
+        self.retry_at = retry_at       # next delivery attempt after a failure
+
+    @property
+    def fires(self) -> float:
+        """When delivery is next attempted (`due` stays the date the alert is about)"""
+        return self.due if self.retry_at is None else self.retry_at
+
+    def to_dict(self) -> dict:
+        data = {'kind': self.kind, 'rp_name': self.rp_name, 'due': self.due, 'detail': self.detail}
+        if self.retry_at is not None:
+            data.update(attempts=self.attempts, retry_at=self.retry_at)
+        return data
+
+
+class AlertSchedule:
+    def __init__(self, path: str):
+        self.path = path
+        self.alerts: Dict[str, Alert] = {}
+        self.sent: Dict[str, float] = {}     # key -> due time of the alert already delivered
+        self._heap: List[Tuple[float, str]] = []   # (fires, key)
+        self.seeded = False                        # a roster has been applied since alerts were turned on
+        self.changed = asyncio.Event()
+        self.dirty = False
+
+    # ── heap ───────────────────────────────────────
+    def _schedule(self, alert: Alert):
+        current = self.alerts.get(alert.key)
+        if current and current.due == alert.due:
+            current.detail = alert.detail
+            return
+        if current is not None and current.retry_at is not None and current.retry_at > alert.due:
+            # Still failing to deliver: keep backing off
+            alert.attempts, alert.retry_at = current.attempts, current.retry_at
+        self.alerts[alert.key] = alert
+        heapq.heappush(self._heap, (alert.fires, alert.key))
+        self.dirty = True
+
+    def _cancel(self, key: str):
+        # The heap entry is skipped lazily once its key is gone
+        if self.alerts.pop(key, None) is not None:
+            self.dirty = True
+
+    def next_due(self) -> Optional[float]:
+        while self._heap:
+            due, key = self._heap[0]
+            alert = self.alerts.get(key)
+            if alert is not None and alert.fires == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float) -> List[Alert]:
+        due_alerts = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, key = heapq.heappop(self._heap)
+            due_alerts.append(self.alerts.pop(key))
+            self.dirty = True
+        return due_alerts
+
+    # ── roster diff ────────────────────────────────
+    def _desired(self, record: PersonnelRecord, now: float, seeding: bool) -> Dict[str, Alert]:
+        rp_name = record.rp_name
+        name = rp_name.casefold()
+        desired = {}
+        loa_days = record.loa_days_left
+        points = record.activity_points
+        if isinstance(loa_days, str):
+            # '#N/A' in the LOA column: whether the member is away is unknown, so no alerts
+            return desired
+        if loa_days > 0:
+            ends = day_start(now) + loa_days * DAY
+            detail = {'ends': ends, 'rank': record.rank, 'sheet': record.sheet}
+            desired[f"loa-soon:{name}"] = Alert(f"loa-soon:{name}", 'loa-soon', rp_name,
+                                                ends - LOA_REMINDER_LEAD, detail)
+            desired[f"loa-end:{name}"] = Alert(f"loa-end:{name}", 'loa-end', rp_name, ends, detail)
+        elif activity_tier(points) is INACTIVE:
+            key = f"activity:{name}"
+            last = self.sent.get(key)
+            if last is None and seeding:
+                # First pull: treat the member as alerted at a point in the last
+                # ACTIVITY_REPEAT (fixed per name), so first alerts are spread out
+                last = self.sent[key] = now - zlib.crc32(name.encode('utf-8')) % ACTIVITY_REPEAT
+            due = now if last is None else last + ACTIVITY_REPEAT
+            desired[key] = Alert(key, 'activity', rp_name, due,
+                                 {'points': points, 'rank': record.rank, 'sheet': record.sheet})
+        return desired
+
+    def apply_roster(self, records: List[PersonnelRecord]):
+        """Bring the schedule in line with a bulk personnel pull (roster listener)"""
+        now = time.time()
+        seeding = not self.seeded
+        desired: Dict[str, Alert] = {}
+        for record in records:
+            desired.update(self._desired(record, now, seeding))
+        if seeding:
+            self.seeded = True
+            self.dirty = True
+
+        before = len(self.alerts)
+        for key in [key for key in self.alerts if key not in desired]:
+            self._cancel(key)
+        for key, due in list(self.sent.items()):
+            alert = desired.get(key)
+            if alert is None:
+                # Condition cleared (LOA over, activity recovered, left the roster): forget it
+                del self.sent[key]
+                self.dirty = True
+            elif alert.kind != 'activity' and alert.due == due:
+                # Already delivered for this LOA end date
+                del desired[key]
+        for alert in desired.values():
+            self._schedule(alert)
+
+        if self.dirty:
+            log.info("⏰ Alert schedule updated", extra={'scheduled': len(self.alerts), 'before': before,
+                                                        'next_due': self.next_due()})
+            self.changed.set()
+
+    def retry(self, alert: Alert, now: float):
+        """Put an undelivered alert back, due again after a backoff"""
+        alert.attempts += 1
+        alert.retry_at = now + min(RETRY_MAX, RETRY_BASE * 2 ** (alert.attempts - 1))
+        self.alerts[alert.key] = alert
+        heapq.heappush(self._heap, (alert.retry_at, alert.key))
+        self.dirty = True
+
+    def mark_sent(self, alert: Alert):
+        self.sent[alert.key] = alert.due
+        if alert.kind == 'activity':
+            # Still low unless a later pull says otherwise
+            self._schedule(Alert(alert.key, alert.kind, alert.rp_name, alert.due + ACTIVITY_REPEAT, alert.detail))
+        self.dirty = True
+
+    # ── persistence ────────────────────────────────
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠️ Ignoring unreadable alert schedule: {e}")
+            return
+        self.sent = data.get('sent', {})
+        # Files written before the flag existed come from a schedule that was already running
+        self.seeded = data.get('seeded', True)
+        for key, alert in data.get('alerts', {}).items():
+            self._schedule(Alert(key, alert['kind'], alert['rp_name'], alert['due'], alert.get('detail', {}),
+                                 alert.get('attempts', 0), alert.get('retry_at')))
+        self.dirty = False
+        log.info(f"⏰ Loaded {len(self.alerts)} scheduled alert(s)", extra={'next_due': self.next_due()})
+
+    def _write_sync(self, text: str):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def save(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        text = json.dumps({'alerts': {key: alert.to_dict() for key, alert in self.alerts.items()},
+                           'sent': self.sent, 'seeded': self.seeded}, separators=(',', ':'))
+        await asyncio.to_thread(self._write_sync, text)
+
+    def upcoming(self, limit: int = 10) -> List[Alert]:
+        return heapq.nsmallest(limit, self.alerts.values(), key=lambda alert: alert.fires)
@@ -0,0 +1,143 @@
+"""
+Discord user ID <-> RP name index.
+
+The medal sheet is keyed by user ID and the personnel sheets by RP name. This
+index links the two from what members put in their nicknames, checked
+against the names on the personnel roster (the bulk `getAllPersonnel` pull),
+so `/profile @member` and the combined profile + medals view resolve without
+a name scan on the sheet.
+
+A nickname such as "[CPL] John Smith | 123" is reduced to candidate names
+(bracketed tags and "|" segments removed, a leading rank word dropped); the
+first candidate that is on the roster wins. Until a roster has been loaded
+the nickname's first segment, without tags, is used as is. A roster record that carries a
+`discordId` column is authoritative and overrides the nickname. The index is
+updated incrementally from member events and re-resolved whenever a new
+roster arrives.
+"""
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from script_models import PersonnelRecord
+
+_BRACKETED = re.compile(r"[\[({<].*?[\])}>]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(name: str) -> str:
+    return _SPACES.sub(" ", name).strip().casefold()
+
+
+def candidate_names(display_name: str) -> Iterator[str]:
+    """RP name candidates for a nickname, most specific first (distinct after normalize())"""
+    seen = set()
+    stripped = _BRACKETED.sub(" ", display_name)
+    for part in [display_name, stripped] + stripped.split("|"):
+        words = _SPACES.sub(" ", part).strip().split(" ")
+        # "Cpl. John Smith" -> "John Smith"
+        for candidate in (" ".join(words), " ".join(words[1:]) if len(words) > 2 else ""):
+            if candidate and normalize(candidate) not in seen:
+                seen.add(normalize(candidate))
+                yield candidate
+
+
+class PersonnelIndex:
+    def __init__(self):
+        self._roster: Dict[str, str] = {}       # normalised RP name -> RP name as on the sheet
+        self._pinned: Dict[int, str] = {}       # user ID -> normalised RP name from a discordId column
+        self._nicknames: Dict[int, str] = {}    # user ID -> display name last seen
+        self._by_user: Dict[int, str] = {}      # user ID -> normalised RP name
+        self._by_name: Dict[str, int] = {}      # normalised RP name -> user ID
+
+    # ── lookups ────────────────────────────────────
+    def rp_name(self, user_id: int) -> Optional[str]:
+        key = self._by_user.get(user_id)
+        if key is None:
+            return None
+        return self._roster.get(key) or self._unverified_name(user_id, key)
+
+    def user_id(self, rp_name: str) -> Optional[int]:
+        return self._by_name.get(normalize(rp_name))
+
+    def is_verified(self, user_id: int) -> bool:
+        """True when the linked name is on the roster"""
+        return self._by_user.get(user_id) in self._roster
+
+    def _unverified_name(self, user_id: int, key: str) -> str:
+        # Keep the member's own capitalisation for names the roster does not know yet
+        candidates = candidate_names(self._nicknames.get(user_id, ""))
+        return next((name for name in candidates if normalize(name) == key), key)
+
+    # ── updates ────────────────────────────────────
+    def _resolve(self, user_id: int) -> Optional[str]:
+        if user_id in self._pinned:
+            return self._pinned[user_id]
+        display_name = self._nicknames.get(user_id)
+        if not display_name:
+            return None
+        if not self._roster:
+            return normalize(_BRACKETED.sub(" ", display_name).split("|")[0]) or None
+        candidates = (normalize(name) for name in candidate_names(display_name))
+        return next((name for name in candidates if name in self._roster), None)
+
+    def _link(self, user_id: int, key: Optional[str]):
+        previous = self._by_user.pop(user_id, None)
+        if previous is not None and self._by_name.get(previous) == user_id:
+            del self._by_name[previous]
+        if key is None:
+            return
+        # The member who most recently claimed a name keeps it, unless the sheet pins it
+        holder = self._by_name.get(key)
+        if holder is not None and holder != user_id:
+            if self._pinned.get(holder) == key:
+                return
+            self._by_user.pop(holder, None)
+        self._by_user[user_id] = key
+        self._by_name[key] = user_id
+
+    def observe(self, user_id: int, display_name: str):
+        """Record a member's current display name (join, nickname change, interaction)"""
+        if self._nicknames.get(user_id) == display_name and user_id in self._by_user:
+            return
+        self._nicknames[user_id] = display_name
+        self._link(user_id, self._resolve(user_id))
+
+    def observe_all(self, members: Iterable) -> int:
+        for member in members:
+            self.observe(member.id, member.display_name)
+        return len(self._by_user)
+
+    def forget(self, user_id: int):
+        self._nicknames.pop(user_id, None)
+        self._link(user_id, None)
+
+    def load_roster(self, records: List[PersonnelRecord]):
+        """Replace the roster with a bulk personnel pull and re-resolve every member"""
+        self._roster = {normalize(r.rp_name): r.rp_name for r in records}
+        self._pinned = {}
+        for record in records:
+            try:
+                if record.discord_id:
+                    self._pinned[int(record.discord_id)] = normalize(record.rp_name)
+            except ValueError:
+                continue
+        self._by_user.clear()
+        self._by_name.clear()
+        for user_id in set(self._nicknames) | set(self._pinned):
+            self._link(user_id, self._resolve(user_id))
+
+    # ── snapshot ───────────────────────────────────
+    def to_snapshot(self) -> Dict[str, str]:
+        return {str(user_id): name for user_id, name in self._nicknames.items()}
+
+    def restore(self, data: Dict[str, str]):
+        """Load nicknames seen before the restart; members seen since startup win"""
+        for user_id, display_name in data.items():
+            if int(user_id) not in self._nicknames:
+                self._nicknames[int(user_id)] = display_name
+                self._link(int(user_id), self._resolve(int(user_id)))
+
+    def stats(self) -> dict:
+        verified = sum(1 for key in self._by_user.values() if key in self._roster)
+        return {'linked': len(self._by_user), 'verified': verified, 'roster': len(self._roster),
+                'pinned': len(self._pinned), 'members': len(self._nicknames)}
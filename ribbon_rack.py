@@ -0,0 +1,289 @@
+"""
+Ribbon-rack images for /showmedals.
+
+Each medal has a ribbon asset `<RIBBON_DIR>/<slug>.png` (slug: lowercase,
+non-alphanumerics replaced by '-'); medals without an asset get a striped
+placeholder derived from the name, so a rack can always be drawn. All
+ribbons for the current medal list are precomposed into one atlas image and
+a rack is assembled by copying tiles out of it, highest precedence (sheet
+column order) top-left, three to a row with a short top row centred.
+
+Finished racks are PNG bytes cached by a hash of the sorted medal set and
+the atlas version, first in an in-memory LRU and then on disk, so repeated
+views cost a lookup. Disk files of superseded atlas versions are deleted
+when the atlas changes, and the oldest racks once there are more than
+DISK_CACHE_SIZE of them. Pillow is optional: without it `AVAILABLE` is False and
+callers keep the text list.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw
+    AVAILABLE = True
+except ImportError:  # Pillow not installed; racks are disabled
+    Image = ImageDraw = None
+    AVAILABLE = False
+
+log = logging.getLogger("pennybot.ribbon_rack")
+
+RIBBON_WIDTH = 96
+RIBBON_HEIGHT = 28
+RIBBON_GAP = 3
+RIBBONS_PER_ROW = 3
+ATLAS_COLUMNS = 16
+MEMORY_CACHE_SIZE = 256
+DISK_CACHE_SIZE = 2000   # rack files; pruning drops a further tenth so it does not run on every write
+
+SLUG_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(medal_name: str) -> str:
+    return SLUG_PATTERN.sub('-', medal_name.casefold()).strip('-')
+
+
+def rack_key(medals: List[str], version: str) -> str:
+    digest = hashlib.sha1(version.encode())
+    for medal in sorted(set(medals)):
+        digest.update(b'\0' + medal.encode())
+    return digest.hexdigest()
+
+
+def _placeholder(medal_name: str) -> "Image.Image":
+    """Deterministic symmetric stripes coloured from the medal name"""
+    seed = hashlib.md5(medal_name.encode()).digest()
+    ribbon = Image.new('RGB', (RIBBON_WIDTH, RIBBON_HEIGHT), tuple(seed[0:3]))
+    draw = ImageDraw.Draw(ribbon)
+    half = RIBBON_WIDTH // 2
+    x = 0
+    for i in range(3, 15, 3):
+        width = 4 + seed[i] % 10
+        colour = tuple(seed[i:i + 3]) if i + 3 <= len(seed) else tuple(seed[:3])
+        draw.rectangle([x, 0, x + width - 1, RIBBON_HEIGHT], fill=colour)
+        draw.rectangle([RIBBON_WIDTH - x - width, 0, RIBBON_WIDTH - x - 1, RIBBON_HEIGHT], fill=colour)
+        x += width + seed[i + 1] % 6
+        if x >= half:
+            break
+    draw.rectangle([0, 0, RIBBON_WIDTH - 1, RIBBON_HEIGHT - 1], outline=(30, 30, 30))
+    return ribbon
+
+
+class RibbonAtlas:
+    """All ribbons of one medal list pasted into a single image, tile i at a fixed grid position"""
+
+    def __init__(self, image: "Image.Image", medals: List[str], version: str):
+        self.image = image
+        self.version = version
+        self.medals = tuple(medals)
+        self.index: Dict[str, int] = {medal: i for i, medal in enumerate(medals)}
+
+    @staticmethod
+    def tile_box(i: int) -> Tuple[int, int, int, int]:
+        x = (i % ATLAS_COLUMNS) * RIBBON_WIDTH
+        y = (i // ATLAS_COLUMNS) * RIBBON_HEIGHT
+        return x, y, x + RIBBON_WIDTH, y + RIBBON_HEIGHT
+
+    def tile(self, medal: str) -> "Image.Image":
+        i = self.index.get(medal)
+        if i is None:
+            return _placeholder(medal)
+        return self.image.crop(self.tile_box(i))
+
+
+class RibbonRackRenderer:
+    def __init__(self, asset_dir: str, cache_dir: str, cache_size: int = MEMORY_CACHE_SIZE,
+                 disk_cache_size: int = DISK_CACHE_SIZE):
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.disk_cache_size = disk_cache_size
+        self._disk_racks = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._atlas: Optional[RibbonAtlas] = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+
+    # ── atlas ──────────────────────────────────────
+    def _asset_path(self, medal: str) -> str:
+        return os.path.join(self.asset_dir, f"{slugify(medal)}.png")
+
+    def atlas_version(self, medals: List[str]) -> str:
+        """Changes when the medal list, its order or any asset file changes"""
+        digest = hashlib.sha1()
+        for medal in medals:
+            path = self._asset_path(medal)
+            mtime = os.path.getmtime(path) if os.path.exists(path) else 0
+            digest.update(f"{medal}\0{mtime}\0".encode())
+        return digest.hexdigest()[:16]
+
+    def _load_ribbon(self, medal: str) -> "Image.Image":
+        path = self._asset_path(medal)
+        if os.path.exists(path):
+            try:
+                with Image.open(path) as asset:
+                    return asset.convert('RGB').resize((RIBBON_WIDTH, RIBBON_HEIGHT))
+            except OSError as e:
+                log.warning(f"⚠️ Unreadable ribbon asset {path}: {e}")
+        return _placeholder(medal)
+
+    def atlas(self, precedence: List[str]) -> RibbonAtlas:
+        # Assets are only re-checked when the medal list changes (or after refresh())
+        if self._atlas and self._atlas.medals == tuple(precedence):
+            return self._atlas
+
+        version = self.atlas_version(precedence)
+        if self._atlas and self._atlas.version == version:
+            return self._atlas
+
+        path = os.path.join(self.cache_dir, f"atlas-{version}.png")
+        if os.path.exists(path):
+            with Image.open(path) as cached:
+                self._atlas = RibbonAtlas(cached.convert('RGB'), precedence, version)
+            self._prune(version)
+            return self._atlas
+
+        rows = max(1, -(-len(precedence) // ATLAS_COLUMNS))
+        image = Image.new('RGB', (ATLAS_COLUMNS * RIBBON_WIDTH, rows * RIBBON_HEIGHT))
+        for i, medal in enumerate(precedence):
+            image.paste(self._load_ribbon(medal), RibbonAtlas.tile_box(i)[:2])
+
+        self._write(path, image)
+        self._atlas = RibbonAtlas(image, precedence, version)
+        log.info(f"🎖️ Built ribbon atlas for {len(precedence)} medal(s)", extra={'version': version})
+        self._prune(version)
+        return self._atlas
+
+    def refresh(self):
+        """Pick up changed asset files on the next render"""
+        with self._lock:
+            self._atlas = None
+
+    # ── racks ──────────────────────────────────────
+    def render(self, medals: List[str], precedence: List[str]) -> bytes:
+        """PNG bytes of the rack for `medals`, ordered by `precedence` (safe to call from threads)"""
+        with self._lock:
+            return self._render(medals, precedence)
+
+    def _render(self, medals: List[str], precedence: List[str]) -> bytes:
+        atlas = self.atlas(precedence)
+        key = rack_key(medals, atlas.version)
+
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return cached
+
+        # The version in the name lets _prune find racks of superseded atlases
+        path = os.path.join(self.cache_dir, f"rack-{atlas.version}-{key}.png")
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.disk_hits += 1
+            os.utime(path)  # pruning goes by mtime, so reads count as use
+        except OSError:
+            data = self._compose(medals, atlas)
+            self._write(path, data)
+            self.renders += 1
+            self._disk_racks += 1
+            if self._disk_racks > self.disk_cache_size:
+                self._prune(atlas.version)
+
+        self._remember(key, data)
+        return data
+
+    def _compose(self, medals: List[str], atlas: RibbonAtlas) -> bytes:
+        ordered = sorted(set(medals), key=lambda m: (atlas.index.get(m, len(atlas.index)), m))
+        rows = [ordered[max(0, end - RIBBONS_PER_ROW):end]
+                for end in range(len(ordered), 0, -RIBBONS_PER_ROW)][::-1]
+        width = RIBBONS_PER_ROW * RIBBON_WIDTH + (RIBBONS_PER_ROW - 1) * RIBBON_GAP
+        height = len(rows) * RIBBON_HEIGHT + (len(rows) - 1) * RIBBON_GAP
+
+        rack = Image.new('RGBA', (width, max(height, RIBBON_HEIGHT)), (0, 0, 0, 0))
+        for row_number, row in enumerate(rows):
+            # The incomplete row is on top and centred, like a worn rack
+            row_width = len(row) * RIBBON_WIDTH + (len(row) - 1) * RIBBON_GAP
+            x = (width - row_width) // 2
+            y = row_number * (RIBBON_HEIGHT + RIBBON_GAP)
+            for medal in row:
+                rack.paste(atlas.tile(medal), (x, y))
+                x += RIBBON_WIDTH + RIBBON_GAP
+
+        buffer = io.BytesIO()
+        rack.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def _remember(self, key: str, data: bytes):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def _write(self, path: str, content):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        try:
+            if isinstance(content, bytes):
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+            else:
+                content.save(tmp_path, format='PNG')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning(f"⚠️ Could not write ribbon cache {path}: {e}")
+
+    def _prune(self, version: str):
+        """Delete files of other atlas versions, then the least recently used racks over the cap"""
+        try:
+            entries = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+
+        removed = 0
+        racks = []
+        for entry in entries:
+            if entry.name.startswith("rack-"):
+                if entry.name.startswith(f"rack-{version}-"):
+                    racks.append(entry)
+                    continue
+            elif not entry.name.startswith("atlas-") or entry.name == f"atlas-{version}.png":
+                continue
+            removed += self._remove(entry.path)
+
+        keep = self.disk_cache_size - self.disk_cache_size // 10
+        if len(racks) > self.disk_cache_size:
+            racks.sort(key=self._mtime)
+            for entry in racks[:len(racks) - keep]:
+                removed += self._remove(entry.path)
+            racks = racks[len(racks) - keep:]
+
+        self._disk_racks = len(racks)
+        if removed:
+            log.info(f"🧹 Pruned {removed} ribbon cache file(s)", extra={'version': version, 'racks': len(racks)})
+
+    @staticmethod
+    def _mtime(entry: os.DirEntry) -> float:
+        try:
+            return entry.stat().st_mtime
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self) -> dict:
+        return {'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits, 'renders': self.renders,
+                'cached': len(self._memory)}
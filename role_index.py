@@ -0,0 +1,86 @@
+"""
+Role -> member index for the roles the hourly sweep cares about.
+
+`Role.members` scans the whole member cache every time it is read, so the
+index is built with one pass over a chunked guild and then kept current from
+member join/update/remove events. The sweep asks for the holders of its
+roles and only looks at those members, making its cost proportional to the
+members that can need a change rather than to the size of the guild.
+
+Sets restored from a warm-start snapshot are kept apart as provisional: they
+are only used when a guild cannot be chunked, and are dropped as soon as a
+real index is built.
+"""
+from typing import Dict, Iterable, Set
+
+import discord
+
+
+class RoleIndex:
+    def __init__(self, role_ids: Iterable[int]):
+        self.role_ids = frozenset(role_ids)
+        self._holders: Dict[int, Dict[int, Set[int]]] = {}
+        self._provisional: Dict[int, Dict[int, Set[int]]] = {}
+
+    def is_built(self, guild_id: int) -> bool:
+        return guild_id in self._holders
+
+    def build(self, guild: discord.Guild):
+        holders = {role_id: set() for role_id in self.role_ids}
+        for member in guild.members:
+            for role in member.roles:
+                if role.id in holders:
+                    holders[role.id].add(member.id)
+        self._holders[guild.id] = holders
+        self._provisional.pop(guild.id, None)
+
+    def invalidate(self, guild_id: int):
+        """Forget a guild whose cache was replaced (reconnect, re-join)"""
+        self._holders.pop(guild_id, None)
+
+    def update(self, member: discord.Member):
+        holders = self._holders.get(member.guild.id)
+        if holders is None:
+            return
+        held = {role.id for role in member.roles}
+        for role_id, members in holders.items():
+            if role_id in held:
+                members.add(member.id)
+            else:
+                members.discard(member.id)
+
+    def remove(self, guild_id: int, member_id: int):
+        for members in self._holders.get(guild_id, {}).values():
+            members.discard(member_id)
+
+    def holders(self, guild_id: int, role_ids: Iterable[int]) -> Set[int]:
+        """Union of the members holding any of role_ids"""
+        holders = self._holders.get(guild_id, {})
+        candidates = set()
+        for role_id in role_ids:
+            candidates |= holders.get(role_id, set())
+        return candidates
+
+    def provisional_holders(self, guild_id: int, role_ids: Iterable[int]) -> Set[int]:
+        """Like holders(), from snapshot data; empty if none was restored"""
+        holders = self._provisional.get(guild_id, {})
+        candidates = set()
+        for role_id in role_ids:
+            candidates |= holders.get(role_id, set())
+        return candidates
+
+    def to_snapshot(self) -> Dict[str, Dict[str, list]]:
+        guilds = {**self._provisional, **self._holders}
+        return {str(guild_id): {str(role_id): sorted(members) for role_id, members in holders.items()}
+                for guild_id, holders in guilds.items()}
+
+    def restore(self, data: Dict[str, Dict[str, list]]):
+        for guild_id, holders in data.items():
+            if int(guild_id) not in self._holders:
+                self._provisional[int(guild_id)] = {
+                    int(role_id): set(members) for role_id, members in holders.items()
+                    if int(role_id) in self.role_ids
+                }
+
+    def size(self, guild_id: int) -> Dict[int, int]:
+        return {role_id: len(members) for role_id, members in self._holders.get(guild_id, {}).items()}
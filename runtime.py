@@ -0,0 +1,181 @@
+"""
+Runtime state shared by the bot and its extensions.
+
+Extensions (cogs/*) are reloaded in place by `/reload`; anything that must
+outlive a reload — caches, registries, stores and background tasks — lives
+here instead, together with the guild helpers that need the bot instance.
+`bot` is set by bot.py before any extension is loaded.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+
+import footprint
+import ribbon_rack
+import sampling_profiler
+from approvals import ApprovalRegistry
+from config import (APPS_SCRIPT_WEB_APP_URL, PERSONNEL_SCRIPT_URL, DATA_DIR, GUILD_ALLOWLIST, SWEEP_ROLE_IDS,
+                    PERSONNEL_ALERT_CHANNEL_ID, PERSONNEL_ALERT_DM, bot_profile)
+from discharge_jobs import DischargeJobStore
+from loop_monitor import LoopMonitor
+from pagination import PageCache
+from personnel_alerts import AlertSchedule
+from personnel_index import PersonnelIndex
+from role_index import RoleIndex
+from sheets import sheet_cache, roster_listeners
+from snapshot import SnapshotStore
+
+log = logging.getLogger("pennybot")
+
+bot: Optional[discord.Client] = None
+
+footprint_recorder = footprint.FootprintRecorder(os.path.join(DATA_DIR, "footprint.json"), bot_profile)
+
+# Sweep-role holders, kept current by the roles extension's member events
+role_index = RoleIndex(SWEEP_ROLE_IDS)
+last_role_sweep: Optional[float] = None   # monotonic start of the last sweep; reloads keep the cadence
+sweep_results: Dict[str, dict] = {}       # guild ID -> summary of its last sweep
+
+# Discord user ID <-> RP name, from nicknames and the personnel roster
+personnel_index = PersonnelIndex()
+roster_listeners.append(personnel_index.load_roster)
+
+# LOA-expiry and low-activity alerts, rescheduled from every roster pull
+personnel_alerts = AlertSchedule(os.path.join(DATA_DIR, "personnel_alerts.json"))
+alerts_enabled = bool(PERSONNEL_SCRIPT_URL and (PERSONNEL_ALERT_CHANNEL_ID or PERSONNEL_ALERT_DM))
+if alerts_enabled:
+    roster_listeners.append(personnel_alerts.apply_roster)
+
+# One decision per request across every approval view (see approvals.py)
+approvals = ApprovalRegistry()
+
+discharge_jobs = DischargeJobStore(os.path.join(DATA_DIR, "discharge_jobs"))
+
+# Event loop lag and blocking callbacks, watched from its own thread (LOOP_MONITOR=0 disables it)
+loop_monitor = LoopMonitor(threshold=float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100")) / 1000)
+
+# Off unless an admin runs /profiler; captures are kept in DATA_DIR/profiles
+profiler = sampling_profiler.SamplingProfiler(os.path.join(DATA_DIR, "profiles"))
+
+# Built pages of the list-style commands, per query (see pagination.py)
+page_cache = PageCache()
+
+# Ribbon racks need Pillow; without it (or with RIBBON_RACKS=0) /showmedals stays text-only
+ribbon_renderer = None
+if ribbon_rack.AVAILABLE and os.getenv("RIBBON_RACKS", "1") != "0":
+    ribbon_renderer = ribbon_rack.RibbonRackRenderer(os.getenv("RIBBON_DIR", "ribbons"),
+                                                     os.path.join(DATA_DIR, "ribbon_cache"))
+
+# ────────────────────────────────────────────────
+#   Warm-start snapshot
+# ────────────────────────────────────────────────
+snapshots = SnapshotStore(os.path.join(DATA_DIR, "snapshot.json"))
+
+def _restore_sweep_results(data: dict, saved_at: float):
+    global last_role_sweep
+    sweep_results.update(data)
+    if sweep_results and last_role_sweep is None:
+        # Carry the hourly cadence over the restart instead of sweeping again after 2 minutes
+        latest = max(result['at'] for result in sweep_results.values())
+        last_role_sweep = time.monotonic() - (time.time() - latest)
+
+snapshots.register(
+    'sheet_cache', sheet_cache.to_snapshot, lambda data, saved_at: sheet_cache.restore(data),
+    max_age=24 * 3600, fingerprint=f"{APPS_SCRIPT_WEB_APP_URL}|{PERSONNEL_SCRIPT_URL}"
+)
+snapshots.register(
+    'role_index', role_index.to_snapshot, lambda data, saved_at: role_index.restore(data),
+    max_age=6 * 3600, fingerprint=",".join(str(role_id) for role_id in sorted(SWEEP_ROLE_IDS))
+)
+
+def _restore_personnel_index(data: dict, saved_at: float):
+    personnel_index.restore(data)
+    if sheet_cache.roster:
+        personnel_index.load_roster(sheet_cache.roster[0])
+
+# Registered after 'sheet_cache' so a restored roster is already there
+snapshots.register('personnel_index', personnel_index.to_snapshot, _restore_personnel_index, max_age=24 * 3600)
+snapshots.register('sweep_results', lambda: sweep_results, _restore_sweep_results, max_age=2 * 3600)
+
+# ────────────────────────────────────────────────
+#   Background tasks
+# ────────────────────────────────────────────────
+background_tasks: Dict[str, asyncio.Task] = {}
+
+def start_background_task(name: str, coro_fn):
+    """Start a background task once; on_ready fires again after reconnects"""
+    task = background_tasks.get(name)
+    if task and not task.done():
+        return
+    background_tasks[name] = asyncio.get_running_loop().create_task(coro_fn())
+
+def stop_background_task(name: str):
+    """Cancel a task started by an extension that is being unloaded"""
+    task = background_tasks.pop(name, None)
+    if task and not task.done():
+        task.cancel()
+
+# ────────────────────────────────────────────────
+#   Guild helpers
+# ────────────────────────────────────────────────
+def guild_allowed(guild_id: Optional[int]) -> bool:
+    return GUILD_ALLOWLIST is None or guild_id is None or guild_id in GUILD_ALLOWLIST
+
+def served_guilds() -> List[discord.Guild]:
+    return [guild for guild in bot.guilds if guild_allowed(guild.id)]
+
+def cached_member_count() -> int:
+    return sum(len(guild.members) for guild in bot.guilds)
+
+async def ensure_chunked(guild: discord.Guild):
+    """Download the member list on first use when the profile does not chunk at startup"""
+    if bot_profile.member_cache and not guild.chunked:
+        started = time.monotonic()
+        await guild.chunk()
+        log.info(f"👥 Chunked {guild.name} on demand ({guild.member_count} members)",
+                 extra={'guild': guild.id, 'ms': round((time.monotonic() - started) * 1000)})
+
+async def resolve_member(guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    """Cached member, or a REST lookup when the cache cannot be trusted to be complete"""
+    member = guild.get_member(user_id)
+    if member or (bot_profile.member_cache and guild.chunked):
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.NotFound:
+        return None
+
+MEMBER_QUERY_LIMIT = 100   # user IDs per gateway member request
+
+async def resolve_members(guild: discord.Guild, user_ids: List[int]) -> Tuple[Dict[int, discord.Member], Set[int]]:
+    """
+    Batch form of resolve_member: ({user ID: member} for those in the server,
+    IDs whose lookup failed). Uncached IDs are asked for over the gateway,
+    up to 100 per request, instead of one REST fetch each.
+    """
+    members = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member:
+            members[user_id] = member
+        else:
+            missing.append(user_id)
+    failed = set()
+    if not missing or (bot_profile.member_cache and guild.chunked):
+        return members, failed
+
+    for start in range(0, len(missing), MEMBER_QUERY_LIMIT):
+        batch = missing[start:start + MEMBER_QUERY_LIMIT]
+        try:
+            found = await guild.query_members(user_ids=batch, limit=len(batch), cache=bot_profile.member_cache)
+        except (asyncio.TimeoutError, discord.ClientException) as e:
+            log.warning(f"⚠️ Member lookup failed for {len(batch)} user(s): {e!r}", extra={'guild': guild.id})
+            failed.update(batch)
+            continue
+        members.update((member.id, member) for member in found)
+    return members, failed
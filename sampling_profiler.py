@@ -0,0 +1,193 @@
+"""
+On-demand sampling profiler for the running bot.
+
+Nothing is installed while the profiler is off: no trace hooks, no threads.
+A capture runs two samplers for a fixed number of seconds:
+
+  * a daemon thread that reads the event loop thread's Python stack with
+    sys._current_frames() every `interval` seconds - where the loop spends
+    CPU (self time per function) and how busy it is;
+  * a task on the loop that walks every pending task's await chain
+    (cr_await) every `task_interval` seconds - which coroutines are waiting,
+    and on what, across command handlers, Apps Script calls and the sweep.
+
+Both are written as collapsed stacks ("outer;inner;leaf count", the format
+flamegraph.pl and speedscope read) to one file, and summarised as top self,
+cumulative and await time.
+"""
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Counter, List, Optional, Tuple
+
+INTERVAL = 0.005        # loop-thread stack samples (seconds)
+TASK_INTERVAL = 0.02    # task await-chain samples (seconds)
+MAX_DEPTH = 64
+
+# Leaf frames that mean the loop is waiting for I/O rather than running Python
+IDLE_LEAVES = {'select', 'poll', 'epoll'}
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def thread_stack(frame) -> Tuple[str, ...]:
+    """Outermost-first labels of a thread's stack"""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def await_chain(task: asyncio.Task) -> Tuple[str, ...]:
+    """Outermost-first labels of the coroutines a task is suspended in, ending with what it awaits"""
+    labels = []
+    awaitable = task.get_coro()
+    while awaitable is not None and len(labels) < MAX_DEPTH:
+        code = getattr(awaitable, 'cr_code', None) or getattr(awaitable, 'gi_code', None) \
+            or getattr(awaitable, 'ag_code', None)
+        if code is None:
+            # A future, sleep or other leaf the innermost coroutine is parked on
+            labels.append(f"<{type(awaitable).__name__}>")
+            break
+        labels.append(frame_label(code))
+        awaitable = getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'gi_yieldfrom', None) \
+            or getattr(awaitable, 'ag_await', None)
+    return tuple(labels)
+
+
+class Capture:
+    """Samples collected by one profiling run"""
+
+    def __init__(self, interval: float, task_interval: float):
+        self.interval = interval
+        self.task_interval = task_interval
+        self.cpu: Counter[Tuple[str, ...]] = collections.Counter()
+        self.awaits: Counter[Tuple[str, ...]] = collections.Counter()
+        self.cpu_samples = 0
+        self.task_samples = 0
+        self.started = time.time()
+        self.duration = 0.0
+
+    def busy_samples(self) -> int:
+        return sum(count for stack, count in self.cpu.items()
+                   if stack and stack[-1].split(" ", 1)[0] not in IDLE_LEAVES)
+
+    def top_self(self, limit: int = 10) -> List[Tuple[str, int]]:
+        counts = collections.Counter()
+        for stack, count in self.cpu.items():
+            if stack and stack[-1].split(" ", 1)[0] not in IDLE_LEAVES:
+                counts[stack[-1]] += count
+        return counts.most_common(limit)
+
+    def top_cumulative(self, limit: int = 10) -> List[Tuple[str, int]]:
+        counts = collections.Counter()
+        for stack, count in self.cpu.items():
+            if stack and stack[-1].split(" ", 1)[0] not in IDLE_LEAVES:
+                for label in set(stack):
+                    counts[label] += count
+        return counts.most_common(limit)
+
+    def top_awaiting(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Coroutines by time spent suspended anywhere below them (per-coroutine wall time)"""
+        counts = collections.Counter()
+        for chain, count in self.awaits.items():
+            for label in set(chain):
+                if not label.startswith("<"):
+                    counts[label] += count
+        return counts.most_common(limit)
+
+    def top_await_sites(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Innermost coroutine and what it is parked on"""
+        counts = collections.Counter()
+        for chain, count in self.awaits.items():
+            if len(chain) >= 2:
+                counts[f"{chain[-2]} -> {chain[-1]}"] += count
+        return counts.most_common(limit)
+
+    def collapsed(self) -> str:
+        lines = [f"# pennybot profile started {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(self.started))} UTC, "
+                 f"{self.duration:.1f}s, loop samples every {self.interval * 1000:g} ms, "
+                 f"task samples every {self.task_interval * 1000:g} ms"]
+        lines += [f"cpu;{';'.join(stack)} {count}" for stack, count in self.cpu.most_common()]
+        lines += [f"await;{';'.join(chain)} {count}" for chain, count in self.awaits.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def summary(self, limit: int = 8) -> str:
+        busy = self.busy_samples()
+        # Samples drift from the nominal interval when the loop holds the GIL; scale by what was taken
+        cpu_ms = lambda n: f"{n * self.duration * 1000 / max(self.cpu_samples, 1):,.0f} ms"
+        wait_ms = lambda n: f"{n * self.duration * 1000 / max(self.task_samples, 1):,.0f} ms"
+        sections = [
+            f"{self.duration:.1f}s • loop busy {100 * busy / max(self.cpu_samples, 1):.0f}% "
+            f"({self.cpu_samples} loop samples, {self.task_samples} task samples)",
+            "Self time (loop CPU):",
+            *[f"  {cpu_ms(n):>9}  {label}" for label, n in self.top_self(limit)],
+            "Cumulative (loop CPU):",
+            *[f"  {cpu_ms(n):>9}  {label}" for label, n in self.top_cumulative(limit)],
+            "Coroutines (time suspended, summed over tasks):",
+            *[f"  {wait_ms(n):>9}  {label}" for label, n in self.top_awaiting(limit)],
+            "Await sites:",
+            *[f"  {wait_ms(n):>9}  {label}" for label, n in self.top_await_sites(limit)],
+        ]
+        return "\n".join(sections)
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir: str, interval: float = INTERVAL, task_interval: float = TASK_INTERVAL):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.task_interval = task_interval
+        self.active: Optional[Capture] = None
+
+    def _sample_thread(self, capture: Capture, thread_id: int, stop: threading.Event):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                capture.cpu[thread_stack(frame)] += 1
+                capture.cpu_samples += 1
+
+    async def _sample_tasks(self, capture: Capture, stop: asyncio.Event, caller: Optional[asyncio.Task]):
+        own = {asyncio.current_task(), caller}
+        while not stop.is_set():
+            for task in asyncio.all_tasks():
+                if task not in own and not task.done():
+                    capture.awaits[await_chain(task)] += 1
+            capture.task_samples += 1
+            await asyncio.sleep(self.task_interval)
+
+    async def capture(self, seconds: float) -> Capture:
+        """Sample for `seconds`; raises RuntimeError if a capture is already running"""
+        if self.active:
+            raise RuntimeError("A profile is already being captured")
+        capture = self.active = Capture(self.interval, self.task_interval)
+        thread_stop = threading.Event()
+        task_stop = asyncio.Event()
+        sampler = threading.Thread(target=self._sample_thread, name="profiler",
+                                   args=(capture, threading.get_ident(), thread_stop), daemon=True)
+        started = time.perf_counter()
+        sampler.start()
+        task_sampler = asyncio.get_running_loop().create_task(self._sample_tasks(capture, task_stop, asyncio.current_task()))
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            task_stop.set()
+            thread_stop.set()
+            await task_sampler
+            await asyncio.to_thread(sampler.join)
+            capture.duration = time.perf_counter() - started
+            self.active = None
+        return capture
+
+    def write(self, capture: Capture) -> str:
+        """Write the collapsed stacks; returns the file path"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S.txt", time.gmtime(capture.started)))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(capture.collapsed())
+        return path
@@ -0,0 +1,282 @@
+"""
+Typed response models for the Apps Script web apps.
+
+Each model checks one function's `success: true` payload and keeps only the
+fields the bot uses, in `__slots__` objects instead of per-record dicts.
+Strings that repeat across a payload (medal names, ranks, sheet names,
+SeaDads) are interned, so a roster or a bulk medal pull holds one copy of
+each. Anything that does not match the expected shape raises `SchemaError`;
+`AppsScriptClient.call(..., model=...)` turns that into a logged failure
+and None, the same as a failed request.
+
+Loosely typed sheet cells are tolerated where the bot always did: a blank
+or missing number counts as 0 and numbers in text columns are read as text.
+Personnel numbers the sheet shows as text (`#N/A`, `#REF!`) stay text, with
+a warning, and a roster keeps its other records when one is malformed.
+
+    medal_types = await apps_script.call('getAllMedalTypes', model=MedalList)
+    if medal_types is not None:
+        medal_types.medals   # List[str]
+
+`to_dict()` gives back the script's own JSON shape for snapshots, and
+`decode()` reads it again, so snapshots written before these models load
+unchanged.
+"""
+import logging
+from sys import intern
+from typing import Dict, List, Optional, Tuple, Union
+
+log = logging.getLogger("pennybot.script_models")
+
+_warned = set()   # (key, text) pairs already logged, so each pull does not repeat them
+
+
+class SchemaError(ValueError):
+    """A script response did not have the expected shape"""
+
+
+def _field(data: dict, key: str, kind: type, default=None):
+    value = data.get(key, default)
+    if not isinstance(value, kind):
+        raise SchemaError(f"'{key}' should be {kind.__name__}, got {type(value).__name__}")
+    return value
+
+
+def _name(value) -> str:
+    if type(value) is not str:
+        raise SchemaError(f"expected a name, got {type(value).__name__}")
+    return intern(value)
+
+
+def _names(data: dict, key: str) -> List[str]:
+    return [_name(value) for value in _field(data, key, list, [])]
+
+
+def _number(data: dict, key: str):
+    value = data.get(key)
+    if type(value) is int or type(value) is float:  # not bool
+        return value
+    return _loose_number(key, value)
+
+
+def _loose_number(key: str, value):
+    if value is None or value == "":
+        return 0
+    if isinstance(value, str):
+        try:
+            return float(value) if "." in value else int(value)
+        except ValueError:
+            pass
+    raise SchemaError(f"'{key}' should be a number, got {value!r}")
+
+
+def _display_number(data: dict, key: str) -> Union[int, float, str]:
+    """A number the bot only shows or compares; sheet error text is kept for display"""
+    value = data.get(key)
+    if type(value) is int or type(value) is float:
+        return value
+    try:
+        return _loose_number(key, value)
+    except SchemaError:
+        if not isinstance(value, str):
+            raise
+    value = intern(value.strip())
+    if (key, value) not in _warned:
+        _warned.add((key, value))
+        log.warning(f"⚠️ Non-numeric '{key}' {value!r} in personnel data; shown as text")
+    return value
+
+
+def _text(data: dict, key: str, default: Optional[str]) -> Optional[str]:
+    value = data.get(key)
+    if type(value) is str and value:
+        return value
+    return _loose_text(key, value, default)
+
+
+def _loose_text(key: str, value, default: Optional[str]) -> Optional[str]:
+    if value is None or value == "":
+        return default
+    if isinstance(value, (dict, list, bool)):
+        raise SchemaError(f"'{key}' should be text, got {type(value).__name__}")
+    return str(value)
+
+
+# ────────────────────────────────────────────────
+#   Medals
+# ────────────────────────────────────────────────
+class MedalList:
+    """getAllMedalTypes -> {'medals': [name, ...]} (sheet column order)"""
+    __slots__ = ('medals',)
+
+    def __init__(self, medals: List[str]):
+        self.medals = medals
+
+    @classmethod
+    def decode(cls, data: dict) -> "MedalList":
+        return cls(_names(data, 'medals'))
+
+
+class UserMedals(MedalList):
+    """getUserMedals -> {'medals': [name, ...]} (the medals one user holds)"""
+    __slots__ = ()
+
+
+class UsersMedals:
+    """getUsersMedals -> {'users': {user ID: [name, ...]}}"""
+    __slots__ = ('users',)
+
+    def __init__(self, users: Dict[str, List[str]]):
+        self.users = users
+
+    @classmethod
+    def decode(cls, data: dict) -> "UsersMedals":
+        users = _field(data, 'users', dict, {})
+        return cls({str(user_id): [_name(medal) for medal in _field(users, user_id, list)] for user_id in users})
+
+
+class MedalStats:
+    """getMedalStats -> {'data': {'totalUsers', 'totalMedalTypes', 'medalDistribution', 'mostAwarded'}}"""
+    __slots__ = ('total_users', 'total_medal_types', 'distribution', 'most_awarded')
+
+    def __init__(self, total_users: int, total_medal_types: int, distribution: Dict[str, int],
+                 most_awarded: Optional[Tuple[str, int]]):
+        self.total_users = total_users
+        self.total_medal_types = total_medal_types
+        self.distribution = distribution
+        self.most_awarded = most_awarded
+
+    @classmethod
+    def decode(cls, data: dict) -> "MedalStats":
+        data = _field(data, 'data', dict, {})
+        distribution = _field(data, 'medalDistribution', dict, {})
+        distribution = {_name(medal): count if type(count) is int else _loose_number(medal, count)
+                        for medal, count in distribution.items()}
+        most_awarded = data.get('mostAwarded')
+        if most_awarded is not None:
+            if not isinstance(most_awarded, dict):
+                raise SchemaError(f"'mostAwarded' should be dict, got {type(most_awarded).__name__}")
+            most_awarded = (_name(most_awarded.get('name')), _number(most_awarded, 'count'))
+        return cls(_number(data, 'totalUsers'), _number(data, 'totalMedalTypes'), distribution, most_awarded)
+
+
+class MedalMatrixPage:
+    """getMedalMatrix -> {'medals': [...], 'rows': [{'userId', 'medals'}, ...], 'total'} (one page of rows)"""
+    __slots__ = ('medals', 'rows', 'total')
+
+    def __init__(self, medals: List[str], rows: List[Tuple[str, List[str]]], total: int):
+        self.medals = medals
+        self.rows = rows
+        self.total = total
+
+    @classmethod
+    def decode(cls, data: dict) -> "MedalMatrixPage":
+        rows = []
+        for row in _field(data, 'rows', list, []):
+            if not isinstance(row, dict):
+                raise SchemaError(f"matrix row should be dict, got {type(row).__name__}")
+            user_id = _text(row, 'userId', None)
+            if user_id is None:
+                raise SchemaError("matrix row without 'userId'")
+            rows.append((user_id, _names(row, 'medals')))
+        return cls(_names(data, 'medals'), rows, _number(data, 'total'))
+
+
+# ────────────────────────────────────────────────
+#   Personnel
+# ────────────────────────────────────────────────
+class PersonnelRecord:
+    """
+    One row of a personnel sheet (findPersonnel / getAllPersonnel).
+    activity_points, days_enlisted and loa_days_left are str when the cell
+    holds text such as '#N/A'.
+    """
+    __slots__ = ('rp_name', 'rank', 'activity_points', 'date_of_enlistment', 'days_enlisted',
+                 'seadad', 'loa_days_left', 'sheet', 'discord_id')
+
+    def __init__(self, rp_name: str, rank: str = "N/A", activity_points: Union[float, str] = 0,
+                 date_of_enlistment: str = "Unknown", days_enlisted: Union[int, str] = 0, seadad: str = "None",
+                 loa_days_left: Union[int, str] = 0, sheet: str = "Unknown", discord_id: Optional[str] = None):
+        self.rp_name = rp_name
+        self.rank = rank
+        self.activity_points = activity_points
+        self.date_of_enlistment = date_of_enlistment
+        self.days_enlisted = days_enlisted
+        self.seadad = seadad
+        self.loa_days_left = loa_days_left
+        self.sheet = sheet
+        self.discord_id = discord_id
+
+    @classmethod
+    def decode(cls, data, sheet: Optional[str] = None) -> "PersonnelRecord":
+        if not isinstance(data, dict):
+            raise SchemaError(f"personnel record should be dict, got {type(data).__name__}")
+        rp_name = _text(data, 'rpName', None)
+        if rp_name is None:
+            raise SchemaError("personnel record without 'rpName'")
+        return cls(
+            rp_name,
+            intern(_text(data, 'rank', "N/A")),
+            _display_number(data, 'activityPoints'),
+            _text(data, 'dateOfEnlistment', "Unknown"),
+            _display_number(data, 'daysEnlisted'),
+            intern(_text(data, 'seadad', "None")),
+            _display_number(data, 'loaDaysLeft'),
+            intern(_text(data, 'sheet', sheet or "Unknown")),
+            _text(data, 'discordId', None),
+        )
+
+    def to_dict(self) -> dict:
+        data = {'rpName': self.rp_name, 'rank': self.rank, 'activityPoints': self.activity_points,
+                'dateOfEnlistment': self.date_of_enlistment, 'daysEnlisted': self.days_enlisted,
+                'seadad': self.seadad, 'loaDaysLeft': self.loa_days_left, 'sheet': self.sheet}
+        if self.discord_id is not None:
+            data['discordId'] = self.discord_id
+        return data
+
+
+class PersonnelLookup:
+    """findPersonnel -> {'found': bool, 'personnel': {...}, 'sheet': name}"""
+    __slots__ = ('found', 'record')
+
+    def __init__(self, found: bool, record: Optional[PersonnelRecord] = None):
+        self.found = found
+        self.record = record
+
+    @classmethod
+    def decode(cls, data: dict) -> "PersonnelLookup":
+        if not _field(data, 'found', bool, False):
+            return cls(False)
+        return cls(True, PersonnelRecord.decode(data.get('personnel'), sheet=_text(data, 'sheet', None)))
+
+    def to_dict(self) -> dict:
+        if self.record is None:
+            return {'success': True, 'found': False}
+        return {'success': True, 'found': True, 'personnel': self.record.to_dict(), 'sheet': self.record.sheet}
+
+
+class Roster:
+    """getAllPersonnel -> {'personnel': [{...}, ...]} (malformed records are skipped and counted)"""
+    __slots__ = ('records', 'skipped')
+
+    def __init__(self, records: List[PersonnelRecord], skipped: int = 0):
+        self.records = records
+        self.skipped = skipped
+
+    @classmethod
+    def decode(cls, data: dict) -> "Roster":
+        records = []
+        skipped = 0
+        first_error = None
+        for record in _field(data, 'personnel', list, []):
+            # Blank sheet rows come through without a name and are skipped, as they always were
+            if isinstance(record, dict) and record.get('rpName') in (None, ""):
+                continue
+            try:
+                records.append(PersonnelRecord.decode(record))
+            except SchemaError as e:
+                skipped += 1
+                first_error = first_error or e
+        if skipped:
+            log.warning(f"⚠️ Skipped {skipped} malformed personnel record(s), first: {first_error}")
+        return cls(records, skipped)
@@ -0,0 +1,162 @@
+"""
+Read cache for Google Sheets data.
+
+Holds the medal type list, per-user medal lists (the user x medal matrix,
+filled row by row and capped at the USER_MEDALS_SIZE most recently used
+users), personnel lookups and the personnel roster, each with the wall-clock time it
+was fetched. Entries younger than their TTL are fresh; older ones are still
+returned (stale-while-revalidate) so the caller can answer immediately and
+refresh in the background. Writes that reach the sheet through the write
+queue are applied to the cached copies, so the cache never lags the bot's
+own changes. `medal_version` changes whenever the cached medal data does,
+for caches built on top of it (see pagination.py). Personnel entries are
+the typed models from script_models.py; the whole cache can be dumped to
+and restored from a snapshot, where they are stored in the script's JSON
+shape.
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from script_models import PersonnelLookup, PersonnelRecord, Roster, SchemaError
+
+log = logging.getLogger("pennybot.sheet_cache")
+
+MEDAL_TTL = 600        # seconds before medal data is refreshed in the background
+PERSONNEL_TTL = 600    # same for personnel lookups
+USER_MEDALS_SIZE = 5000  # users whose medal rows are kept (and snapshotted)
+
+Entry = Tuple[object, float]
+
+
+class SheetCache:
+    def __init__(self, medal_ttl: float = MEDAL_TTL, personnel_ttl: float = PERSONNEL_TTL,
+                 user_medals_size: int = USER_MEDALS_SIZE):
+        self.medal_ttl = medal_ttl
+        self.personnel_ttl = personnel_ttl
+        self.user_medals_size = user_medals_size
+        self.medal_types: Optional[Entry] = None
+        self.user_medals: "OrderedDict[str, Entry]" = OrderedDict()
+        self.personnel: Dict[str, Entry] = {}
+        self.roster: Optional[Entry] = None
+        self._roster_by_name: Dict[str, PersonnelRecord] = {}
+        self.medal_version = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _lookup(self, entry: Optional[Entry], ttl: float) -> Tuple[Optional[object], bool]:
+        """(value, fresh); value is None on a miss"""
+        if entry is None:
+            self.misses += 1
+            return None, False
+        value, fetched = entry
+        fresh = time.time() - fetched < ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return value, fresh
+
+    # ── medals ─────────────────────────────────────
+    def get_medal_types(self) -> Tuple[Optional[List[str]], bool]:
+        return self._lookup(self.medal_types, self.medal_ttl)
+
+    def put_medal_types(self, medal_types: List[str]):
+        self.medal_types = (list(medal_types), time.time())
+        self.medal_version += 1
+
+    def get_user_medals(self, user_id: str) -> Tuple[Optional[List[str]], bool]:
+        entry = self.user_medals.get(user_id)
+        if entry is not None:
+            self.user_medals.move_to_end(user_id)
+        return self._lookup(entry, self.medal_ttl)
+
+    def put_user_medals(self, user_id: str, medals: List[str]):
+        self.user_medals[user_id] = (list(medals), time.time())
+        self.user_medals.move_to_end(user_id)
+        self._trim_user_medals()
+
+    def _trim_user_medals(self):
+        while len(self.user_medals) > self.user_medals_size:
+            self.user_medals.popitem(last=False)
+
+    def apply_write(self, op: str, params: dict):
+        """Mirror a write that reached the sheet (SheetWriteQueue on_applied hook)"""
+        self.medal_version += 1
+        if op == 'updateMedal':
+            entry = self.user_medals.get(params['userId'])
+            if entry is not None:
+                medals, fetched = entry
+                medals = [m for m in medals if m != params['medalName']]
+                if params['hasMedal'] == 'true':
+                    medals.append(params['medalName'])
+                self.user_medals[params['userId']] = (medals, fetched)
+        elif op in ('addMedalType', 'deleteMedalType') and self.medal_types is not None:
+            medal_types, fetched = self.medal_types
+            medal_types = [m for m in medal_types if m != params['medalName']]
+            if op == 'addMedalType':
+                medal_types.append(params['medalName'])
+            else:
+                # Deleting a column removes it from every row
+                for user_id, (medals, user_fetched) in list(self.user_medals.items()):
+                    if params['medalName'] in medals:
+                        self.user_medals[user_id] = ([m for m in medals if m != params['medalName']], user_fetched)
+            self.medal_types = (medal_types, fetched)
+
+    # ── personnel ──────────────────────────────────
+    def get_personnel(self, rp_name: str) -> Tuple[Optional[PersonnelLookup], bool]:
+        return self._lookup(self.personnel.get(rp_name.casefold()), self.personnel_ttl)
+
+    def put_personnel(self, rp_name: str, result: PersonnelLookup):
+        self.personnel[rp_name.casefold()] = (result, time.time())
+
+    def get_roster(self) -> Tuple[Optional[List[PersonnelRecord]], bool]:
+        return self._lookup(self.roster, self.personnel_ttl)
+
+    def put_roster(self, records: List[PersonnelRecord], fetched: Optional[float] = None):
+        self.roster = (list(records), fetched or time.time())
+        self._roster_by_name = {r.rp_name.casefold(): r for r in records}
+
+    def roster_record(self, rp_name: str) -> Optional[PersonnelRecord]:
+        """A personnel record from the last bulk pull, without counting a lookup"""
+        return self._roster_by_name.get(rp_name.casefold())
+
+    # ── snapshot ───────────────────────────────────
+    def to_snapshot(self) -> dict:
+        return {
+            'medal_types': self.medal_types,
+            'user_medals': self.user_medals,
+            'personnel': {name: (result.to_dict(), fetched) for name, (result, fetched) in self.personnel.items()},
+            'roster': ([r.to_dict() for r in self.roster[0]], self.roster[1]) if self.roster else None,
+        }
+
+    def restore(self, data: dict):
+        """Load snapshot entries, keeping any that were fetched since startup"""
+        if data.get('medal_types') and self.medal_types is None:
+            medal_types, fetched = data['medal_types']
+            self.medal_types = (medal_types, fetched)
+            self.medal_version += 1
+        for user_id, (medals, fetched) in reversed(list(data.get('user_medals', {}).items())):
+            if user_id not in self.user_medals:
+                # Older than anything fetched since startup, so first in line for eviction
+                self.user_medals[user_id] = (medals, fetched)
+                self.user_medals.move_to_end(user_id, last=False)
+        self._trim_user_medals()
+        try:
+            for name, (result, fetched) in data.get('personnel', {}).items():
+                self.personnel.setdefault(name, (PersonnelLookup.decode(result), fetched))
+            if data.get('roster') and self.roster is None:
+                records, fetched = data['roster']
+                self.put_roster(Roster.decode({'personnel': records}).records, fetched)
+        except SchemaError as e:
+            log.warning(f"⚠️ Ignoring cached personnel data from the snapshot: {e}")
+
+    def stats(self) -> dict:
+        return {
+            'users': len(self.user_medals), 'personnel': len(self.personnel),
+            'roster': len(self.roster[0]) if self.roster else 0,
+            'medal_types': len(self.medal_types[0]) if self.medal_types else 0,
+            'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses,
+        }
@@ -0,0 +1,458 @@
+"""
+Durable write-behind queue for Google Sheets mutations.
+
+Every mutation is appended to a JSONL journal before the approver is told it
+was accepted, so nothing is lost if Apps Script is slow, down, or the bot
+restarts. A background worker drains the journal in batches, coalescing
+writes that hit the same user/medal cell and retrying failures with
+exponential backoff. Writes that exhaust their retries are parked as
+failures until an admin retries or discards them via /queue.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger("pennybot.sheet_queue")
+
+MAX_ATTEMPTS = 8        # attempts before a write is parked as a failure
+BACKOFF_BASE = 5.0      # seconds, doubled on every failed attempt
+BACKOFF_MAX = 300.0     # cap for a single backoff interval
+BATCH_SIZE = 25         # writes flushed per worker pass
+FLUSH_DELAY = 0.5       # seconds to wait for more writes to coalesce
+COMPACT_EVERY = 500     # journal records before the file is rewritten
+
+# Operations that live in a user's row and therefore need the row to exist
+USER_OPS = ('addUser', 'updateMedal')
+
+
+def coalesce_key(op: str, params: dict) -> Tuple[str, ...]:
+    """Writes with the same key overwrite each other; only the last one is sent"""
+    if op == 'updateMedal':
+        return ('medal', params['userId'], params['medalName'])
+    if op == 'addUser':
+        return ('user', params['userId'])
+    if op in ('addMedalType', 'deleteMedalType'):
+        return ('type', params['medalName'])
+    raise ValueError(f"Unknown sheet operation: {op}")
+
+
+class QueuedWrite:
+    __slots__ = ('seq', 'op', 'params', 'created', 'attempts', 'next_attempt', 'error')
+
+    def __init__(self, seq: int, op: str, params: dict, created: float,
+                 attempts: int = 0, next_attempt: float = 0.0, error: Optional[str] = None):
+        self.seq = seq
+        self.op = op
+        self.params = params
+        self.created = created
+        self.attempts = attempts
+        self.next_attempt = next_attempt
+        self.error = error
+
+    @property
+    def key(self) -> Tuple[str, ...]:
+        return coalesce_key(self.op, self.params)
+
+    def describe(self) -> str:
+        if self.op == 'updateMedal':
+            verb = "award" if self.params.get('hasMedal') == 'true' else "remove"
+            return f"{verb} {self.params['medalName']} for <@{self.params['userId']}>"
+        if self.op == 'addUser':
+            return f"add row for <@{self.params['userId']}>"
+        verb = "add" if self.op == 'addMedalType' else "delete"
+        return f"{verb} medal type {self.params['medalName']}"
+
+    def to_record(self) -> dict:
+        return {
+            't': 'put', 'seq': self.seq, 'op': self.op, 'params': self.params,
+            'created': self.created, 'attempts': self.attempts,
+            'next': self.next_attempt, 'error': self.error
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "QueuedWrite":
+        return cls(
+            record['seq'], record['op'], record['params'], record.get('created', 0.0),
+            record.get('attempts', 0), record.get('next', 0.0), record.get('error')
+        )
+
+
+class SheetWriteQueue:
+    """
+    Journal-backed queue of sheet writes.
+
+    `handlers` maps an operation name to a coroutine taking the write's params
+    and returning True on success. `ensure_user` is awaited once per user per
+    batch before that user's row writes are applied. `on_applied`, if given,
+    is called with (op, params) after each write reaches the sheet.
+    `version` changes whenever the pending or failed writes do.
+    """
+
+    def __init__(self, path: str,
+                 handlers: Dict[str, Callable[[dict], Awaitable[bool]]],
+                 ensure_user: Callable[[str], Awaitable[bool]],
+                 on_applied: Optional[Callable[[str, dict], None]] = None):
+        self.path = path
+        self.handlers = handlers
+        self.ensure_user = ensure_user
+        self.on_applied = on_applied
+        self.pending: Dict[Tuple[str, ...], QueuedWrite] = {}
+        self.failed: Dict[Tuple[str, ...], QueuedWrite] = {}
+        self.in_flight: set = set()
+        self.last_flush: Optional[float] = None
+        self.flushed_total = 0
+        self._user_medals: Dict[str, Dict[str, bool]] = {}
+        self.version = 0
+        self._seq = 0
+        self._records = 0
+        self._io_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._load()
+
+    # ── journal ────────────────────────────────────
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; everything before it is intact
+                    continue
+                self._apply_record(record)
+                self._records += 1
+
+        log.info(f"📒 Loaded sheet queue: {len(self.pending)} pending, {len(self.failed)} failed")
+
+    def _apply_record(self, record: dict):
+        kind = record.get('t')
+        seq = record.get('seq', 0)
+        self._seq = max(self._seq, seq)
+
+        if kind == 'put':
+            entry = QueuedWrite.from_record(record)
+            self.failed.pop(entry.key, None)
+            self._track(entry)
+            return
+
+        key = tuple(record.get('key', ()))
+        entry = self.pending.get(key) or self.failed.get(key)
+        if not entry or entry.seq != seq:
+            return
+
+        if kind == 'done':
+            self._untrack(entry)
+        elif kind == 'retry':
+            entry.attempts = record['attempts']
+            entry.next_attempt = record['next']
+            entry.error = record.get('error')
+        elif kind == 'dead':
+            entry.error = record.get('error')
+            self._untrack(entry)
+            self.failed[key] = entry
+        elif kind == 'revive':
+            self.failed.pop(key, None)
+            entry.attempts = 0
+            entry.next_attempt = 0.0
+            self._track(entry)
+        elif kind == 'discard':
+            self.failed.pop(key, None)
+
+    def _append_sync(self, records: List[dict]):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact_sync(self, entries: List[QueuedWrite], dead: set):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry.to_record(), separators=(',', ':')) + "\n")
+                if entry.seq in dead:
+                    f.write(json.dumps({'t': 'dead', 'seq': entry.seq, 'key': entry.key,
+                                        'error': entry.error}, separators=(',', ':')) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def _journal(self, records: List[dict]):
+        async with self._io_lock:
+            await asyncio.to_thread(self._append_sync, records)
+            self._records += len(records)
+
+    async def _maybe_compact(self):
+        """Rewrite the journal as a snapshot once it is mostly settled records"""
+        if self._records < COMPACT_EVERY:
+            return
+
+        async with self._io_lock:
+            entries = sorted(list(self.pending.values()) + list(self.failed.values()),
+                             key=lambda e: e.seq)
+            dead = {e.seq for e in self.failed.values()}
+            await asyncio.to_thread(self._compact_sync, entries, dead)
+            self._records = len(entries) + len(dead)
+
+    # ── in-memory index ────────────────────────────
+    def _track(self, entry: QueuedWrite):
+        old = self.pending.get(entry.key)
+        if old:
+            self._untrack(old)
+        self.pending[entry.key] = entry
+        self.version += 1
+        if entry.op == 'updateMedal':
+            medals = self._user_medals.setdefault(entry.params['userId'], {})
+            medals[entry.params['medalName']] = entry.params['hasMedal'] == 'true'
+
+    def _untrack(self, entry: QueuedWrite):
+        if self.pending.get(entry.key) is not entry:
+            return
+        del self.pending[entry.key]
+        self.version += 1
+        if entry.op == 'updateMedal':
+            medals = self._user_medals.get(entry.params['userId'], {})
+            medals.pop(entry.params['medalName'], None)
+            if not medals:
+                self._user_medals.pop(entry.params['userId'], None)
+
+    # ── producer side ──────────────────────────────
+    async def enqueue(self, op: str, params: dict) -> QueuedWrite:
+        """Durably record a single write and wake the worker"""
+        return (await self.enqueue_many([(op, params)]))[0]
+
+    async def enqueue_many(self, writes: List[Tuple[str, dict]]) -> List[QueuedWrite]:
+        """Durably record several writes with a single journal append"""
+        now = time.time()
+        entries = []
+        for op, params in writes:
+            coalesce_key(op, params)
+            self._seq += 1
+            entries.append(QueuedWrite(self._seq, op, params, now))
+
+        await self._journal([entry.to_record() for entry in entries])
+
+        for entry in entries:
+            self.failed.pop(entry.key, None)
+            self._track(entry)
+
+        self._wake.set()
+        await self._maybe_compact()
+        return entries
+
+    def overlay_user_medals(self, user_id: str, medals: List[str]) -> List[str]:
+        """Apply not-yet-flushed medal writes to a medal list read from the sheet"""
+        changes = self._user_medals.get(user_id)
+        if not changes:
+            return medals
+
+        result = [m for m in medals if changes.get(m, True)]
+        result.extend(m for m, has in changes.items() if has and m not in result)
+        return result
+
+    def overlay_medal_types(self, medal_types: List[str]) -> List[str]:
+        """Apply not-yet-flushed medal type additions/deletions to the sheet's list"""
+        result = list(medal_types)
+        for entry in sorted(self.pending.values(), key=lambda e: e.seq):
+            name = entry.params.get('medalName')
+            if entry.op == 'addMedalType' and name not in result:
+                result.append(name)
+            elif entry.op == 'deleteMedalType' and name in result:
+                result.remove(name)
+        return result
+
+    # ── admin actions ──────────────────────────────
+    async def retry_failed(self) -> int:
+        entries = list(self.failed.values())
+        if not entries:
+            return 0
+
+        await self._journal([{'t': 'revive', 'seq': e.seq, 'key': e.key} for e in entries])
+        for entry in entries:
+            self.failed.pop(entry.key, None)
+            entry.attempts = 0
+            entry.next_attempt = 0.0
+            self._track(entry)
+
+        self._wake.set()
+        return len(entries)
+
+    async def clear_failed(self) -> int:
+        entries = list(self.failed.values())
+        if entries:
+            await self._journal([{'t': 'discard', 'seq': e.seq, 'key': e.key} for e in entries])
+            self.failed.clear()
+            self.version += 1
+        return len(entries)
+
+    def stats(self) -> dict:
+        now = time.time()
+        by_op: Dict[str, int] = {}
+        for entry in self.pending.values():
+            by_op[entry.op] = by_op.get(entry.op, 0) + 1
+
+        oldest = min((e.created for e in self.pending.values()), default=None)
+        waiting = sum(1 for e in self.pending.values() if e.attempts > 0)
+        return {
+            'pending': len(self.pending),
+            'in_flight': len(self.in_flight),
+            'retrying': waiting,
+            'failed': len(self.failed),
+            'by_op': by_op,
+            'oldest_age': (now - oldest) if oldest else None,
+            'last_flush': self.last_flush,
+            'flushed_total': self.flushed_total
+        }
+
+    # ── worker side ────────────────────────────────
+    def _ready(self, now: float) -> List[QueuedWrite]:
+        ready = [e for e in self.pending.values()
+                 if e.seq not in self.in_flight and e.next_attempt <= now]
+        ready.sort(key=lambda e: e.seq)
+        return ready[:BATCH_SIZE]
+
+    async def _wait_for_work(self):
+        while True:
+            self._wake.clear()
+            now = time.time()
+            if self._ready(now):
+                # Give bursts (multi-target approvals, imports) a moment to coalesce
+                await asyncio.sleep(FLUSH_DELAY)
+                return
+
+            upcoming = [e.next_attempt for e in self.pending.values() if e.seq not in self.in_flight]
+            timeout = max(0.0, min(upcoming) - now) if upcoming else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        """Background worker; never returns"""
+        while True:
+            try:
+                await self._wait_for_work()
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"💥 Sheet queue worker error: {e}")
+                await asyncio.sleep(BACKOFF_BASE)
+
+    async def flush(self):
+        """Apply one batch of ready writes"""
+        batch = self._ready(time.time())
+        if not batch:
+            return
+
+        # Group row writes per user so each user's row is checked once per step.
+        # A medal type change only runs ahead of the row writes queued after it
+        # (so awards of a just-added type succeed); one queued after row writes
+        # starts a new step, so an award never lands after its type was deleted.
+        steps: List[Tuple[List[List[QueuedWrite]], Dict[str, List[QueuedWrite]]]] = [([], {})]
+        for entry in batch:
+            type_units, user_units = steps[-1]
+            if entry.op in USER_OPS:
+                user_units.setdefault(entry.params['userId'], []).append(entry)
+            elif user_units:
+                steps.append(([[entry]], {}))
+            else:
+                type_units.append([entry])
+
+        for entry in batch:
+            self.in_flight.add(entry.seq)
+
+        # Units run concurrently so the Apps Script client can pack the calls of
+        # each step (row lookups, row creation, medal updates) into one envelope.
+        records = []
+        try:
+            for type_units, user_units in steps:
+                for units in (type_units, list(user_units.values())):
+                    for unit_records in await asyncio.gather(*(self._apply_unit(unit) for unit in units)):
+                        records.extend(unit_records)
+        finally:
+            for entry in batch:
+                self.in_flight.discard(entry.seq)
+
+        await self._journal(records)
+
+        for record in records:
+            self._finish(record)
+
+        self.last_flush = time.time()
+        await self._maybe_compact()
+
+    async def _apply_unit(self, unit: List[QueuedWrite]) -> List[dict]:
+        records = []
+
+        if unit[0].op in USER_OPS:
+            user_id = unit[0].params['userId']
+            try:
+                ok = await self.ensure_user(user_id)
+                error = None if ok else "Could not find or create user row"
+            except Exception as e:
+                ok, error = False, str(e)
+
+            if not ok:
+                return [self._failure(entry, error) for entry in unit]
+
+        writes = [entry for entry in unit if entry.op != 'addUser']
+        records.extend({'t': 'done', 'seq': entry.seq, 'key': entry.key}
+                       for entry in unit if entry.op == 'addUser')
+
+        outcomes = await asyncio.gather(*(self.handlers[entry.op](entry.params) for entry in writes),
+                                        return_exceptions=True)
+        for entry, outcome in zip(writes, outcomes):
+            if outcome is True:
+                records.append({'t': 'done', 'seq': entry.seq, 'key': entry.key})
+            elif isinstance(outcome, BaseException):
+                records.append(self._failure(entry, str(outcome)))
+            else:
+                records.append(self._failure(entry, "Apps Script reported failure"))
+
+        return records
+
+    def _failure(self, entry: QueuedWrite, error: str) -> dict:
+        attempts = entry.attempts + 1
+        if attempts >= MAX_ATTEMPTS:
+            log.error(f"❌ Sheet write failed permanently ({entry.describe()}): {error}",
+                      extra={'function': entry.op, 'attempts': attempts})
+            return {'t': 'dead', 'seq': entry.seq, 'key': entry.key, 'error': error}
+
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempts - 1)))
+        delay *= random.uniform(0.8, 1.2)
+        log.warning(f"⚠️ Sheet write failed ({entry.describe()}), retry {attempts}/{MAX_ATTEMPTS} in {delay:.0f}s: {error}",
+                    extra={'function': entry.op, 'attempts': attempts})
+        return {'t': 'retry', 'seq': entry.seq, 'key': entry.key,
+                'attempts': attempts, 'next': time.time() + delay, 'error': error}
+
+    def _finish(self, record: dict):
+        key = tuple(record['key'])
+        entry = self.pending.get(key)
+        if not entry or entry.seq != record['seq']:
+            # Superseded by a newer write to the same cell while in flight
+            return
+
+        if record['t'] == 'done':
+            self._untrack(entry)
+            self.flushed_total += 1
+            if self.on_applied:
+                self.on_applied(entry.op, entry.params)
+        elif record['t'] == 'retry':
+            entry.attempts = record['attempts']
+            entry.next_attempt = record['next']
+            entry.error = record['error']
+        elif record['t'] == 'dead':
+            entry.error = record['error']
+            self._untrack(entry)
+            self.failed[key] = entry
@@ -0,0 +1,269 @@
+"""
+Google Sheets access shared by every extension.
+
+The Apps Script clients (and their HTTP sessions), the read cache, the
+write-behind queue and the audit journal live here so they survive
+extension reloads.
+"""
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+from apps_script_batch import AppsScriptClient, MAX_BODY_BYTES
+from audit_journal import AuditJournal
+from config import APPS_SCRIPT_WEB_APP_URL, PERSONNEL_SCRIPT_URL, DATA_DIR
+from sheet_cache import SheetCache
+from script_models import (MedalList, MedalMatrixPage, MedalStats, PersonnelLookup, PersonnelRecord, Roster,
+                           UserMedals, UsersMedals)
+from sheet_queue import SheetWriteQueue
+
+log = logging.getLogger("pennybot")
+
+# ────────────────────────────────────────────────
+#   1. Apps Script API Helper Functions (Medals)
+# ────────────────────────────────────────────────
+# Responses larger than this are dropped instead of buffered (bytes, after decompression)
+APPS_SCRIPT_MAX_BODY = int(os.getenv("APPS_SCRIPT_MAX_BODY", MAX_BODY_BYTES))
+
+apps_script = AppsScriptClient(
+    APPS_SCRIPT_WEB_APP_URL,
+    name='medals',
+    batching=os.getenv("APPS_SCRIPT_BATCHING", "1") != "0",
+    max_body=APPS_SCRIPT_MAX_BODY
+)
+
+# Medal and personnel reads; kept in step with our own writes and snapshotted across restarts
+sheet_cache = SheetCache()
+cache_refreshes: Dict[str, asyncio.Task] = {}
+
+def refresh_later(key: str, coro_fn):
+    """Refresh a stale cache entry in the background (once per key at a time)"""
+    task = cache_refreshes.get(key)
+    if task and not task.done():
+        return
+    task = cache_refreshes[key] = asyncio.get_running_loop().create_task(coro_fn())
+    task.add_done_callback(lambda _: cache_refreshes.pop(key, None))
+
+async def call_apps_script(function_name: str, data: dict = None, model=None):
+    """Call Apps Script web app function (concurrent calls share one batched request)"""
+    return await apps_script.call(function_name, data, model=model)
+
+async def find_user_row(user_id: str) -> Optional[int]:
+    """Find the row number for a user ID in column A"""
+    result = await call_apps_script('findUserRow', {'userId': user_id})
+    if result and result.get('success'):
+        row = result.get('row')
+        return row if row != -1 else None
+    return None
+
+async def add_user_to_sheet(user_id: str) -> int:
+    """Add a new user to column A (empty medals)"""
+    result = await call_apps_script('addUser', {'userId': user_id})
+    if result and result.get('success'):
+        return result.get('row')
+    raise Exception("Failed to add user")
+
+async def fetch_user_medals(user_id: str) -> Optional[List[str]]:
+    result = await call_apps_script('getUserMedals', {'userId': user_id}, model=UserMedals)
+    if result is None:
+        return None
+    sheet_cache.put_user_medals(user_id, result.medals)
+    return result.medals
+
+async def get_user_medals(user_id: str) -> List[str]:
+    """Get all medals for a user (Y in their row), including queued changes"""
+    medals, fresh = sheet_cache.get_user_medals(user_id)
+    if medals is None:
+        medals = await fetch_user_medals(user_id) or []
+    elif not fresh:
+        refresh_later(f"user:{user_id}", lambda: fetch_user_medals(user_id))
+    return sheet_queue.overlay_user_medals(user_id, medals)
+
+async def update_medal_for_user(user_id: str, medal_name: str, has_medal: bool) -> bool:
+    """Update a user's medal status (set Y or empty)"""
+    result = await call_apps_script('updateMedal', {
+        'userId': user_id,
+        'medalName': medal_name,
+        'hasMedal': 'true' if has_medal else 'false'
+    })
+    return bool(result and result.get('success'))
+
+async def fetch_medal_types() -> Optional[List[str]]:
+    result = await call_apps_script('getAllMedalTypes', model=MedalList)
+    if result is None:
+        return None
+    sheet_cache.put_medal_types(result.medals)
+    return result.medals
+
+async def get_all_medal_types() -> List[str]:
+    """Get all medal types from row 1, including queued additions/deletions"""
+    medal_types, fresh = sheet_cache.get_medal_types()
+    if medal_types is None:
+        medal_types = await fetch_medal_types() or []
+    elif not fresh:
+        refresh_later("medal_types", fetch_medal_types)
+    return sheet_queue.overlay_medal_types(medal_types)
+
+async def add_medal_type(medal_name: str) -> bool:
+    """Add a new medal type to row 1"""
+    result = await call_apps_script('addMedalType', {'medalName': medal_name})
+    return bool(result and result.get('success'))
+
+async def delete_medal_type(medal_name: str) -> bool:
+    """Delete a medal type from row 1"""
+    result = await call_apps_script('deleteMedalType', {'medalName': medal_name})
+    return bool(result and result.get('success'))
+
+async def get_medal_stats() -> Optional[MedalStats]:
+    """Get medal statistics"""
+    return await call_apps_script('getMedalStats', model=MedalStats)
+
+async def fetch_users_medals(user_ids: List[str]) -> Dict[str, List[str]]:
+    result = await call_apps_script('getUsersMedals', {'userIds': ",".join(user_ids)}, model=UsersMedals)
+    if result is not None:
+        users = result.users
+    else:
+        # Older script deployments lack the bulk endpoint; fall back to one call per user
+        semaphore = asyncio.Semaphore(5)
+
+        async def fetch(uid):
+            async with semaphore:
+                res = await call_apps_script('getUserMedals', {'userId': uid}, model=UserMedals)
+                return res.medals if res is not None else []
+
+        users = dict(zip(user_ids, await asyncio.gather(*(fetch(uid) for uid in user_ids))))
+
+    for uid in user_ids:
+        sheet_cache.put_user_medals(uid, users.get(uid, []))
+    return users
+
+async def get_users_medals(user_ids: List[str]) -> Dict[str, List[str]]:
+    """Get medals for many users in one call (cached users skip it), including queued changes"""
+    users = {}
+    missing = []
+    stale = []
+    for uid in user_ids:
+        medals, fresh = sheet_cache.get_user_medals(uid)
+        if medals is None:
+            missing.append(uid)
+            continue
+        users[uid] = medals
+        if not fresh:
+            stale.append(uid)
+
+    if missing:
+        users.update(await fetch_users_medals(missing))
+    if stale:
+        refresh_later(f"users:{','.join(stale)}", lambda: fetch_users_medals(stale))
+
+    return {uid: sheet_queue.overlay_user_medals(uid, users.get(uid, [])) for uid in user_ids}
+
+async def get_medal_matrix_page(offset: int, limit: int) -> MedalMatrixPage:
+    """Get one page of the user × medal matrix"""
+    # Not cached: an export walks every row and must stay bounded by the page size.
+    # Decoded here rather than with model=, so a script error reaches the admin as raised
+    result = await call_apps_script('getMedalMatrix', {'offset': offset, 'limit': limit})
+    if result and result.get('success'):
+        return MedalMatrixPage.decode(result)
+    raise Exception(result.get('error', 'Unknown error') if result else 'No response from Google Sheets')
+
+async def ensure_user_row(user_id: str) -> bool:
+    """Make sure a user has a row in column A before writing to it"""
+    if await find_user_row(user_id):
+        return True
+    await add_user_to_sheet(user_id)
+    return True
+
+# ────────────────────────────────────────────────
+#   1b. Write-behind queue for sheet mutations
+# ────────────────────────────────────────────────
+sheet_queue = SheetWriteQueue(
+    os.path.join(DATA_DIR, "sheet_queue.jsonl"),
+    handlers={
+        'updateMedal': lambda p: update_medal_for_user(p['userId'], p['medalName'], p['hasMedal'] == 'true'),
+        'addMedalType': lambda p: add_medal_type(p['medalName']),
+        'deleteMedalType': lambda p: delete_medal_type(p['medalName']),
+    },
+    ensure_user=ensure_user_row,
+    on_applied=sheet_cache.apply_write
+)
+
+# ────────────────────────────────────────────────
+#   1c. Audit journal of discharge/medal decisions
+# ────────────────────────────────────────────────
+audit_journal = AuditJournal(os.path.join(DATA_DIR, "audit.jsonl"))
+
+async def audit(kind: str, action: str, **fields):
+    """Record an action in the audit journal; never fails the calling flow"""
+    try:
+        await audit_journal.append(kind, action, **fields)
+    except Exception as e:
+        log.warning(f"⚠️ Failed to write audit record ({kind}/{action}): {e}")
+
+# ────────────────────────────────────────────────
+#   2. Personnel Status API Helper Functions
+# ────────────────────────────────────────────────
+personnel_script = AppsScriptClient(
+    PERSONNEL_SCRIPT_URL,
+    name='personnel',
+    batching=os.getenv("APPS_SCRIPT_BATCHING", "1") != "0",
+    max_body=APPS_SCRIPT_MAX_BODY
+)
+
+async def call_personnel_script(function_name: str, data: dict = None, model=None):
+    """Call Personnel Status Apps Script web app"""
+    if not PERSONNEL_SCRIPT_URL:
+        log.error("❌ PERSONNEL_SCRIPT_URL not configured", extra={'function': function_name})
+        return None
+
+    return await personnel_script.call(function_name, data, model=model)
+
+async def fetch_personnel(rp_name: str) -> Optional[PersonnelLookup]:
+    result = await call_personnel_script('findPersonnel', {'rpName': rp_name}, model=PersonnelLookup)
+    if result is not None:
+        sheet_cache.put_personnel(rp_name, result)
+    return result
+
+# Called with every bulk personnel pull (ID <-> RP name index, ...)
+roster_listeners: List[Callable[[List[PersonnelRecord]], None]] = []
+
+async def fetch_roster() -> Optional[List[PersonnelRecord]]:
+    """Pull every personnel record in one call: getAllPersonnel -> {'personnel': [{'rpName', 'sheet', ...}]}"""
+    result = await call_personnel_script('getAllPersonnel', model=Roster)
+    if result is None:
+        log.warning("⚠️ Bulk personnel pull failed")
+        return None
+    records = result.records
+    sheet_cache.put_roster(records)
+    for listener in roster_listeners:
+        try:
+            listener(records)
+        except Exception as e:
+            log.warning(f"⚠️ Roster listener failed: {e}")
+    return records
+
+async def get_roster() -> Optional[List[PersonnelRecord]]:
+    """All personnel records, refreshed in the background once stale"""
+    records, fresh = sheet_cache.get_roster()
+    if records is None:
+        return await fetch_roster()
+    if not fresh:
+        refresh_later("roster", fetch_roster)
+    return records
+
+async def find_personnel(rp_name: str) -> Optional[PersonnelLookup]:
+    """Find personnel by RP name in the personnel sheets; None if the sheets could not be reached"""
+    # Names on the last bulk pull are answered locally
+    record = sheet_cache.roster_record(rp_name)
+    if record is not None:
+        if not sheet_cache.get_roster()[1]:
+            refresh_later("roster", fetch_roster)
+        return PersonnelLookup(True, record)
+
+    result, fresh = sheet_cache.get_personnel(rp_name)
+    if result is None:
+        return await fetch_personnel(rp_name)
+    if not fresh:
+        refresh_later(f"personnel:{rp_name.casefold()}", lambda: fetch_personnel(rp_name))
+    return result
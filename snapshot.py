@@ -0,0 +1,130 @@
+"""
+Warm-start snapshot of in-memory state.
+
+Components register a named section with a dump function (returning
+JSON-able data), a restore function and a maximum age. The store writes all
+sections to one JSON file periodically and on graceful shutdown, and on
+startup restores each section whose snapshot is recent enough. A snapshot
+written by a different format version, or a section whose fingerprint (e.g.
+the sheet URL it was read from) no longer matches, is ignored.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
+
+log = logging.getLogger("pennybot.snapshot")
+
+SNAPSHOT_VERSION = 1
+SAVE_INTERVAL = 300   # seconds between periodic saves
+
+
+class Section:
+    __slots__ = ('name', 'dump', 'restore', 'max_age', 'fingerprint')
+
+    def __init__(self, name: str, dump: Callable[[], object], restore: Callable[[object, float], None],
+                 max_age: float, fingerprint: str):
+        self.name = name
+        self.dump = dump
+        self.restore = restore
+        self.max_age = max_age
+        self.fingerprint = fingerprint
+
+
+class SnapshotStore:
+    def __init__(self, path: str, interval: float = SAVE_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.sections: Dict[str, Section] = {}
+        self.last_save: Optional[float] = None
+        self.last_load: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+
+    def register(self, name: str, dump: Callable[[], object], restore: Callable[[object, float], None],
+                 max_age: float, fingerprint: str = ""):
+        """restore(data, saved_at) is called with the section's data and the wall time it was saved"""
+        self.sections[name] = Section(name, dump, restore, max_age, fingerprint)
+
+    # ── load ───────────────────────────────────────
+    def load(self) -> Dict[str, str]:
+        """Restore every fresh section; returns the outcome per section"""
+        outcome = {name: 'missing' for name in self.sections}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            self.last_load = outcome
+            return outcome
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠️ Ignoring unreadable snapshot: {e}")
+            self.last_load = outcome
+            return outcome
+
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            log.warning("⚠️ Ignoring snapshot from another version",
+                        extra={'found': snapshot.get('version'), 'expected': SNAPSHOT_VERSION})
+            self.last_load = {name: 'version' for name in self.sections}
+            return self.last_load
+
+        now = time.time()
+        for name, stored in snapshot.get('sections', {}).items():
+            section = self.sections.get(name)
+            if section is None:
+                continue
+            age = now - stored.get('saved_at', 0)
+            if stored.get('fingerprint', "") != section.fingerprint:
+                outcome[name] = 'mismatch'
+            elif age > section.max_age:
+                outcome[name] = 'stale'
+            else:
+                try:
+                    section.restore(stored['data'], stored['saved_at'])
+                    outcome[name] = 'restored'
+                except Exception as e:
+                    log.warning(f"⚠️ Failed to restore snapshot section {name}: {e}")
+                    outcome[name] = 'error'
+
+        log.info("💾 Snapshot loaded", extra={'sections': outcome, 'age_s': round(now - snapshot.get('saved_at', now))})
+        self.last_load = outcome
+        return outcome
+
+    # ── save ───────────────────────────────────────
+    def _collect(self) -> dict:
+        now = time.time()
+        sections = {}
+        for name, section in self.sections.items():
+            try:
+                sections[name] = {'saved_at': now, 'fingerprint': section.fingerprint, 'data': section.dump()}
+            except Exception as e:
+                log.warning(f"⚠️ Failed to dump snapshot section {name}: {e}")
+        return {'version': SNAPSHOT_VERSION, 'saved_at': now, 'sections': sections}
+
+    def _write_sync(self, text: str):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def save(self):
+        async with self._lock:
+            # Serialise on the loop (consistent view of the state), write in a thread
+            started = time.perf_counter()
+            text = json.dumps(self._collect(), separators=(',', ':'))
+            await asyncio.to_thread(self._write_sync, text)
+            self.last_save = time.time()
+            log.debug("💾 Snapshot saved", extra={'bytes': len(text),
+                                                  'ms': round((time.perf_counter() - started) * 1000, 1)})
+
+    async def run(self):
+        """Periodic saves until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as e:
+                log.warning(f"⚠️ Snapshot save failed: {e}")